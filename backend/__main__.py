@@ -0,0 +1,264 @@
+"""Command-line entry point for the LLM Council.
+
+Usage:
+    python -m backend "What is the CAP theorem?"
+    python -m backend ask --members gemini,claude --chairman claude "..."
+    echo "question" | python -m backend ask -
+    python -m backend batch questions.jsonl results.jsonl
+    python -m backend serve --port 8001
+    python -m backend serve --workers 4
+    python -m backend worker --port 8101
+    python -m backend loadtest --users 8 --turns 3 --output loadtest.json
+    python -m backend bench --save-baseline
+    python -m backend ask --record cassette.jsonl "..."
+    python -m backend serve --replay cassette.jsonl --replay-latency
+
+Only the `serve` and `worker` subcommands import the web stack (FastAPI/uvicorn); the
+other subcommands run the council in-process, so a one-off question starts
+as fast as the CLIs themselves.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
+
+SUBCOMMANDS = ("ask", "batch", "serve", "worker", "loadtest", "bench")
+
+
+def _split_models(value: str):
+    return [m.strip() for m in value.split(",") if m.strip()]
+
+
+def _positive_seconds(value: str) -> float:
+    seconds = float(value)
+    if not seconds > 0:
+        raise argparse.ArgumentTypeError(f"must be a positive number of seconds, got {value}")
+    return seconds
+
+
+def _progress(message: str):
+    """Progress goes to stderr so stdout carries only the answer."""
+    print(message, file=sys.stderr, flush=True)
+
+
+async def _ask(args) -> int:
+    from .council import stream_council
+    from .deadline import Deadline
+
+    question = args.question
+    if question in (None, "-"):
+        question = sys.stdin.read()
+    question = question.strip()
+    if not question:
+        _progress("Error: empty question")
+        return 2
+
+    deadline = Deadline(args.deadline) if args.deadline is not None else None
+
+    result = {}
+    # cli_bridge reports failing CLIs with print(): keep those lines off
+    # stdout, which carries only the answer (or the JSON)
+    with contextlib.redirect_stdout(sys.stderr):
+        async for event in stream_council(question, None, args.members, args.chairman, deadline):
+            event_type = event["type"]
+            result[event_type] = event
+
+            if args.quiet or args.json:
+                continue
+            if event_type == "stage1_start":
+                _progress("Stage 1: collecting individual responses...")
+            elif event_type in ("stage1_member_complete", "stage2_member_complete"):
+                status = "done" if event["success"] else "failed"
+                _progress(f"  {event['model']}: {status} in {event['duration_seconds']:.1f}s")
+            elif event_type == "stage2_start":
+                _progress("Stage 2: collecting peer rankings...")
+            elif event_type == "stage2_complete":
+                _progress("Aggregate rankings:")
+                for entry in event["metadata"]["aggregate_rankings"]:
+                    _progress(f"  {entry['model']}: average rank {entry['average_rank']}")
+            elif event_type == "stage2_skipped":
+                _progress("Stage 2: skipped to meet the deadline")
+            elif event_type == "stage3_start":
+                _progress("Stage 3: chairman synthesis...")
+            elif event_type == "stage3_complete":
+                chairman = event.get("metadata", {}).get("chairman", {})
+                for attempt in chairman.get("attempts", []):
+                    if not attempt["success"]:
+                        _progress(f"  chairman {attempt['model']} failed after "
+                                  f"{attempt['duration_seconds']:.1f}s, failing over")
+                if chairman.get("fallback"):
+                    _progress("  no chairman available, using the best individual answer")
+
+    stage3 = result["stage3_complete"]["data"]
+
+    if args.json:
+        print(json.dumps({
+            "stage1": result.get("stage1_complete", {}).get("data", []),
+            "stage2": result.get("stage2_complete", {}).get("data", []),
+            "stage3": stage3,
+            "metadata": {
+                **result.get("stage2_complete", {}).get("metadata", {}),
+                **result["stage3_complete"].get("metadata", {}),
+                "timing": {
+                    stage: result[f"{stage}_complete"]["metadata"]["timing"]
+                    for stage in ("stage1", "stage2", "stage3")
+                    if "timing" in result.get(f"{stage}_complete", {}).get("metadata", {})
+                },
+            },
+        }, indent=2))
+    else:
+        if not args.quiet:
+            _progress(f"Chairman ({stage3['model']}):\n")
+        print(stage3["response"], flush=True)
+
+    return 1 if stage3["model"] == "error" else 0
+
+
+def _batch(args) -> int:
+    from .batch import run_batch, print_report
+
+    stats = asyncio.run(run_batch(args.input, args.output, args.concurrency))
+    print_report(stats)
+    return 1 if stats["failed"] else 0
+
+
+def _loadtest(args) -> int:
+    from .loadtest import run
+
+    report = run(args)
+    return 1 if report["turns"]["failed"] else 0
+
+
+def _bench(args) -> int:
+    from .benchmarks import run
+
+    return run(args)
+
+
+def _serve(args) -> int:
+    from .main import serve
+
+    serve(args.host, args.port, args.workers)
+    return 0
+
+
+def _worker(args) -> int:
+    from .worker import run
+
+    return run(args)
+
+
+def _use_cassette(args):
+    """Record CLI interactions to, or replay them from, a cassette file."""
+    if not (getattr(args, "record", None) or getattr(args, "replay", None)):
+        return
+    from .cassette import Cassette, set_cassette
+
+    if args.replay:
+        cassette = Cassette(args.replay, "replay", args.replay_latency)
+        _progress(f"Replaying {len(cassette)} recorded CLI interactions from {args.replay}")
+    else:
+        cassette = Cassette(args.record, "record")
+    set_cassette(cassette)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="llm-council",
+        description="Ask the LLM Council from the terminal, run batches or start the API server."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    cassette = argparse.ArgumentParser(add_help=False)
+    group = cassette.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="CASSETTE", default=None,
+                       help="Record every CLI interaction to a cassette file")
+    group.add_argument("--replay", metavar="CASSETTE", default=None,
+                       help="Serve CLI interactions from a cassette instead of running the CLIs")
+    cassette.add_argument("--replay-latency", action="store_true",
+                          help="When replaying, wait for the recorded latencies")
+
+    ask = subparsers.add_parser("ask", parents=[cassette],
+                                help="Run one council turn and print the answer")
+    ask.add_argument("question", nargs="?", help="Question to ask ('-' or omitted reads stdin)")
+    ask.add_argument("--members", type=_split_models, default=None,
+                     help="Comma-separated council members (default: COUNCIL_MODELS)")
+    ask.add_argument("--chairman", default=None,
+                     help="Chairman model (default: CHAIRMAN_MODEL)")
+    ask.add_argument("--deadline", type=_positive_seconds, default=None,
+                     help="End-to-end budget in seconds; the council degrades to meet it")
+    ask.add_argument("--json", action="store_true",
+                     help="Print all stages and metadata as JSON")
+    ask.add_argument("-q", "--quiet", action="store_true",
+                     help="Print only the final answer")
+
+    from .batch import add_arguments
+    batch = subparsers.add_parser("batch", parents=[cassette], help="Run the council over a JSONL file")
+    add_arguments(batch)
+
+    serve = subparsers.add_parser("serve", parents=[cassette], help="Start the FastAPI server")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=None,
+                       help="Port (default: $PORT or 8001)")
+    serve.add_argument("--workers", type=int, default=None,
+                       help="Server processes, sharing state under SHARED_STATE_DIR "
+                            "(default: $LLM_COUNCIL_WORKERS or 1)")
+
+    worker = subparsers.add_parser("worker", help="Start a worker agent that runs CLI calls for API servers")
+    worker.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on (other than loopback, needs CLI_WORKER_TOKEN)")
+    worker.add_argument("--port", type=int, default=None,
+                        help="Port (default: WORKER_PORT, 8101)")
+    worker.add_argument("--uds", default=None,
+                        help="Listen on this Unix socket instead of a TCP port")
+    worker.add_argument("--name", default=None,
+                        help="Name reported to the API servers (default: hostname:pid)")
+
+    from . import loadtest
+    load = subparsers.add_parser("loadtest", parents=[cassette],
+                                 help="Load test the API with concurrent simulated users")
+    loadtest.add_arguments(load)
+
+    from . import benchmarks
+    bench = subparsers.add_parser("bench", help="Run the micro-benchmarks against the baseline")
+    benchmarks.add_arguments(bench)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+
+    # Bare question: `python -m backend "..."` is shorthand for `ask`
+    if argv and argv[0] not in SUBCOMMANDS and argv[0] not in ("-h", "--help"):
+        argv.insert(0, "ask")
+    elif not argv:
+        argv = ["ask"]
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "workers", None) and args.workers > 1 and (args.record or args.replay):
+        # The cassette lives in this process, not in the server processes
+        parser.error("--record and --replay need a single server process")
+    try:
+        _use_cassette(args)
+    except OSError as e:
+        parser.error(f"cannot open cassette: {e}")
+
+    if args.command == "serve":
+        return _serve(args)
+    if args.command == "worker":
+        return _worker(args)
+    if args.command == "batch":
+        return _batch(args)
+    if args.command == "loadtest":
+        return _loadtest(args)
+    if args.command == "bench":
+        return _bench(args)
+    return asyncio.run(_ask(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
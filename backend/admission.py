@@ -0,0 +1,195 @@
+"""Admission control for council runs: a global cap with fair queueing.
+
+Every council run starts 7+ CLI calls, which all compete for the same CLI
+concurrency slots. Without admission control a client firing 50 requests
+at once fills the slots and every other client's turn waits behind them.
+The scheduler admits at most ADMISSION_MAX_CONCURRENT_RUNS runs at a time.
+The rest wait in a queue ordered by priority class, then shared fairly
+between clients.
+"""
+
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Dict, Any, Optional
+from . import metrics
+from .config import ADMISSION_MAX_CONCURRENT_RUNS, ADMISSION_CLIENT_WEIGHTS, ADMISSION_PRIORITIES
+
+
+class AdmissionScheduler:
+    """
+    Admits council runs up to a cap and queues the others.
+
+    Waiting requests are served in priority-class order. Within a class,
+    clients are served by weighted fair queueing. Each request gets a
+    virtual finish tag: the larger of the class's virtual time and the
+    client's previous tag, plus 1 / weight. The lowest tag is admitted
+    first. A client with many requests queued therefore gets its share of
+    the runs, while a newcomer's request is admitted after at most one run
+    of each other client.
+    """
+
+    def __init__(
+        self,
+        max_running: Optional[int] = ADMISSION_MAX_CONCURRENT_RUNS,
+        weights: Optional[Dict[str, float]] = None,
+        priorities: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            max_running: Runs admitted at once (None: no limit)
+            weights: Share of the runs of each client (default 1)
+            priorities: Priority classes, most urgent first
+        """
+        self.max_running = max_running
+        self.weights = ADMISSION_CLIENT_WEIGHTS if weights is None else weights
+        self.priorities = list(priorities or ADMISSION_PRIORITIES)
+        self.running = 0
+        self._waiting: List[Dict[str, Any]] = []
+        self._virtual_time = {priority: 0.0 for priority in self.priorities}
+        self._last_tag: Dict[tuple, float] = {}
+        self._sequence = itertools.count()
+
+    def enqueue(self, client: str, priority: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a run (admitted right away if there is room).
+
+        Args:
+            client: Fairness key (client id or conversation id)
+            priority: Priority class (default: the most urgent)
+
+        Returns:
+            The ticket, to pass to positions/wait and finally to release
+
+        Raises:
+            ValueError: If the priority class is unknown
+        """
+        priority = priority or self.priorities[0]
+        if priority not in self.priorities:
+            raise ValueError(f"Unknown priority {priority!r} (expected one of {self.priorities})")
+
+        key = (priority, client)
+        tag = max(self._virtual_time[priority], self._last_tag.get(key, 0.0)) + 1 / self.weights.get(client, 1)
+        self._last_tag[key] = tag
+        ticket = {
+            "client": client,
+            "priority": priority,
+            "state": "waiting",
+            "order": (self.priorities.index(priority), tag, next(self._sequence)),
+            "tag": tag,
+            "enqueued_at": time.monotonic(),
+            "queue_seconds": 0.0,
+            "changed": asyncio.Event(),
+        }
+        self._waiting.append(ticket)
+        metrics.ADMISSION_QUEUE_DEPTH.inc(priority=priority)
+        self._dispatch()
+        return ticket
+
+    def _dispatch(self):
+        """Admit waiting runs while there is room, and wake up the waiters."""
+        admitted = []
+        while self._waiting and (self.max_running is None or self.running < self.max_running):
+            ticket = min(self._waiting, key=lambda t: t["order"])
+            self._waiting.remove(ticket)
+            self.running += 1
+            ticket["state"] = "running"
+            ticket["queue_seconds"] = time.monotonic() - ticket["enqueued_at"]
+            priority = ticket["priority"]
+            self._virtual_time[priority] = max(self._virtual_time[priority], ticket["tag"])
+            metrics.ADMISSION_QUEUE_DEPTH.dec(priority=priority)
+            metrics.ADMISSION_WAIT.observe(ticket["queue_seconds"], priority=priority)
+            admitted.append(ticket)
+
+        if admitted:
+            # Tags at or below the virtual time would be raised to it anyway
+            self._last_tag = {
+                key: tag for key, tag in self._last_tag.items() if tag > self._virtual_time[key[0]]
+            }
+        self._notify(admitted)
+
+    def _notify(self, tickets: List[Dict[str, Any]] = ()):
+        """Wake up the given tickets and every waiting one (positions changed)."""
+        for ticket in list(tickets) + self._waiting:
+            ticket["changed"].set()
+
+    def position(self, ticket: Dict[str, Any]) -> int:
+        """Position of a waiting ticket in the queue (1 = next), 0 once admitted."""
+        if ticket["state"] != "waiting":
+            return 0
+        return 1 + sum(1 for other in self._waiting if other["order"] < ticket["order"])
+
+    async def positions(self, ticket: Dict[str, Any]) -> AsyncIterator[int]:
+        """
+        Follow a ticket through the queue.
+
+        Yields:
+            The ticket's queue position each time it changes, until it is
+            admitted (nothing at all if it was admitted right away)
+        """
+        last = None
+        while ticket["state"] == "waiting":
+            ticket["changed"].clear()
+            position = self.position(ticket)
+            if position != last:
+                last = position
+                yield position
+            await ticket["changed"].wait()
+
+    async def wait(self, ticket: Dict[str, Any]):
+        """Wait until a ticket is admitted."""
+        async for _ in self.positions(ticket):
+            pass
+
+    def release(self, ticket: Dict[str, Any]):
+        """
+        Give back a ticket: ends a run, or leaves the queue if it was still
+        waiting (e.g. the client disconnected). Releasing twice is harmless.
+        """
+        if ticket["state"] == "waiting":
+            self._waiting.remove(ticket)
+            ticket["state"] = "cancelled"
+            metrics.ADMISSION_QUEUE_DEPTH.dec(priority=ticket["priority"])
+            self._notify()
+        elif ticket["state"] == "running":
+            ticket["state"] = "done"
+            self.running -= 1
+            self._dispatch()
+
+    @asynccontextmanager
+    async def admit(self, client: str, priority: Optional[str] = None):
+        """Queue a run, wait for its turn and hold the slot for the block."""
+        ticket = self.enqueue(client, priority)
+        try:
+            await self.wait(ticket)
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def status(self) -> Dict[str, Any]:
+        """Runs admitted and waiting, per priority class and per client."""
+        waiting: Dict[str, Dict[str, int]] = {priority: {} for priority in self.priorities}
+        for ticket in self._waiting:
+            clients = waiting[ticket["priority"]]
+            clients[ticket["client"]] = clients.get(ticket["client"], 0) + 1
+        return {"max_running": self.max_running, "running": self.running, "waiting": waiting}
+
+
+def ticket_metadata(ticket: Dict[str, Any]) -> Dict[str, Any]:
+    """What a response reports about its admission."""
+    return {"priority": ticket["priority"], "queue_seconds": round(ticket["queue_seconds"], 4)}
+
+
+_scheduler = AdmissionScheduler()
+
+
+def set_scheduler(scheduler: AdmissionScheduler):
+    """Replace the process-wide scheduler (e.g. with a different cap)."""
+    global _scheduler
+    _scheduler = scheduler
+
+
+def get_scheduler() -> AdmissionScheduler:
+    """The process-wide scheduler."""
+    return _scheduler
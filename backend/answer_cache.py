@@ -0,0 +1,246 @@
+"""Near-duplicate question detection to reuse past council answers."""
+
+import hashlib
+import random
+import re
+import unicodedata
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from . import storage
+from .config import (
+    ANSWER_CACHE_MODE,
+    ANSWER_CACHE_THRESHOLD,
+    ANSWER_CACHE_MIN_WORDS,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_PERMUTATIONS,
+)
+
+# Words that carry no meaning for matching questions (English and Italian),
+# including the request phrasing ("can you explain...", "dimmi...") and the
+# "s" of "what's". "What" is phrasing too ("what is X" asks the same as
+# "explain X"), but the other interrogatives change the question and are kept
+STOPWORDS = frozenset("""
+a an the and or of to in on for with about from by as at is are was were be
+been do does did what whats this that these those it its i me my you your we
+our can could would should will please tell explain describe give show
+difference between vs versus there their s
+il lo la i gli le un una uno di da in con su per tra fra e o che cosa del della
+dei delle al alla ai alle mi ti ci si puoi potresti spiega spiegami dimmi
+descrivi qual quale quali sono cos differenza
+""".split())
+
+# Words that turn a question around: a question with one never matches one
+# without ("t" is what is left of "don't", "isn't"...)
+NEGATIONS = frozenset("not no never without non t senza mai".split())
+
+# Words, numbers and arithmetic or comparison operators
+_TOKEN = re.compile(r"[a-z0-9]+|[-+*/%^=<>]")
+
+# MinHash: a fixed seed keeps the stored signatures valid across restarts
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(ANSWER_CACHE_PERMUTATIONS)
+]
+
+
+def _stem(word: str) -> str:
+    """Strip the commonest English plural and verb endings."""
+    if len(word) <= 4 or word.endswith(("ss", "is", "us")):
+        # Short words and "class", "redis", "status" are left alone
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("sses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    for suffix in ("ing", "ed", "s"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def words(question: str) -> List[str]:
+    """
+    The meaningful words of a question, in order.
+
+    Lowercases, strips accents and punctuation, drops stopwords and
+    request phrasing, and applies a light stemming. Numbers and operators
+    are kept ("2+2" and "2*2" differ).
+
+    Args:
+        question: The user's question
+
+    Returns:
+        The words, in the order they appear
+    """
+    text = unicodedata.normalize("NFKD", question.lower())
+    text = text.encode("ascii", "ignore").decode("ascii")
+    return [_stem(word) for word in _TOKEN.findall(text) if word not in STOPWORDS]
+
+
+def normalize(question: str) -> List[str]:
+    """
+    Reduce a question to the terms it is matched on.
+
+    The terms are its meaningful words (see words) plus each pair of
+    consecutive words, so that word order counts: "is Python faster than
+    Go" and "is Go faster than Python" share words but not pairs.
+
+    Args:
+        question: The user's question
+
+    Returns:
+        Sorted distinct terms of the question
+    """
+    found = words(question)
+    pairs = [f"{first} {second}" for first, second in zip(found, found[1:])]
+    return sorted(set(found) | set(pairs))
+
+
+def _word_count(terms: List[str]) -> int:
+    """Distinct words among the terms (pairs contain a space)."""
+    return sum(1 for term in terms if " " not in term)
+
+
+def _negated(terms: List[str]) -> bool:
+    """Whether the terms contain a negation."""
+    return any(term in NEGATIONS for term in terms)
+
+
+def signature(terms: List[str]) -> List[int]:
+    """
+    MinHash signature of a set of terms.
+
+    Args:
+        terms: Terms from normalize
+
+    Returns:
+        One minimum hash per permutation (empty for no terms)
+    """
+    if not terms:
+        return []
+    hashes = [
+        int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "big")
+        for term in terms
+    ]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(first: List[int], second: List[int]) -> float:
+    """Estimated Jaccard similarity of the term sets behind two signatures."""
+    if not first or len(first) != len(second):
+        return 0.0
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+def remember(conversation_id: str, question: str, message_index: int):
+    """
+    Add an answered question to the index.
+
+    The oldest entries are dropped beyond ANSWER_CACHE_MAX_ENTRIES.
+
+    Args:
+        conversation_id: Conversation holding the answer
+        question: The user's question
+        message_index: Index of the assistant message with the answer
+    """
+    terms = normalize(question)
+    if not terms:
+        return
+
+    entry = {
+        "question": question,
+        "terms": terms,
+        "signature": signature(terms),
+        "conversation_id": conversation_id,
+        "message_index": message_index,
+        "created_at": datetime.utcnow().isoformat()
+    }
+    storage.update_answer_index(lambda entries: (entries + [entry])[-ANSWER_CACHE_MAX_ENTRIES:])
+
+
+def lookup(question: str, threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Find the past answer to the question most similar to this one.
+
+    Args:
+        question: The user's question
+        threshold: Minimum similarity (defaults to ANSWER_CACHE_THRESHOLD);
+            questions shorter than ANSWER_CACHE_MIN_WORDS need identical terms,
+            and a negated question only matches negated ones
+
+    Returns:
+        Dict with the match 'score', the past 'question', its
+        'conversation_id', the 'stage3' answer and whether to return it
+        instead of running the council ('hit', per ANSWER_CACHE_MODE), or
+        None if the cache is disabled or no past question (whose answer
+        still exists) is similar enough
+    """
+    threshold = ANSWER_CACHE_THRESHOLD if threshold is None else threshold
+    terms = normalize(question)
+    if not ANSWER_CACHE_MODE or not terms:
+        return None
+    query = signature(terms)
+
+    # Short questions change meaning with a single word: only exact matches
+    exact_only = _word_count(terms) < ANSWER_CACHE_MIN_WORDS
+    negated = _negated(terms)
+
+    candidates = []
+    for entry in storage.get_answer_index():
+        if entry["terms"] == terms:
+            score = 1.0
+        elif exact_only or _word_count(entry["terms"]) < ANSWER_CACHE_MIN_WORDS:
+            continue
+        elif _negated(entry["terms"]) != negated:
+            # "Should I use X" and "should I not use X" want opposite answers
+            continue
+        else:
+            score = similarity(query, entry["signature"])
+        if score >= threshold:
+            candidates.append((score, entry))
+
+    # Best first, most recent first among equals; skip deleted answers
+    for score, entry in sorted(candidates, key=lambda c: (c[0], c[1]["created_at"]), reverse=True):
+        stage3 = _stored_answer(entry)
+        if stage3 is not None:
+            return {
+                "score": round(score, 3),
+                "question": entry["question"],
+                "conversation_id": entry["conversation_id"],
+                "stage3": stage3,
+                "hit": ANSWER_CACHE_MODE == "return"
+            }
+    return None
+
+
+def _stored_answer(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The Stage 3 answer an index entry points to, if it is still stored."""
+    conversation = storage.get_conversation(entry["conversation_id"])
+    if conversation is None:
+        return None
+    messages = conversation["messages"]
+    if entry["message_index"] >= len(messages):
+        return None
+    return messages[entry["message_index"]].get("stage3")
+
+
+def is_cacheable(stage3: Dict[str, Any]) -> bool:
+    """Whether a Stage 3 result is worth reusing (a real, fresh synthesis)."""
+    return (
+        bool(stage3.get("response"))
+        and stage3.get("model") != "error"
+        and not stage3["response"].startswith("Error:")
+        and "cache" not in stage3
+    )
+
+
+def cached_result(match: Dict[str, Any]) -> Dict[str, Any]:
+    """The Stage 3 result to return for a cache hit, marked with its source."""
+    return {**match["stage3"], "cache": match_metadata(match)}
+
+
+def match_metadata(match: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata describing a match: whether it was returned, score and source."""
+    return {key: match[key] for key in ("hit", "score", "question", "conversation_id")}
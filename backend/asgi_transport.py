@@ -0,0 +1,112 @@
+"""In-process httpx transport that streams ASGI responses as they are sent.
+
+httpx.ASGITransport waits for the whole response body before returning, so
+Server-Sent Events arrive all at once. This transport hands each body chunk
+to the client as soon as the app sends it, which lets the load test measure
+time-to-first-event and per-stage arrival without a server or sockets.
+"""
+
+import asyncio
+from typing import List, Tuple
+
+import httpx
+
+
+class _QueueStream(httpx.AsyncByteStream):
+    """Response body fed by the running ASGI app."""
+
+    def __init__(self, queue: asyncio.Queue, app_task: asyncio.Task, disconnected: asyncio.Event):
+        self._queue = queue
+        self._app_task = app_task
+        self._disconnected = disconnected
+
+    async def __aiter__(self):
+        while True:
+            chunk = await self._queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        # Propagate app errors raised after the response started
+        if self._app_task.done() and not self._app_task.cancelled():
+            self._app_task.result()
+
+    async def aclose(self):
+        self._disconnected.set()
+        if not self._app_task.done():
+            self._app_task.cancel()
+            try:
+                await self._app_task
+            except asyncio.CancelledError:
+                pass
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """Send httpx requests straight to an ASGI app, streaming the responses."""
+
+    def __init__(self, app, client: Tuple[str, int] = ("127.0.0.1", 50000)):
+        self.app = app
+        self.client = client
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": request.url.scheme,
+            "path": request.url.path,
+            "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query,
+            "root_path": "",
+            "headers": [(key.lower(), value) for key, value in request.headers.raw],
+            "server": (request.url.host, request.url.port or 80),
+            "client": self.client,
+        }
+
+        queue: asyncio.Queue = asyncio.Queue()
+        started = asyncio.Event()
+        disconnected = asyncio.Event()
+        response: dict = {}
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = message.get("headers", [])
+                started.set()
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    queue.put_nowait(message["body"])
+                if not message.get("more_body", False):
+                    queue.put_nowait(None)
+
+        async def run_app():
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                queue.put_nowait(None)
+                started.set()
+
+        app_task = asyncio.create_task(run_app())
+        await started.wait()
+        if "status" not in response:
+            # The app failed before starting the response
+            app_task.result()
+            raise RuntimeError("ASGI app returned without sending a response")
+
+        headers: List[Tuple[bytes, bytes]] = response["headers"]
+        return httpx.Response(
+            response["status"],
+            headers=headers,
+            stream=_QueueStream(queue, app_task, disconnected),
+            request=request,
+        )
@@ -0,0 +1,229 @@
+"""Offline batch runner: JSONL questions in, JSONL council results out.
+
+Usage:
+    python -m backend.batch questions.jsonl results.jsonl --concurrency 4
+
+Each input line is a JSON object with a "question" (or "content") field and
+an optional "id". Results are appended to the output file as soon as each
+pipeline finishes, so the output doubles as the checkpoint: re-running the
+same command skips every id that already has a successful result.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Set
+
+from .council import run_full_council
+from .config import BATCH_CONCURRENCY
+
+
+def load_questions(input_path: str) -> List[Dict[str, Any]]:
+    """
+    Load questions from a JSONL file.
+
+    Args:
+        input_path: Path to the input JSONL file
+
+    Returns:
+        List of dicts with 'id' and 'question' keys
+    """
+    questions = []
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            question = item.get("question", item.get("content"))
+            if not question:
+                raise ValueError(f"Line {line_number}: missing 'question' field")
+            questions.append({
+                "id": str(item.get("id", line_number)),
+                "question": question
+            })
+    return questions
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """
+    Read the ids already completed successfully from a previous run.
+
+    A truncated last line (run killed mid-write) is ignored, so that item
+    is simply run again.
+
+    Args:
+        output_path: Path to the output JSONL file
+
+    Returns:
+        Set of completed ids
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "error" not in record and record.get("id") is not None:
+                completed.add(str(record["id"]))
+    return completed
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max of a list of latencies, in seconds."""
+    return {
+        "p50": round(percentile(latencies, 50), 3),
+        "p95": round(percentile(latencies, 95), 3),
+        "p99": round(percentile(latencies, 99), 3),
+        "max": round(max(latencies), 3) if latencies else 0.0,
+    }
+
+
+async def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = BATCH_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Run the council over every pending question of a JSONL file.
+
+    A fixed pool of workers pulls questions from a shared queue, so at most
+    `concurrency` pipelines run at once; the per-CLI limits in cli_bridge
+    keep the individual CLIs from being oversubscribed across pipelines.
+
+    Args:
+        input_path: Path to the input JSONL file
+        output_path: Path to the output JSONL file (appended to)
+        concurrency: Number of council pipelines run concurrently
+
+    Returns:
+        Run statistics (counts, throughput, latency percentiles)
+    """
+    questions = load_questions(input_path)
+    completed_ids = load_completed_ids(output_path)
+    pending = [q for q in questions if q["id"] not in completed_ids]
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+
+    latencies: List[float] = []
+    failures = 0
+    started = time.monotonic()
+
+    with open(output_path, 'a', encoding='utf-8') as out:
+        # Terminate a line truncated by a killed run before appending
+        if out.tell() > 0:
+            with open(output_path, 'rb') as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    out.write("\n")
+
+        def write_record(record: Dict[str, Any]):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+
+        async def worker():
+            nonlocal failures
+            while True:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                item_started = time.monotonic()
+                record = {"id": item["id"], "question": item["question"]}
+                try:
+                    stage1, stage2, stage3, metadata = await run_full_council(item["question"])
+                    record.update({
+                        "stage1": stage1,
+                        "stage2": stage2,
+                        "stage3": stage3,
+                        "metadata": metadata
+                    })
+                    # The council reports a run where every member (or the
+                    # chairman) failed as an error synthesis, not an exception
+                    response = stage3.get("response") or ""
+                    if not stage1 or stage3.get("model") == "error" or response.startswith("Error:"):
+                        record["error"] = response or "The council produced no answer"
+                        failures += 1
+                except Exception as e:
+                    record["error"] = str(e)
+                    failures += 1
+
+                latency = time.monotonic() - item_started
+                latencies.append(latency)
+                record["latency_seconds"] = round(latency, 3)
+                record["completed_at"] = datetime.utcnow().isoformat()
+                write_record(record)
+
+                print(f"[{len(latencies)}/{len(pending)}] {item['id']} "
+                      f"{'failed' if 'error' in record else 'done'} in {latency:.1f}s")
+
+        await asyncio.gather(*[worker() for _ in range(max(concurrency, 1))])
+
+    elapsed = time.monotonic() - started
+
+    return {
+        "total": len(questions),
+        "skipped": len(questions) - len(pending),
+        "processed": len(latencies),
+        "failed": failures,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_minute": round(len(latencies) / elapsed * 60, 3) if elapsed > 0 else 0.0,
+        "latency_seconds": summarize_latencies(latencies),
+    }
+
+
+def print_report(stats: Dict[str, Any]):
+    """Print the end-of-run report."""
+    latency = stats["latency_seconds"]
+    print("=" * 60)
+    print(f"Questions:  {stats['total']} total, {stats['skipped']} already done, "
+          f"{stats['processed']} processed, {stats['failed']} failed")
+    print(f"Elapsed:    {stats['elapsed_seconds']}s "
+          f"({stats['throughput_per_minute']} questions/min)")
+    print(f"Latency:    p50 {latency['p50']}s  p95 {latency['p95']}s  "
+          f"p99 {latency['p99']}s  max {latency['max']}s")
+    print("=" * 60)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Register the batch runner arguments on a parser."""
+    parser.add_argument("input", help="Input JSONL file with one question per line")
+    parser.add_argument("output", help="Output JSONL file (appended to, used to resume)")
+    parser.add_argument(
+        "--concurrency", type=int, default=BATCH_CONCURRENCY,
+        help=f"Council pipelines run concurrently (default: {BATCH_CONCURRENCY})"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the LLM Council over a JSONL file.")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(run_batch(args.input, args.output, args.concurrency))
+    print_report(stats)
+
+
+if __name__ == "__main__":
+    main()
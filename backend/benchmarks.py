@@ -0,0 +1,445 @@
+"""Micro-benchmarks for the CPU-bound hot paths.
+
+Usage:
+    python -m backend bench                     # run all, compare to the baseline
+    python -m backend bench clean ranking       # only names starting with these
+    python -m backend bench --save-baseline     # record the current numbers
+
+Covers prompt building, CLI output cleaning on multi-MB outputs, ranking
+parsing, aggregate rankings for large councils and storage load/save/list
+on long conversations. Each benchmark is timed with timeit (loops calibrated
+to --min-time, best and median of --repeat runs) and compared on its best
+time per call against BENCHMARK_BASELINE_FILE: anything slower than
+baseline * BENCHMARK_REGRESSION_THRESHOLD is a regression (exit code 1).
+
+Baselines are machine-specific: record one on the machine that compares.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import timeit
+from datetime import datetime
+from typing import Callable, Dict, Any, List, Optional
+
+from .config import BENCHMARK_BASELINE_FILE, BENCHMARK_REGRESSION_THRESHOLD
+
+# name -> setup function returning the callable to time
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+CLEAN_OUTPUT_BYTES = 4 * 1024 * 1024
+
+WORDS = (
+    "council consensus latency model answer review ranking synthesis prompt "
+    "context evidence tradeoff system design cache queue stream token budget"
+).split()
+
+
+def benchmark(name: str):
+    """Register a benchmark setup function under a dotted name."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# =============================================================================
+# Sample data
+# =============================================================================
+
+def _text(size: int, seed: int = 0) -> str:
+    """Deterministic prose of about `size` characters, in paragraphs."""
+    rng = random.Random(seed)
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    text = " ".join(words)
+    return "\n\n".join(text[i:i + 400] for i in range(0, len(text), 400))
+
+
+def _cli_output(cli_type: str, size: int) -> str:
+    """Raw output of a CLI with its usual framing around a `size` answer."""
+    answer = _text(size)
+    if cli_type == "gemini":
+        return f"Loaded cached credentials.\nUsing model: gemini-2.5-pro\n{answer}\n"
+    if cli_type == "codex":
+        return (
+            "OpenAI Codex v0.65.0 (research preview)\n--------\n"
+            "workdir: /tmp\nmodel: gpt-5-codex\nprovider: openai\n--------\n"
+            f"user\nWhat is a cache?\n\ncodex\n{answer}\ntokens used\n{size // 4:,}\n"
+        )
+    return f"\nWarning: something\n\n{answer}\n"
+
+
+def _labels(count: int) -> List[str]:
+    return [f"Response {chr(65 + i)}" for i in range(count)]
+
+
+def _ranking_text(labels: List[str], seed: int = 0) -> str:
+    """A Stage 2 evaluation of each response followed by its FINAL RANKING."""
+    rng = random.Random(seed)
+    evaluation = "\n\n".join(
+        f"{label} covers the {rng.choice(WORDS)} well. {_text(300, seed)}" for label in labels
+    )
+    ranked = labels[:]
+    rng.shuffle(ranked)
+    ranking = "\n".join(f"{i}. {label}" for i, label in enumerate(ranked, 1))
+    return f"{evaluation}\n\nFINAL RANKING:\n{ranking}"
+
+
+def _conversation(conversation_id: str, turns: int, members: int = 3) -> Dict[str, Any]:
+    """A conversation with `turns` question/answer pairs of full council output."""
+    models = [f"model-{i}" for i in range(members)]
+    labels = _labels(members)
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Question {turn}: {_text(200, turn)}"})
+        messages.append({
+            "role": "assistant",
+            "stage1": [{"model": m, "response": _text(2000, turn + i)} for i, m in enumerate(models)],
+            "stage2": [{"model": m, "ranking": _ranking_text(labels, turn + i), "parsed_ranking": labels}
+                       for i, m in enumerate(models)],
+            "stage3": {"model": models[0], "response": _text(3000, turn)},
+        })
+    return {
+        "id": conversation_id,
+        "created_at": datetime(2025, 1, 1).isoformat(),
+        "title": "Benchmark conversation",
+        "messages": messages,
+    }
+
+
+# =============================================================================
+# Benchmarks
+# =============================================================================
+
+@benchmark("prompt.build_200_messages")
+def _bench_build_prompt():
+    from .cli_bridge import build_prompt_from_messages
+
+    roles = ("system", "user", "assistant")
+    messages = [{"role": roles[i % 3], "content": _text(1000, i)} for i in range(200)]
+    return lambda: build_prompt_from_messages(messages)
+
+
+def _bench_clean(cli_type: str):
+    from .cli_bridge import clean_cli_output
+
+    output = _cli_output(cli_type, CLEAN_OUTPUT_BYTES)
+    return lambda: clean_cli_output(output, cli_type)
+
+
+for _cli in ("gemini", "codex", "claude"):
+    benchmark(f"clean.{_cli}_4mb")(lambda cli_type=_cli: _bench_clean(cli_type))
+
+
+@benchmark("clean.codex_4mb_streamed")
+def _bench_clean_streamed():
+    from .cli_output import create_parser
+
+    output = _cli_output("codex", CLEAN_OUTPUT_BYTES)
+    chunks = [output[i:i + 65536] for i in range(0, len(output), 65536)]
+
+    def parse():
+        parser = create_parser("codex")
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+        return parser.text
+    return parse
+
+
+@benchmark("ranking.parse_5")
+def _bench_parse_small():
+    from .council import parse_ranking_from_text
+
+    text = _ranking_text(_labels(5))
+    return lambda: parse_ranking_from_text(text)
+
+
+@benchmark("ranking.parse_26")
+def _bench_parse_large():
+    from .council import parse_ranking_from_text
+
+    text = _ranking_text(_labels(26))
+    return lambda: parse_ranking_from_text(text)
+
+
+def _bench_aggregate(members: int):
+    from .council import calculate_aggregate_rankings
+
+    labels = _labels(members)
+    label_to_model = {label: f"model-{i}" for i, label in enumerate(labels)}
+    results = [{"model": f"model-{i}", "ranking": _ranking_text(labels, i)} for i in range(members)]
+    return lambda: calculate_aggregate_rankings(results, label_to_model)
+
+
+benchmark("aggregate.council_5")(lambda: _bench_aggregate(5))
+benchmark("aggregate.council_26")(lambda: _bench_aggregate(26))
+
+
+@benchmark("storage.save_300_turns")
+def _bench_storage_save():
+    from . import storage
+
+    conversation = _conversation("bench-save", 300)
+    return lambda: storage.save_conversation(conversation)
+
+
+@benchmark("storage.load_300_turns")
+def _bench_storage_load():
+    from . import storage
+
+    storage.save_conversation(_conversation("bench-load", 300))
+    return lambda: storage.get_conversation("bench-load")
+
+
+@benchmark("storage.list_50x100_turns")
+def _bench_storage_list():
+    from . import storage
+
+    for i in range(50):
+        storage.save_conversation(_conversation(f"bench-list-{i:02d}", 100))
+    return storage.list_conversations
+
+
+# =============================================================================
+# Runner
+# =============================================================================
+
+def measure(fn: Callable[[], Any], repeat: int = 5, min_time: float = 0.1) -> Dict[str, Any]:
+    """
+    Time a callable like timeit: calibrate the loops, then repeat.
+
+    Args:
+        fn: Callable to time
+        repeat: Number of timed runs
+        min_time: Minimum duration of one run in seconds
+
+    Returns:
+        Dict with 'min_seconds' and 'median_seconds' per call, 'loops' and 'repeat'
+    """
+    timer = timeit.Timer(fn)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    runs = [elapsed] + timer.repeat(repeat - 1, loops)
+    per_call = [run / loops for run in runs]
+    return {
+        "min_seconds": min(per_call),
+        "median_seconds": statistics.median(per_call),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def select(prefixes: Optional[List[str]] = None) -> List[str]:
+    """Benchmark names starting with any of the prefixes (all if none)."""
+    return [name for name in BENCHMARKS if not prefixes or name.startswith(tuple(prefixes))]
+
+
+def run_benchmarks(
+    names: Optional[List[str]] = None,
+    repeat: int = 5,
+    min_time: float = 0.1,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run benchmarks with storage in a temporary directory and tracing off.
+
+    Args:
+        names: Benchmarks to run (default: all)
+        repeat: Timed runs per benchmark
+        min_time: Minimum duration of one run in seconds
+        progress: Called with (name, result) after each benchmark
+
+    Returns:
+        Dict name -> measure() result
+    """
+    from . import storage, tracing
+
+    data_dir = tempfile.mkdtemp(prefix="llm-council-bench-")
+    original_data_dir, original_exporter = storage.DATA_DIR, tracing._exporter
+    storage.DATA_DIR = data_dir
+    tracing.set_exporter(None)
+
+    results = {}
+    try:
+        for name in names or list(BENCHMARKS):
+            results[name] = measure(BENCHMARKS[name](), repeat, min_time)
+            if progress:
+                progress(name, results[name])
+    finally:
+        storage.DATA_DIR = original_data_dir
+        tracing.set_exporter(original_exporter)
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    threshold: float = BENCHMARK_REGRESSION_THRESHOLD
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare best times per call against a baseline.
+
+    Args:
+        results: Current results (run_benchmarks)
+        baseline: Baseline results, same shape
+        threshold: Ratio above which a benchmark is a regression (and below
+            1/threshold an improvement)
+
+    Returns:
+        Dict name -> {'baseline_seconds', 'current_seconds', 'ratio', 'status'}
+        with status "regression", "improvement", "ok" or "new"
+    """
+    comparison = {}
+    for name, result in results.items():
+        current = result["min_seconds"]
+        previous = baseline.get(name, {}).get("min_seconds")
+        if not previous:
+            comparison[name] = {"baseline_seconds": None, "current_seconds": current,
+                                "ratio": None, "status": "new"}
+            continue
+        ratio = current / previous
+        if ratio > threshold:
+            status = "regression"
+        elif ratio < 1 / threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        comparison[name] = {"baseline_seconds": previous, "current_seconds": current,
+                            "ratio": round(ratio, 3), "status": status}
+    return comparison
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Results stored in a baseline file, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path: str, results: Dict[str, Dict[str, Any]], merge: bool = True):
+    """
+    Write results to a baseline file with the environment they came from.
+
+    Args:
+        path: Baseline file
+        results: Results to store
+        merge: Keep baseline entries of benchmarks that were not run
+    """
+    stored = (load_baseline(path) or {}) if merge else {}
+    stored.update(results)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.utcnow().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "implementation": platform.python_implementation(),
+                "platform": platform.platform(),
+                "machine": platform.machine(),
+            },
+            "results": dict(sorted(stored.items())),
+        }, f, indent=2)
+        f.write("\n")
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+    return f"{seconds / 1e-9:.3g}ns"
+
+
+def print_report(results: Dict[str, Dict[str, Any]], comparison: Optional[Dict[str, Dict[str, Any]]] = None):
+    """Print results, with the baseline comparison when given."""
+    print("=" * 78)
+    print(f"{'Benchmark':<30}{'best':>10}{'median':>10}{'baseline':>10}{'ratio':>8}  status")
+    for name, result in results.items():
+        compared = (comparison or {}).get(name, {})
+        ratio = compared.get("ratio")
+        print(f"{name:<30}{_format_seconds(result['min_seconds']):>10}"
+              f"{_format_seconds(result['median_seconds']):>10}"
+              f"{_format_seconds(compared.get('baseline_seconds')):>10}"
+              f"{(f'{ratio:.2f}x' if ratio else '-'):>8}  {compared.get('status', '')}")
+    print("=" * 78)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Register the benchmark arguments on a parser."""
+    parser.add_argument("names", nargs="*", help="Run only benchmarks whose name starts with these")
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_FILE,
+                        help=f"Baseline file (default: {BENCHMARK_BASELINE_FILE})")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store the results in the baseline file instead of comparing")
+    parser.add_argument("--threshold", type=float, default=BENCHMARK_REGRESSION_THRESHOLD,
+                        help=f"Slowdown ratio reported as a regression (default: {BENCHMARK_REGRESSION_THRESHOLD})")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark (default: 5)")
+    parser.add_argument("--min-time", type=float, default=0.1,
+                        help="Minimum seconds per timed run (default: 0.1)")
+    parser.add_argument("--output", default=None, help="Save results and comparison as JSON")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+
+
+def run(args) -> int:
+    """Run the benchmarks described by parsed arguments; 1 if any regressed."""
+    names = select(args.names)
+    if args.list:
+        print("\n".join(names))
+        return 0
+    if not names:
+        print(f"No benchmark matches {' '.join(args.names)}")
+        return 2
+
+    results = run_benchmarks(names, args.repeat, args.min_time,
+                             progress=lambda name, _: print(f"  {name}", flush=True))
+
+    comparison = None
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+    else:
+        baseline = load_baseline(args.baseline)
+        if baseline is None:
+            print(f"No baseline at {args.baseline} (create one with --save-baseline)")
+        else:
+            comparison = compare_to_baseline(results, baseline, args.threshold)
+    print_report(results, comparison)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "comparison": comparison}, f, indent=2)
+
+    regressions = [name for name, c in (comparison or {}).items() if c["status"] == "regression"]
+    if regressions:
+        print(f"Regressions (> {args.threshold}x baseline): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the LLM Council hot paths.")
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
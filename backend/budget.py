@@ -0,0 +1,243 @@
+"""Token and cost budgets per conversation, per member and per day."""
+
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from . import storage
+from .config import (
+    COUNCIL_MODELS,
+    BUDGET_CONVERSATION,
+    BUDGET_DAILY,
+    BUDGET_MEMBER_DAILY,
+    BUDGET_ECONOMY_RATIO,
+    BUDGET_MINIMAL_RATIO,
+    BUDGET_BYTES_PER_TOKEN,
+)
+
+# Council plans, from the most to the least expensive:
+# - "full": every member, peer rankings, full chairman prompt
+# - "economy": no Stage 2, compact chairman prompt
+# - "minimal": a single member, whose answer is returned as-is
+PLANS = ("full", "economy", "minimal")
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "total_tokens", "cost_usd")
+
+
+def empty_usage() -> Dict[str, Any]:
+    """Usage counters with nothing recorded yet."""
+    return {"calls": 0, "estimated_calls": 0, "input_tokens": 0,
+            "output_tokens": 0, "total_tokens": 0, "cost_usd": 0.0}
+
+
+def add_usage(total: Dict[str, Any], usage: Dict[str, Any]) -> Dict[str, Any]:
+    """Add `usage` to the `total` counters in place and return them."""
+    for key in ("calls", "estimated_calls") + USAGE_FIELDS:
+        total[key] = total.get(key, 0) + usage.get(key, 0)
+    total["cost_usd"] = round(total["cost_usd"], 6)
+    return total
+
+
+def call_usage(profile: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Usage of one CLI call, from its timing profile (see council.member_timing).
+
+    Uses the usage reported by the CLI when there is one; otherwise the
+    tokens are estimated from the prompt and response sizes and the call
+    is counted in 'estimated_calls'.
+
+    Args:
+        profile: Timing profile of the call
+
+    Returns:
+        Usage counters of the call, or None for a failed call
+    """
+    if not profile.get("success"):
+        return None
+
+    usage = empty_usage()
+    usage["calls"] = 1
+    reported = (profile.get("output") or {}).get("usage")
+    if reported:
+        usage["input_tokens"] = reported.get("input_tokens", 0)
+        usage["output_tokens"] = reported.get("output_tokens", 0)
+        usage["total_tokens"] = reported.get(
+            "total_tokens", usage["input_tokens"] + usage["output_tokens"]
+        )
+        usage["cost_usd"] = reported.get("cost_usd", 0.0)
+    else:
+        cli = profile.get("cli") or {}
+        usage["estimated_calls"] = 1
+        usage["input_tokens"] = cli.get("prompt_bytes", 0) // BUDGET_BYTES_PER_TOKEN
+        usage["output_tokens"] = cli.get("response_bytes", 0) // BUDGET_BYTES_PER_TOKEN
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+    return usage
+
+
+def turn_usage(stage_timings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Usage of a council turn, per member and in total.
+
+    Args:
+        stage_timings: The stages' timing profiles ('members' -> profile)
+
+    Returns:
+        Dict with the 'total' counters and the counters of each member
+        under 'members'
+    """
+    usage = {"total": empty_usage(), "members": {}}
+    for timing in stage_timings:
+        for model, profile in timing.get("members", {}).items():
+            call = call_usage(profile)
+            if call is None:
+                continue
+            add_usage(usage["members"].setdefault(model, empty_usage()), call)
+            add_usage(usage["total"], call)
+    return usage
+
+
+def today() -> str:
+    """The current day (UTC), as used for the daily counters."""
+    return datetime.utcnow().date().isoformat()
+
+
+def merge_turn(record: Dict[str, Any], usage: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add a turn's usage to a stored usage record.
+
+    Args:
+        record: Stored record ('turns', 'total', 'members'), may be empty
+        usage: Turn usage from turn_usage
+
+    Returns:
+        The updated record
+    """
+    record["turns"] = record.get("turns", 0) + 1
+    add_usage(record.setdefault("total", empty_usage()), usage["total"])
+    members = record.setdefault("members", {})
+    for model, member_usage in usage["members"].items():
+        add_usage(members.setdefault(model, empty_usage()), member_usage)
+    return record
+
+
+def record_turn(conversation_id: str, usage: Optional[Dict[str, Any]], day: Optional[str] = None):
+    """
+    Save a turn's usage in the conversation and in the daily counters.
+
+    Args:
+        conversation_id: Conversation identifier
+        usage: Turn usage from turn_usage (nothing is saved if None)
+        day: Day to charge (defaults to today)
+    """
+    if not usage:
+        return
+
+    storage.update_conversation_usage(conversation_id, lambda record: merge_turn(record, usage))
+    storage.update_daily_usage(day or today(), lambda record: merge_turn(record, usage))
+
+
+def usage_ratio(usage: Optional[Dict[str, Any]], limits: Optional[Dict[str, Any]]) -> Tuple[float, Optional[str]]:
+    """
+    How much of a budget is spent.
+
+    Args:
+        usage: Usage counters (may be None)
+        limits: Budget with optional 'tokens' and 'cost_usd' limits
+
+    Returns:
+        Tuple of (highest spent fraction, name of that limit or None)
+    """
+    usage = usage or {}
+    worst, name = 0.0, None
+    for limit, field in (("tokens", "total_tokens"), ("cost_usd", "cost_usd")):
+        value = (limits or {}).get(limit)
+        if not value:
+            continue
+        ratio = usage.get(field, 0) / value
+        if ratio > worst:
+            worst, name = ratio, limit
+    return worst, name
+
+
+def plan_turn(
+    conversation: Dict[str, Any],
+    council_models: Optional[List[str]] = None,
+    day: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Choose the council plan for the next turn of a conversation.
+
+    Members close to their own daily budget (BUDGET_MINIMAL_RATIO) sit the
+    turn out. Close to the conversation or daily budget the council falls
+    back to the "economy" plan (BUDGET_ECONOMY_RATIO) and then to the
+    "minimal" plan (BUDGET_MINIMAL_RATIO), which is also used when the
+    member budgets leave a single member. Budgets never refuse a turn: the
+    minimal plan always keeps the member with the most budget left.
+
+    Args:
+        conversation: Conversation dict as loaded from storage
+        council_models: Council members (defaults to COUNCIL_MODELS)
+        day: Day whose counters apply (defaults to today)
+
+    Returns:
+        Dict with 'plan', 'members' for the turn, the 'excluded' members,
+        the spent 'ratio' and the 'limit' that triggered a cheaper plan
+    """
+    members = list(council_models or COUNCIL_MODELS)
+    daily = storage.get_daily_usage(day or today())
+
+    member_ratios = {
+        model: usage_ratio(daily.get("members", {}).get(model), BUDGET_MEMBER_DAILY.get(model))[0]
+        for model in members
+    }
+    selected = [m for m in members if member_ratios[m] < BUDGET_MINIMAL_RATIO]
+    if not selected:
+        selected = [min(members, key=lambda m: member_ratios[m])]
+
+    ratio, limit = usage_ratio((conversation.get("usage") or {}).get("total"), BUDGET_CONVERSATION)
+    daily_ratio, daily_limit = usage_ratio(daily.get("total"), BUDGET_DAILY)
+    if daily_ratio > ratio:
+        ratio, limit = daily_ratio, f"daily_{daily_limit}"
+    elif limit is not None:
+        limit = f"conversation_{limit}"
+
+    if ratio >= BUDGET_MINIMAL_RATIO:
+        plan = "minimal"
+    elif len(selected) == 1 < len(members):
+        plan, limit = "minimal", "member_daily"
+    elif ratio >= BUDGET_ECONOMY_RATIO:
+        plan = "economy"
+    else:
+        plan = "full"
+        limit = "member_daily" if len(selected) < len(members) else None
+
+    if plan == "minimal":
+        selected = [min(selected, key=lambda m: member_ratios[m])]
+
+    return {
+        "plan": plan,
+        "members": selected,
+        "excluded": [m for m in members if m not in selected],
+        "ratio": round(ratio, 4),
+        "limit": limit
+    }
+
+
+def usage_report(day: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Today's usage next to the configured budgets.
+
+    Args:
+        day: Day to report (defaults to today)
+
+    Returns:
+        Dict with the 'date', its usage record and the budgets
+    """
+    day = day or today()
+    return {
+        "date": day,
+        "usage": storage.get_daily_usage(day),
+        "budgets": {
+            "conversation": BUDGET_CONVERSATION,
+            "daily": BUDGET_DAILY,
+            "member_daily": BUDGET_MEMBER_DAILY
+        }
+    }
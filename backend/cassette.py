@@ -0,0 +1,161 @@
+"""Record and replay CLI interactions for offline, reproducible runs.
+
+In "record" mode every CLI process run by cli_bridge is saved to a JSONL
+cassette: the CLI type, the prompt, the raw stdout/stderr, the exit code
+and the timing. In "replay" mode cli_bridge serves those recordings instead
+of spawning the CLIs, optionally sleeping for the recorded latencies, so the
+whole pipeline (run_full_council, the SSE endpoint, storage) can be tested
+and benchmarked without the CLIs.
+
+Recordings are matched on (cli, prompt). When the same prompt was recorded
+several times the recordings are served in order and the last one repeats.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Dict, Any, Optional, List
+
+from .config import CLI_CASSETTE_MODE, CLI_CASSETTE_FILE, CLI_CASSETTE_REPLAY_LATENCY
+
+MODES = ("record", "replay")
+
+
+def interaction_key(cli_type: str, prompt: str) -> str:
+    """Stable key of an interaction: hash of the CLI type and the prompt."""
+    return hashlib.sha256(f"{cli_type}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """A JSONL file of recorded CLI interactions."""
+
+    def __init__(self, path: str, mode: str, replay_latency: bool = False):
+        """
+        Args:
+            path: Cassette file (appended to when recording)
+            mode: "record" or "replay"
+            replay_latency: When replaying, sleep for each recorded duration
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {MODES})")
+        self.path = path
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._lock = threading.Lock()
+        self._recordings: Dict[str, List[Dict[str, Any]]] = {}
+        self._served: Dict[str, int] = {}
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self._recordings.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._recordings.values())
+
+    def record(
+        self,
+        cli_type: str,
+        prompt: str,
+        result: Optional[subprocess.CompletedProcess],
+        duration: float,
+        ttfb: Optional[float] = None
+    ):
+        """
+        Append one interaction to the cassette.
+
+        Args:
+            cli_type: CLI type (gemini, codex, claude)
+            prompt: The prompt sent to the CLI
+            result: The finished process, or None if it timed out
+            duration: Wall time of the process in seconds
+            ttfb: Seconds to the first byte of stdout, if known
+        """
+        entry = {
+            "key": interaction_key(cli_type, prompt),
+            "cli": cli_type,
+            "prompt": prompt,
+            "stdout": result.stdout if result else "",
+            "stderr": result.stderr if result else "",
+            "returncode": result.returncode if result else None,
+            "timed_out": result is None,
+            "duration_seconds": round(duration, 4),
+            "ttfb_seconds": round(ttfb, 4) if ttfb is not None else None,
+            "recorded_at": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def lookup(self, cli_type: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """Next recording for (cli, prompt), or None if there is none."""
+        key = interaction_key(cli_type, prompt)
+        with self._lock:
+            entries = self._recordings.get(key)
+            if not entries:
+                return None
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def replay(self, cli_type: str, prompt: str, timeout: float) -> subprocess.CompletedProcess:
+        """
+        Serve a recorded interaction as if the CLI had just run.
+
+        Args:
+            cli_type: CLI type (gemini, codex, claude)
+            prompt: The prompt sent to the CLI
+            timeout: The call's timeout; recorded timeouts and (with
+                replay_latency) recordings slower than it raise TimeoutExpired
+
+        Returns:
+            The recorded process result; a failed process (exit code 1) if
+            nothing was recorded for this prompt
+        """
+        entry = self.lookup(cli_type, prompt)
+        if entry is None:
+            key = interaction_key(cli_type, prompt)
+            return subprocess.CompletedProcess(
+                cli_type, 1, "", f"No cassette recording for {cli_type} (key {key[:12]})"
+            )
+
+        if self.replay_latency:
+            time.sleep(min(entry["duration_seconds"], timeout))
+            if entry["duration_seconds"] > timeout:
+                raise subprocess.TimeoutExpired(cli_type, timeout)
+        if entry["timed_out"]:
+            raise subprocess.TimeoutExpired(cli_type, timeout)
+
+        return subprocess.CompletedProcess(cli_type, entry["returncode"], entry["stdout"], entry["stderr"])
+
+
+def _create_cassette() -> Optional[Cassette]:
+    if CLI_CASSETTE_MODE is None:
+        return None
+    return Cassette(CLI_CASSETTE_FILE, CLI_CASSETTE_MODE, CLI_CASSETTE_REPLAY_LATENCY)
+
+
+_active = _create_cassette()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The cassette cli_bridge records to or replays from (None: live CLIs)."""
+    return _active
+
+
+def set_cassette(cassette: Optional[Cassette]) -> None:
+    """Switch recording/replay on (a Cassette) or off (None)."""
+    global _active
+    _active = cassette
@@ -12,28 +12,129 @@ OODA Loop Implementation:
 """
 
 import asyncio
+import contextvars
 import subprocess
 import os
 import tempfile
 import shutil
-from typing import List, Dict, Any, Optional
+import signal
+import threading
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from .config import CLI_MAX_CONCURRENCY, CLI_OUTPUT_FORMAT, CLI_TIMEOUT_SECONDS
+from .deadline import Deadline
+from . import cassette
+from . import cli_output
+from . import health
+from . import remote
+from . import resources
+from . import shared_state
+from . import tracing
+from . import workdirs
+from .metrics import (
+    CLI_CALL_DURATION,
+    CLI_CALLS,
+    CLI_IN_FLIGHT,
+    CLI_QUEUE_DEPTH,
+    CLI_CPU_SECONDS,
+    CLI_PEAK_RSS,
+    CLI_BLOCK_IO,
+    CLI_TOKENS,
+    CLI_COST,
+)
+
+
+# Profilo temporale, risorse usate e metadati dell'output della chiamata CLI
+# in corso: _query_cli li crea e _run_shell / _clean_output li riempiono
+# (il contesto segue to_thread)
+_call_timing: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "llm_council_call_timing", default=None
+)
+_call_usage: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "llm_council_call_usage", default=None
+)
+_call_metadata: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "llm_council_call_metadata", default=None
+)
+
+# Processi avviati dalla chiamata in corso: _run_and_check li termina se la
+# chiamata viene cancellata o scade, invece di lasciarli girare nel thread
+_call_processes: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "llm_council_call_processes", default=None
+)
+
+# Flag dell'output strutturato, per CLI e formato (vedi CLI_OUTPUT_FORMAT)
+_OUTPUT_FLAGS = {
+    "gemini": {"json": "--output-format json"},
+    "codex": {"json": "--json"},
+    "claude": {"json": "--output-format json", "stream-json": "--output-format stream-json --verbose"},
+}
+
+# CLI che hanno rifiutato i flag JSON (versioni vecchie): solo testo
+_text_only_clis = set()
+
+# Semafori per CLI, legati all'event loop corrente (ricreati se cambia)
+_cli_semaphores: Dict[str, asyncio.Semaphore] = {}
+_semaphores_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_cli_semaphore(cli_type: str) -> Optional[asyncio.Semaphore]:
+    """
+    Ritorna il semaforo che limita i processi concorrenti di una CLI.
+
+    Il limite è globale al processo: richieste API, batch, titoli e memoria
+    condividono gli stessi slot. None se la CLI non ha limite configurato.
+    """
+    global _semaphores_loop
+
+    limit = CLI_MAX_CONCURRENCY.get(cli_type)
+    if not limit:
+        return None
+
+    loop = asyncio.get_running_loop()
+    if _semaphores_loop is not loop:
+        _cli_semaphores.clear()
+        _semaphores_loop = loop
+
+    if cli_type not in _cli_semaphores:
+        _cli_semaphores[cli_type] = asyncio.Semaphore(limit)
+    return _cli_semaphores[cli_type]
 
 
 async def query_model(
     model: str,
     messages: List[Dict[str, str]],
-    timeout: float = 120.0
+    timeout: Optional[float] = None,
+    deadline: Optional[Deadline] = None,
+    local: bool = False
 ) -> Optional[Dict[str, Any]]:
     """
     Query un modello via CLI subprocess.
 
+    Con dei worker agent configurati (CLI_WORKERS, vedi remote.py e
+    worker.py) la chiamata viene eseguita da uno di loro, scelto in base
+    agli slot liberi; il profilo riporta il worker in timing['worker'].
+
     Args:
         model: Identificatore del modello/CLI (gemini, codex, claude)
         messages: Lista di messaggi con 'role' e 'content'
-        timeout: Timeout in secondi per la richiesta
+        timeout: Timeout in secondi per la richiesta (default 120s se non
+            c'è una deadline; con una deadline fa da limite superiore)
+        deadline: Deadline della richiesta; il tempo in coda sul semaforo
+            della CLI viene scalato dal budget
+        local: Esegue la CLI su questo host anche con dei worker agent
+            configurati (è il caso del worker stesso)
 
     Returns:
-        Dict con 'content' e 'reasoning_details', o None se fallito
+        Dict con 'content', 'reasoning_details' (ragionamento riportato
+        dalla CLI in modalità JSON, o None), 'model_id' e 'usage' (token di
+        input/output/cache e costo, dove la CLI li riporta; None altrimenti),
+        'timing' (profilo della
+        chiamata: attesa in coda, time-to-first-byte, durata del processo,
+        pulizia dell'output, dimensioni di prompt e risposta), 'resources'
+        (CPU user/sys, RSS massimo e I/O a blocchi dei processi della CLI,
+        None dove non disponibile) e 'cli_metadata' (modello, versione,
+        token usati estratti dall'output; None se assenti), o None se fallito
     """
     # OBSERVE: Costruisci il prompt completo
     prompt = build_prompt_from_messages(messages)
@@ -41,86 +142,515 @@ async def query_model(
     # ORIENT: Determina la CLI da usare
     cli_type = determine_cli(model)
 
-    # DECIDE & ACT: Esegui con la CLI appropriata
+    # Worker agent remoti: la capacità è la loro, non quella di questo host
+    # (le cassette restano locali)
+    pool = remote.get_pool()
+    if pool is not None and not local and cassette.get_cassette() is None:
+        return await _query_cli(model, cli_type, prompt, timeout, deadline, pool)
+
+    # DECIDE & ACT: Esegui con la CLI appropriata, rispettando il limite
+    # di concorrenza della CLI (l'attesa in coda non conta nel timeout
+    # della CLI, ma consuma la deadline della richiesta)
+    semaphore = get_cli_semaphore(cli_type)
+    if semaphore is None:
+        return await _query_cli(model, cli_type, prompt, timeout, deadline)
+
+    queued = time.monotonic()
+    with CLI_QUEUE_DEPTH.track(cli=cli_type):
+        await semaphore.acquire()
+        # Con più processi API il limite vale per tutti insieme: serve
+        # anche uno slot condiviso (vedi shared_state.py), atteso al più
+        # fino alla deadline
+        try:
+            slot = await shared_state.acquire_cli_slot(
+                cli_type, CLI_MAX_CONCURRENCY.get(cli_type),
+                timeout=deadline.remaining() if deadline is not None else None
+            )
+        except asyncio.TimeoutError:
+            semaphore.release()
+            print(f"Deadline expired while {model} waited for a CLI slot")
+            CLI_CALLS.inc(cli=cli_type, outcome="timeout")
+            return None
+        except BaseException:
+            semaphore.release()
+            raise
+    queue_seconds = time.monotonic() - queued
+    try:
+        response = await _query_cli(model, cli_type, prompt, timeout, deadline)
+    finally:
+        shared_state.release_cli_slot(slot)
+        semaphore.release()
+    if response is not None:
+        response["timing"]["queue_seconds"] = round(queue_seconds, 4)
+    return response
+
+
+async def _query_cli(
+    model: str,
+    cli_type: str,
+    prompt: str,
+    timeout: Optional[float],
+    deadline: Optional[Deadline],
+    pool: Optional[remote.WorkerPool] = None
+) -> Optional[Dict[str, Any]]:
+    """Esegue la CLI (qui o su un worker del pool) e normalizza il risultato per query_model."""
+    # Il timeout effettivo è calcolato dopo l'attesa in coda
+    if deadline is not None:
+        timeout = deadline.timeout(cap=timeout)
+        if timeout <= 0:
+            print(f"Deadline expired before querying {model}")
+            return None
+    elif timeout is None:
+        timeout = 120.0
+
+    started = time.monotonic()
+    timing = {"prompt_bytes": len(prompt.encode('utf-8'))}
+    usage = {}
+    metadata = {}
+    timing_token = _call_timing.set(timing)
+    usage_token = _call_usage.set(usage)
+    metadata_token = _call_metadata.set(metadata)
+    try:
+        with tracing.span("cli.call", model=model, cli=cli_type,
+                          prompt_bytes=timing["prompt_bytes"], timeout=round(timeout, 3)) as span:
+            with CLI_IN_FLIGHT.track(cli=cli_type):
+                if pool is not None:
+                    response, outcome = await _run_remote(pool, model, cli_type, prompt, timeout)
+                    span.set("worker", timing.get("worker"))
+                else:
+                    response, outcome = await _run_and_check(model, cli_type, prompt, timeout)
+            span.set("outcome", outcome)
+            if response is not None:
+                timing["response_bytes"] = len(response["content"].encode('utf-8'))
+                span.set("output_bytes", timing["response_bytes"])
+    finally:
+        _call_timing.reset(timing_token)
+        _call_usage.reset(usage_token)
+        _call_metadata.reset(metadata_token)
+    duration = time.monotonic() - started
+    timing["total_seconds"] = round(duration, 4)
+    if response is not None:
+        response["reasoning_details"] = metadata.pop("reasoning", None)
+        response["model_id"] = metadata.get("model")
+        response["usage"] = metadata.get("usage")
+        response["timing"] = timing
+        response["resources"] = usage or None
+        response["cli_metadata"] = metadata or None
+        _count_tokens(cli_type, response["usage"])
+
+    if usage:
+        CLI_CPU_SECONDS.inc(usage["user_cpu_seconds"], cli=cli_type, mode="user")
+        CLI_CPU_SECONDS.inc(usage["system_cpu_seconds"], cli=cli_type, mode="system")
+        CLI_PEAK_RSS.observe(usage["max_rss_bytes"], cli=cli_type)
+        CLI_BLOCK_IO.inc(usage["block_input_ops"], cli=cli_type, direction="in")
+        CLI_BLOCK_IO.inc(usage["block_output_ops"], cli=cli_type, direction="out")
+
+    # Per la salute conta la durata della CLI, non l'attesa di uno slot
+    # sui worker né la rete (altrimenti falserebbe la scelta del chairman)
+    health_seconds = timing.get("worker_seconds") or duration
+    if shared_state.enabled():
+        # Transazione SQLite condivisa: può attendere gli altri processi,
+        # quindi fuori dall'event loop
+        await asyncio.to_thread(health.record_call, model, health_seconds, response is not None)
+    else:
+        health.record_call(model, health_seconds, response is not None)
+    CLI_CALL_DURATION.observe(duration, cli=cli_type)
+    CLI_CALLS.inc(cli=cli_type, outcome=outcome)
+    return response
+
+
+def _count_tokens(cli_type: str, usage: Optional[Dict[str, Any]]):
+    """Aggiorna le metriche di token e costo con l'usage della chiamata."""
+    if not usage:
+        return
+    for kind in ("input", "cached_input", "output"):
+        if f"{kind}_tokens" in usage:
+            CLI_TOKENS.inc(usage[f"{kind}_tokens"], cli=cli_type, kind=kind)
+    if "cost_usd" in usage:
+        CLI_COST.inc(usage["cost_usd"], cli=cli_type)
+
+
+async def _run_remote(
+    pool: remote.WorkerPool,
+    model: str,
+    cli_type: str,
+    prompt: str,
+    timeout: float
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Esegue la chiamata su un worker agent, riportando nella chiamata in
+    corso il profilo, le risorse e i metadati misurati dal worker.
+
+    Returns:
+        Tuple (risposta o None, esito: 'success', 'timeout' o 'error')
+    """
+    response, outcome, info = await pool.query(model, cli_type, prompt, timeout)
+    timing = _call_timing.get()
+    if timing is not None:
+        timing["worker"] = info["worker"]
+        timing["queue_seconds"] = info["queue_seconds"]
+    if response is None:
+        return None, outcome
+
+    if timing is not None:
+        remote_timing = response.get("timing") or {}
+        timing.update({key: value for key, value in remote_timing.items()
+                       if key not in ("prompt_bytes", "response_bytes", "total_seconds", "queue_seconds")})
+        timing["worker_queue_seconds"] = remote_timing.get("queue_seconds", 0.0)
+        timing["worker_seconds"] = remote_timing.get("total_seconds")
+    call_usage = _call_usage.get()
+    if call_usage is not None and response.get("resources"):
+        call_usage.update(response["resources"])
+    call_metadata = _call_metadata.get()
+    if call_metadata is not None:
+        call_metadata.update(response.get("cli_metadata") or {})
+        if response.get("reasoning_details"):
+            call_metadata["reasoning"] = response["reasoning_details"]
+    return {"content": response["content"], "reasoning_details": None}, "success"
+
+
+async def _run_and_check(
+    model: str,
+    cli_type: str,
+    prompt: str,
+    timeout: float
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Esegue la CLI con timeout e valida l'output.
+
+    La cancellazione della chiamata (client disconnesso, turno annullato)
+    termina i processi della CLI.
+
+    Returns:
+        Tuple (risposta o None, esito: 'success', 'timeout' o 'error')
+    """
+    processes = {"running": [], "cancelled": False, "lock": threading.Lock()}
+    processes_token = _call_processes.set(processes)
     try:
         result = await asyncio.wait_for(
-            run_cli_with_prompt(cli_type, prompt),
+            run_cli_with_prompt(cli_type, prompt, timeout),
             timeout=timeout
         )
 
         # Verifica errori nel risultato
+        if result.startswith("Error: CLI timeout"):
+            print(f"CLI error for {model}: {result}")
+            return None, "timeout"
         if result.startswith("Error:"):
             print(f"CLI error for {model}: {result}")
-            return None
+            return None, "error"
 
         # Verifica che ci sia contenuto
         if not result.strip():
             print(f"Empty response from {model}")
-            return None
+            return None, "error"
 
-        return {"content": result, "reasoning_details": None}
+        return {"content": result, "reasoning_details": None}, "success"
 
+    except asyncio.CancelledError:
+        _kill_call_processes(processes)
+        raise
     except asyncio.TimeoutError:
-        print(f"Timeout querying {model} after {timeout}s")
-        return None
+        _kill_call_processes(processes)
+        print(f"Timeout querying {model} after {timeout:.1f}s")
+        return None, "timeout"
     except Exception as e:
         print(f"Error querying {model}: {e}")
-        return None
+        return None, "error"
+    finally:
+        _call_processes.reset(processes_token)
+
 
+def _kill_call_processes(processes: Dict[str, Any]):
+    """Termina i processi della chiamata, e quelli che avvierà ancora."""
+    with processes["lock"]:
+        processes["cancelled"] = True
+        running = list(processes["running"])
+    for process in running:
+        _kill_process_tree(process)
 
-async def run_cli_with_prompt(cli_type: str, prompt: str) -> str:
+
+def _track_process(process: subprocess.Popen) -> Optional[Dict[str, Any]]:
+    """Registra il processo nella chiamata in corso (terminandolo se già cancellata)."""
+    processes = _call_processes.get()
+    if processes is None:
+        return None
+    with processes["lock"]:
+        processes["running"].append(process)
+        cancelled = processes["cancelled"]
+    if cancelled:
+        _kill_process_tree(process)
+    return processes
+
+
+async def run_cli_with_prompt(
+    cli_type: str,
+    prompt: str,
+    timeout: float = CLI_TIMEOUT_SECONDS
+) -> str:
     """
     Esegue una CLI con il prompt dato.
     Usa file temporanei per passare prompt lunghi in modo sicuro.
+    Il processo viene terminato allo scadere di `timeout` secondi.
     """
-    return await asyncio.to_thread(_run_cli_sync, cli_type, prompt)
+    return await asyncio.to_thread(_run_cli_sync, cli_type, prompt, timeout)
+
+
+# Percorsi delle CLI già risolti, per valore del PATH
+_cli_paths: Dict[Tuple[str, str], Optional[str]] = {}
 
 
 def _find_cli_path(cli_name: str) -> Optional[str]:
-    """Trova il percorso completo della CLI."""
+    """
+    Trova il percorso completo della CLI.
+
+    Il risultato resta in cache finché il PATH non cambia (vedi
+    preflight.py, che risolve le CLI all'avvio).
+    """
+    key = (cli_name, os.environ.get("PATH", ""))
+    if key in _cli_paths:
+        return _cli_paths[key]
+
     # Prima prova con shutil.which
     path = shutil.which(cli_name)
-    if path:
-        return path
 
     # Su Windows, prova anche con .cmd
-    if os.name == 'nt':
+    if not path and os.name == 'nt':
         path = shutil.which(f"{cli_name}.cmd")
-        if path:
-            return path
 
-    return None
+    _cli_paths[key] = path
+    return path
 
 
-def _run_cli_sync(cli_type: str, prompt: str) -> str:
+def _run_cli_sync(cli_type: str, prompt: str, timeout: float = CLI_TIMEOUT_SECONDS) -> str:
     """
     Esecuzione sincrona della CLI.
 
     Per prompt lunghi, usa file temporanei per evitare problemi con escape
-    di caratteri speciali su Windows.
+    di caratteri speciali su Windows. Con una cassetta attiva (vedi
+    cassette.py) l'interazione viene registrata, oppure servita dalla
+    cassetta senza avviare la CLI.
     """
     try:
-        cwd = os.getcwd()
-
-        if cli_type == "gemini":
-            return _run_gemini(prompt, cwd)
-        elif cli_type == "codex":
-            return _run_codex(prompt, cwd)
-        elif cli_type == "claude":
-            return _run_claude(prompt, cwd)
-        else:
+        runner = _RUNNERS.get(cli_type)
+        if runner is None:
             return f"Error: Unknown CLI type: {cli_type}"
 
+        active = cassette.get_cassette()
+        if active is not None and active.mode == "replay":
+            with tracing.span("cli.replay", cli=cli_type):
+                result = active.replay(cli_type, prompt, timeout)
+        elif active is not None:
+            result = _record(active, runner, cli_type, prompt, timeout)
+        else:
+            result = _run_with_fallback(runner, cli_type, prompt, timeout)
+
+        return _process_result(result, cli_type, prompt)
+
     except subprocess.TimeoutExpired:
-        return "Error: CLI timeout (5 minutes exceeded)"
+        return f"Error: CLI timeout ({timeout:.0f}s exceeded)"
     except FileNotFoundError as e:
         return f"Error: CLI not found - {e}"
     except Exception as e:
         return f"Error: {str(e)}"
 
 
-def _run_gemini(prompt: str, cwd: str) -> str:
-    """Esegue Gemini CLI."""
+def _record(active, runner, cli_type: str, prompt: str, timeout: float) -> subprocess.CompletedProcess:
+    """Esegue la CLI e salva l'interazione nella cassetta (anche i timeout)."""
+    started = time.perf_counter()
+    try:
+        result = _run_with_fallback(runner, cli_type, prompt, timeout)
+    except subprocess.TimeoutExpired:
+        active.record(cli_type, prompt, None, time.perf_counter() - started)
+        raise
+    timing = _call_timing.get() or {}
+    active.record(cli_type, prompt, result, time.perf_counter() - started, timing.get("ttfb_seconds"))
+    return result
+
+
+def output_flags(cli_type: str) -> str:
+    """
+    Flag da aggiungere al comando per l'output strutturato della CLI.
+
+    Stringa vuota se la CLI è configurata in "text", non ha un formato
+    JSON o lo ha già rifiutato.
+    """
+    if cli_type in _text_only_clis:
+        return ""
+    flags = _OUTPUT_FLAGS.get(cli_type, {}).get(CLI_OUTPUT_FORMAT.get(cli_type, "text"), "")
+    return f" {flags}" if flags else ""
+
+
+def _rejected_output_flags(result: subprocess.CompletedProcess) -> bool:
+    """La CLI è fallita subito perché non conosce i flag JSON (versione vecchia)."""
+    if result.returncode == 0 or (result.stdout or "").strip():
+        return False
+    stderr = (result.stderr or "").lower()
+    return ("json" in stderr or "output-format" in stderr) and any(
+        hint in stderr for hint in ("unknown", "unexpected", "unrecognized", "invalid")
+    )
+
+
+def _run_with_fallback(runner, cli_type: str, prompt: str, timeout: float) -> subprocess.CompletedProcess:
+    """
+    Esegue la CLI in una directory di lavoro del pool (vedi workdirs.py);
+    se rifiuta i flag JSON la riesegue in modalità testo (e ci resta).
+    """
+    with workdirs.lease(cli_type) as cwd:
+        result = runner(prompt, cwd, timeout)
+        if output_flags(cli_type) and _rejected_output_flags(result):
+            print(f"{cli_type} CLI does not support JSON output, falling back to text: "
+                  f"{(result.stderr or '').strip()[:200]}")
+            _text_only_clis.add(cli_type)
+            result = runner(prompt, cwd, timeout)
+    return result
+
+
+def _process_result(result: subprocess.CompletedProcess, cli_type: str, prompt: str) -> str:
+    """Converte il risultato grezzo della CLI in risposta pulita o 'Error: ...'."""
+    output = result.stdout or ""
+
+    if result.returncode != 0 and not output.strip():
+        stderr = result.stderr or ""
+        if stderr.strip():
+            return f"Error: {stderr.strip()}"
+        return f"Error: {cli_type.capitalize()} returned code {result.returncode}"
+
+    return _clean_output(output, cli_type, prompt)
+
+
+def _read_pipe(pipe, chunks: List[bytes], first_chunk_at: List[float]):
+    """Legge una pipe fino a EOF, annotando l'istante del primo chunk."""
+    while True:
+        chunk = pipe.read1(65536)
+        if not chunk:
+            break
+        if not first_chunk_at:
+            first_chunk_at.append(time.perf_counter())
+        chunks.append(chunk)
+    pipe.close()
+
+
+def _decode_output(chunks: List[bytes]) -> str:
+    """Decodifica l'output come text=True (utf-8, newline universali)."""
+    text = b"".join(chunks).decode('utf-8', errors='replace')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _kill_process_tree(process: subprocess.Popen):
+    """Termina la shell e i processi della pipeline (cat | cli), senza attenderli."""
+    if os.name != 'nt':
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        process.kill()
+
+
+def _run_shell(cmd: str, cwd: str, timeout: float, cli_type: str) -> subprocess.CompletedProcess:
+    """
+    Esegue un comando shell catturando l'output (come subprocess.run).
+
+    stdout e stderr sono letti da due thread, così si misura il
+    time-to-first-byte della CLI. Applica i limiti di CLI_RESOURCE_LIMITS e
+    raccoglie le risorse usate dalla pipeline. Registra uno span
+    'cli.process' con tempo di spawn, TTFB, exit code, dimensione di
+    stdout/stderr e risorse, e aggiorna profilo e risorse della chiamata
+    in corso.
+    """
+    with tracing.span("cli.process") as span:
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            resources.limit_command(cli_type, cmd),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            shell=True,
+            # Gruppo di processi proprio, per terminare tutta la pipeline
+            start_new_session=os.name != 'nt'
+        )
+        spawned = time.perf_counter()
+        span.set("spawn_ms", round((spawned - started) * 1000, 3))
+        processes = _track_process(process)
+
+        stdout_chunks, stderr_chunks, first_byte_at = [], [], []
+        readers = [
+            threading.Thread(target=_read_pipe, args=(process.stdout, stdout_chunks, first_byte_at), daemon=True),
+            threading.Thread(target=_read_pipe, args=(process.stderr, stderr_chunks, []), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        returncode, usage, timed_out = resources.wait_with_usage(process, timeout, _kill_process_tree)
+        if processes is not None:
+            with processes["lock"]:
+                processes["running"].remove(process)
+        if usage is not None:
+            for key, value in usage.items():
+                span.set(key, value)
+            call_usage = _call_usage.get()
+            if call_usage is not None:
+                resources.merge_usage(call_usage, usage)
+
+        if timed_out:
+            span.set("timed_out", True)
+            # Dopo il kill la pipe può restare aperta da un processo sfuggito
+            for reader in readers:
+                reader.join(timeout=5)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        for reader in readers:
+            reader.join()
+        finished = time.perf_counter()
+
+        stdout = _decode_output(stdout_chunks)
+        stderr = _decode_output(stderr_chunks)
+        ttfb = first_byte_at[0] - started if first_byte_at else None
+
+        span.set("exit_code", returncode)
+        span.set("stdout_bytes", sum(len(c) for c in stdout_chunks))
+        span.set("stderr_bytes", sum(len(c) for c in stderr_chunks))
+        if ttfb is not None:
+            span.set("ttfb_ms", round(ttfb * 1000, 3))
+
+        timing = _call_timing.get()
+        if timing is not None:
+            timing["spawn_seconds"] = round(spawned - started, 4)
+            timing["ttfb_seconds"] = round(ttfb, 4) if ttfb is not None else None
+            timing["process_seconds"] = round(finished - started, 4)
+            timing["raw_output_bytes"] = sum(len(c) for c in stdout_chunks)
+
+        return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+
+
+def _clean_output(output: str, cli_type: str, prompt: str) -> str:
+    """
+    clean_cli_output con span 'cli.clean', tempo di pulizia nel profilo e
+    metadati estratti (modello, usage) nella chiamata in corso. L'output
+    JSON è riconosciuto da solo, così anche le cassette registrate in una
+    modalità qualsiasi vengono interpretate correttamente.
+    """
+    started = time.perf_counter()
+    with tracing.span("cli.clean", cli=cli_type, raw_chars=len(output)) as span:
+        cleaned, metadata = cli_output.parse_output(output, cli_type, prompt)
+        span.set("output_format", metadata.get("output_format", "text"))
+        for key in ("model", "tokens_used"):
+            if key in metadata:
+                span.set(key, metadata[key])
+    timing = _call_timing.get()
+    if timing is not None:
+        timing["clean_seconds"] = round(time.perf_counter() - started, 4)
+    call_metadata = _call_metadata.get()
+    if call_metadata is not None:
+        call_metadata.update(metadata)
+    if metadata.get("error"):
+        # La CLI ha riportato l'errore nell'output JSON
+        return f"Error: {metadata['error']}"
+    return cleaned
+
+
+def _run_gemini(prompt: str, cwd: str, timeout: float = CLI_TIMEOUT_SECONDS) -> subprocess.CompletedProcess:
+    """Esegue Gemini CLI, ritornando il processo con l'output grezzo."""
     # Salva il prompt in un file temporaneo per evitare problemi di escape
     with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
         f.write(prompt)
@@ -130,48 +660,22 @@ def _run_gemini(prompt: str, cwd: str) -> str:
         # Usa shell=True su Windows per trovare il comando
         if os.name == 'nt':
             # Legge dal file e passa a gemini via pipe
-            cmd = f'type "{prompt_file}" | gemini'
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,
-                cwd=cwd,
-                shell=True,
-                encoding='utf-8',
-                errors='replace'
-            )
+            cmd = f'type "{prompt_file}" | gemini{output_flags("gemini")}'
+            result = _run_shell(cmd, cwd, timeout, "gemini")
         else:
             # Su Unix, usa cat | gemini
-            cmd = f'cat "{prompt_file}" | gemini'
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,
-                cwd=cwd,
-                shell=True,
-                encoding='utf-8',
-                errors='replace'
-            )
+            cmd = f'cat "{prompt_file}" | gemini{output_flags("gemini")}'
+            result = _run_shell(cmd, cwd, timeout, "gemini")
 
-        output = result.stdout or ""
-
-        if result.returncode != 0 and not output.strip():
-            stderr = result.stderr or ""
-            if stderr.strip():
-                return f"Error: {stderr.strip()}"
-            return f"Error: Gemini returned code {result.returncode}"
-
-        return clean_cli_output(output, "gemini")
+        return result
 
     finally:
         if os.path.exists(prompt_file):
             os.unlink(prompt_file)
 
 
-def _run_codex(prompt: str, cwd: str) -> str:
-    """Esegue Codex CLI."""
+def _run_codex(prompt: str, cwd: str, timeout: float = CLI_TIMEOUT_SECONDS) -> subprocess.CompletedProcess:
+    """Esegue Codex CLI, ritornando il processo con l'output grezzo."""
     # Salva il prompt in un file temporaneo
     with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
         f.write(prompt)
@@ -184,65 +688,28 @@ def _run_codex(prompt: str, cwd: str) -> str:
 
         if os.name == 'nt':
             # Su Windows, usa type per passare il contenuto
-            cmd = f'type "{prompt_file}" | codex exec -'
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,
-                cwd=cwd,
-                shell=True,
-                encoding='utf-8',
-                errors='replace'
-            )
+            cmd = f'type "{prompt_file}" | codex exec{output_flags("codex")} -'
+            result = _run_shell(cmd, cwd, timeout, "codex")
 
             # Se fallisce, prova direttamente con il prompt (troncato se necessario)
             if result.returncode != 0 or not result.stdout.strip():
                 # Tronca il prompt se troppo lungo per la command line
                 short_prompt = prompt[:2000] if len(prompt) > 2000 else prompt
-                # Escape virgolette
-                short_prompt = short_prompt.replace('"', '\\"')
-                cmd = f'codex exec "{short_prompt}"'
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=300,
-                    cwd=cwd,
-                    shell=True,
-                    encoding='utf-8',
-                    errors='replace'
-                )
+                cmd = subprocess.list2cmdline(build_codex_command(short_prompt)) + output_flags("codex")
+                result = _run_shell(cmd, cwd, timeout, "codex")
         else:
-            cmd = f'cat "{prompt_file}" | codex exec -'
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,
-                cwd=cwd,
-                shell=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-
-        output = result.stdout or ""
-
-        if result.returncode != 0 and not output.strip():
-            stderr = result.stderr or ""
-            if stderr.strip():
-                return f"Error: {stderr.strip()}"
-            return f"Error: Codex returned code {result.returncode}"
+            cmd = f'cat "{prompt_file}" | codex exec{output_flags("codex")} -'
+            result = _run_shell(cmd, cwd, timeout, "codex")
 
-        return clean_cli_output(output, "codex")
+        return result
 
     finally:
         if os.path.exists(prompt_file):
             os.unlink(prompt_file)
 
 
-def _run_claude(prompt: str, cwd: str) -> str:
-    """Esegue Claude CLI."""
+def _run_claude(prompt: str, cwd: str, timeout: float = CLI_TIMEOUT_SECONDS) -> subprocess.CompletedProcess:
+    """Esegue Claude CLI, ritornando il processo con l'output grezzo."""
     # Salva il prompt in un file temporaneo
     with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
         f.write(prompt)
@@ -251,45 +718,42 @@ def _run_claude(prompt: str, cwd: str) -> str:
     try:
         if os.name == 'nt':
             # Su Windows, usa type per passare il contenuto via pipe
-            cmd = f'type "{prompt_file}" | claude -p --dangerously-skip-permissions'
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,
-                cwd=cwd,
-                shell=True,
-                encoding='utf-8',
-                errors='replace'
-            )
+            cmd = f'type "{prompt_file}" | claude -p --dangerously-skip-permissions{output_flags("claude")}'
+            result = _run_shell(cmd, cwd, timeout, "claude")
         else:
-            cmd = f'cat "{prompt_file}" | claude -p --dangerously-skip-permissions'
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300,
-                cwd=cwd,
-                shell=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-
-        output = result.stdout or ""
+            cmd = f'cat "{prompt_file}" | claude -p --dangerously-skip-permissions{output_flags("claude")}'
+            result = _run_shell(cmd, cwd, timeout, "claude")
 
-        if result.returncode != 0 and not output.strip():
-            stderr = result.stderr or ""
-            if stderr.strip():
-                return f"Error: {stderr.strip()}"
-            return f"Error: Claude returned code {result.returncode}"
-
-        return clean_cli_output(output, "claude")
+        return result
 
     finally:
         if os.path.exists(prompt_file):
             os.unlink(prompt_file)
 
 
+def build_gemini_command(prompt: str) -> List[str]:
+    """Comando Gemini CLI con il prompt come argomento (prompt brevi)."""
+    return ["gemini", prompt]
+
+
+def build_codex_command(prompt: str) -> List[str]:
+    """Comando Codex CLI con il prompt come argomento (prompt brevi)."""
+    return ["codex", "exec", prompt]
+
+
+def build_claude_command(prompt: str) -> List[str]:
+    """Comando Claude CLI con il prompt come argomento (prompt brevi)."""
+    return ["claude", "-p", "--dangerously-skip-permissions", prompt]
+
+
+# Esecutori per tipo di CLI
+_RUNNERS = {
+    "gemini": _run_gemini,
+    "codex": _run_codex,
+    "claude": _run_claude,
+}
+
+
 def build_prompt_from_messages(messages: List[Dict[str, str]]) -> str:
     """
     Converte lista messaggi in prompt singolo per le CLI.
@@ -335,109 +799,79 @@ def determine_cli(model: str) -> str:
     return model_lower
 
 
-def clean_cli_output(output: str, cli_type: str) -> str:
+def clean_cli_output(output: str, cli_type: str, prompt: Optional[str] = None) -> str:
     """
     Pulisce l'output CLI rimuovendo metadata non necessari.
 
-    Ogni CLI ha un formato di output diverso che va normalizzato.
+    Ogni CLI ha un formato di output diverso che va normalizzato: il
+    parsing (incrementale, in una sola passata) è in cli_output.py. Con il
+    prompt, l'eco del prompt nell'output di Codex viene saltata riga per riga.
     """
     if not output:
         return ""
+    return cli_output.parse_output(output, cli_type, prompt)[0]
+
+
+async def iter_models_as_completed(
+    models: List[str],
+    messages: List[Dict[str, str]],
+    deadline: Optional[Deadline] = None
+) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]], float]]:
+    """
+    Query multipli modelli in parallelo, restituendo i risultati in ordine
+    di completamento.
+
+    Le risposte veloci non aspettano il modello più lento: ogni risultato
+    viene prodotto appena la sua CLI termina. Se il consumatore smette di
+    iterare, le query ancora in corso vengono cancellate.
 
-    if cli_type == "gemini":
-        # Gemini CLI aggiunge "Loaded cached credentials." all'inizio
-        lines = output.split('\n')
-        cleaned = []
-        for line in lines:
-            # Salta linee di sistema di Gemini
-            if line.startswith('Loaded cached'):
-                continue
-            if line.startswith('Using model:'):
-                continue
-            cleaned.append(line)
-        return '\n'.join(cleaned).strip()
-
-    elif cli_type == "codex":
-        # Codex CLI ha un header verbose:
-        # OpenAI Codex v0.65.0 (research preview)
-        # --------
-        # workdir: ...
-        # model: ...
-        # ...
-        # codex
-        # <actual response>
-        # tokens used
-        # <number>
-
-        if "codex\n" in output:
-            parts = output.split("codex\n")
-            if len(parts) > 1:
-                # Prendi l'ultima parte dopo l'ultimo "codex\n"
-                response = parts[-1]
-                # Rimuovi "tokens used\n<number>" alla fine
-                if "tokens used" in response:
-                    response = response.split("tokens used")[0]
-                return response.strip()
-
-        # Fallback: cerca di rimuovere l'header
-        lines = output.split('\n')
-        # Trova la linea "codex" e prendi tutto dopo
-        for i, line in enumerate(lines):
-            if line.strip() == "codex":
-                remaining = '\n'.join(lines[i+1:])
-                if "tokens used" in remaining:
-                    remaining = remaining.split("tokens used")[0]
-                return remaining.strip()
-
-        return output.strip()
-
-    elif cli_type == "claude":
-        # Claude CLI con -p dovrebbe dare output relativamente pulito
-        # Ma potrebbe avere warning o linee vuote iniziali
-        lines = output.split('\n')
-        cleaned = []
-        started = False
-
-        for line in lines:
-            # Salta linee vuote e warning prima del contenuto
-            if not started:
-                if not line.strip():
-                    continue
-                if line.startswith('Warning'):
-                    continue
-                if line.startswith('Note:'):
-                    continue
-
-            started = True
-            cleaned.append(line)
-
-        return '\n'.join(cleaned).strip()
-
-    return output.strip()
+    Args:
+        models: Lista di identificatori modello/CLI
+        messages: Lista di messaggi da inviare
+        deadline: Deadline condivisa da tutte le query
+
+    Yields:
+        Tuple (modello, risposta o None, durata in secondi)
+    """
+    started = time.monotonic()
+
+    async def timed_query(model: str):
+        response = await query_model(model, messages, deadline=deadline)
+        return model, response, time.monotonic() - started
+
+    tasks = [asyncio.create_task(timed_query(model)) for model in models]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
 
 
 async def query_models_parallel(
     models: List[str],
-    messages: List[Dict[str, str]]
+    messages: List[Dict[str, str]],
+    deadline: Optional[Deadline] = None
 ) -> Dict[str, Optional[Dict[str, Any]]]:
     """
     Query multipli modelli in parallelo.
 
-    Usa asyncio.gather per eseguire tutte le query contemporaneamente,
-    riducendo il tempo totale al tempo della query più lenta.
+    Esegue tutte le query contemporaneamente, riducendo il tempo totale al
+    tempo della query più lenta.
 
     Args:
         models: Lista di identificatori modello/CLI
         messages: Lista di messaggi da inviare
+        deadline: Deadline condivisa da tutte le query
 
     Returns:
-        Dict che mappa ogni modello alla sua risposta (o None se fallito)
+        Dict che mappa ogni modello alla sua risposta (o None se fallito),
+        nell'ordine di `models`
     """
-    # Crea task per tutti i modelli
-    tasks = [query_model(model, messages) for model in models]
-
-    # Esegui tutti in parallelo
-    responses = await asyncio.gather(*tasks)
+    responses = {}
+    async for model, response, _ in iter_models_as_completed(models, messages, deadline):
+        responses[model] = response
 
-    # Mappa modelli alle risposte
-    return {model: response for model, response in zip(models, responses)}
+    # Mappa modelli alle risposte, nell'ordine richiesto
+    return {model: responses.get(model) for model in models}
@@ -0,0 +1,581 @@
+"""Incremental parsers for the text output of the CLIs.
+
+Each CLI wraps its answer differently: Gemini prints credential/model lines,
+Codex a header, the echoed prompt, reasoning and command blocks and a
+"tokens used" footer, Claude occasional warnings. A parser is a small state
+machine fed with chunks of output as they arrive: it classifies complete
+lines, returns the answer text that became available, extracts structured
+metadata (model, CLI version, token count) and makes one pass over the data.
+
+When a CLI runs in its machine-readable mode (claude --output-format
+json/stream-json, codex exec --json, gemini --output-format json) the JSON
+is read instead, for the exact model id and token usage; parse_output
+recognises it, and falls back to the text parsers for anything else.
+
+Answer lines are not visited one by one: the parser searches each chunk for
+the next line that could change its state (a Codex block marker, a Gemini
+status line) and slices everything before it out in a single run, so
+cleaning a multi-MB answer costs about one scan and one copy of it. Leading and trailing whitespace of the answer is
+dropped as it streams, exactly like str.strip() on the whole answer.
+"""
+
+import json
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+# Codex block markers, optionally prefixed by a timestamp ("[2025-...] codex")
+_CODEX_MARKER = re.compile(
+    r"(?:\[[^\]\n]*\]\s*)?(user|User instructions:|thinking|codex|exec|tokens used)"
+    r"(?::?\s*([\d,]+))?[ \t]*$"
+)
+_CODEX_VERSION = re.compile(r"OpenAI Codex v(\S+)")
+_CODEX_HEADER_FIELDS = {
+    "model": "model",
+    "provider": "provider",
+    "reasoning effort": "reasoning_effort",
+}
+_TOKEN_COUNT = re.compile(r"\s*([\d,]+)\s*$")
+
+# Lines that may end a block (candidates, confirmed by _CODEX_MARKER)
+_CODEX_ANSWER_BREAK = re.compile(r"\n(?:\[[^\]\n]*\]\s*)?(?:thinking|exec|tokens used)")
+_CODEX_SKIP_BREAK = re.compile(r"\n(?:\[[^\]\n]*\]\s*)?(?:codex|thinking|exec|tokens used)")
+_GEMINI_STATUS = re.compile(r"\n(?:Loaded cached|Using model:)")
+
+
+class OutputParser:
+    """
+    Base parser: every line is part of the answer.
+
+    Subclasses override _scan() to consume data from a line start, either
+    one line at a time through _line() or in bulk up to the next line of
+    interest, and call _body() / _body_range() for the answer.
+    """
+
+    def __init__(self):
+        self.metadata: Dict[str, Any] = {}
+        # Times the answer restarted (a later block replaced it)
+        self.resets = 0
+        self._parts: List[str] = []
+        self._pending = ""
+        self._held = ""
+        self._started = False
+        self._run: Optional[Tuple[int, int]] = None
+        self._delta: List[str] = []
+        self._data = ""
+
+    @property
+    def text(self) -> str:
+        """The answer parsed so far (final once close() was called)."""
+        return "".join(self._parts)
+
+    def feed(self, chunk: str) -> str:
+        """
+        Parse the next chunk of output.
+
+        Args:
+            chunk: Decoded output, with "\\n" line endings
+
+        Returns:
+            Answer text that became available with this chunk (possibly
+            empty; after a reset it starts a new answer)
+        """
+        data = self._pending + chunk if self._pending else chunk
+        self._data = data
+        limit = data.rfind("\n") + 1
+        pos = 0
+        while pos < limit:
+            pos = self._scan(data, pos, limit)
+        self._pending = data[limit:]
+        return self._flush()
+
+    def close(self) -> str:
+        """Parse the last, unterminated line and finish; returns the final delta."""
+        data, self._pending = self._pending, ""
+        self._data = data
+        pos = 0
+        while pos < len(data):
+            pos = self._scan(data, pos, len(data))
+        self._finish()
+        return self._flush()
+
+    def _scan(self, data: str, pos: int, limit: int) -> int:
+        """Consume data[pos:limit] from a line start; returns where to continue."""
+        self._body_range(pos, limit)
+        return limit
+
+    def _next_line(self, data: str, pos: int, limit: int) -> int:
+        """Hand the line at pos to _line(); returns the start of the next one."""
+        end = data.find("\n", pos, limit)
+        if end < 0:
+            end = limit
+        self._line(data, pos, end)
+        return end + 1
+
+    def _line(self, data: str, start: int, end: int):
+        self._body(data, start, end)
+
+    def _finish(self):
+        """Hook for end of output."""
+
+    def _body(self, data: str, start: int, end: int):
+        """Add the line data[start:end] and its newline to the answer."""
+        self._body_range(start, min(end + 1, len(data)))
+
+    def _body_range(self, start: int, stop: int):
+        """Add data[start:stop] to the answer, extending the current run."""
+        if self._run is not None and self._run[1] == start:
+            self._run = (self._run[0], stop)
+            return
+        self._close_run()
+        self._run = (start, stop)
+
+    def _body_until(self, data: str, pos: int, limit: int, breaks: re.Pattern, keep: bool = True) -> int:
+        """
+        Consume whole lines up to the next one `breaks` may match.
+
+        Args:
+            breaks: Pattern starting with "\\n" that finds candidate lines
+            keep: Add the consumed lines to the answer (else drop them)
+
+        Returns:
+            Start of the candidate line (pos itself if it is one), or limit
+        """
+        if pos == 0:
+            return pos
+        match = breaks.search(data, pos - 1, limit)
+        stop = match.start() + 1 if match else limit
+        if keep and stop > pos:
+            self._body_range(pos, stop)
+        return stop
+
+    def _body_text(self, text: str):
+        """Add literal text (not a slice of the current chunk) to the answer."""
+        self._close_run()
+        self._delta.append(text)
+
+    def _close_run(self):
+        if self._run is not None:
+            self._delta.append(self._data[self._run[0]:self._run[1]])
+            self._run = None
+
+    def _reset(self):
+        """Discard the answer so far: a later block replaces it."""
+        self._run = None
+        self._delta = []
+        self._parts = []
+        self._held = ""
+        self._started = False
+        self.resets += 1
+
+    def _flush(self) -> str:
+        self._close_run()
+        if not self._delta:
+            return ""
+        text = self._held + "".join(self._delta)
+        self._delta = []
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                self._held = ""
+                return ""
+            self._started = True
+        stripped = text.rstrip()
+        self._held = text[len(stripped):]
+        if stripped:
+            self._parts.append(stripped)
+        return stripped
+
+
+class GeminiOutputParser(OutputParser):
+    """Gemini: drops "Loaded cached credentials." and "Using model: ..." lines."""
+
+    def _scan(self, data: str, pos: int, limit: int) -> int:
+        stop = self._body_until(data, pos, limit, _GEMINI_STATUS)
+        return stop if stop > pos else self._next_line(data, pos, limit)
+
+    def _line(self, data: str, start: int, end: int):
+        if data.startswith("Loaded cached", start, end):
+            return
+        if data.startswith("Using model:", start, end):
+            self.metadata["model"] = data[start + len("Using model:"):end].strip()
+            return
+        self._body(data, start, end)
+
+
+class ClaudeOutputParser(OutputParser):
+    """Claude: drops blank, "Warning..." and "Note:" lines before the answer."""
+
+    def __init__(self):
+        super().__init__()
+        self._in_answer = False
+
+    def _scan(self, data: str, pos: int, limit: int) -> int:
+        if self._in_answer:
+            self._body_range(pos, limit)
+            return limit
+        return self._next_line(data, pos, limit)
+
+    def _line(self, data: str, start: int, end: int):
+        if not self._in_answer:
+            if data.startswith(("Warning", "Note:"), start, end):
+                self.metadata.setdefault("warnings", []).append(data[start:end].strip())
+                return
+            if not data[start:end].strip():
+                return
+            self._in_answer = True
+        self._body(data, start, end)
+
+
+class CodexOutputParser(OutputParser):
+    """
+    Codex: header, echoed prompt, reasoning/command blocks, answer, footer.
+
+    The answer is the last "codex" block. Inside it a "codex" or "user"
+    line is plain text (only a "thinking"/"exec" block can precede a new
+    answer), and "tokens used" ends it only when followed by the count and
+    nothing else. With the prompt, its echo is skipped line by line, so
+    marker words in the prompt are not mistaken for blocks. Output with no
+    Codex framing at all is returned whole.
+    """
+
+    HEADER, USER, SKIP, ANSWER, FOOTER = range(5)
+
+    def __init__(self, prompt: Optional[str] = None):
+        super().__init__()
+        self._state = self.HEADER
+        self._unframed: List[str] = []
+        self._echo: List[str] = []
+        if prompt is not None:
+            self._echo = prompt.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        self._echo_pos = 0
+        self._footer: List[str] = []
+        self._footer_tokens: Optional[int] = None
+        self._footer_from = self.ANSWER
+        self._answer_seen = False
+
+    def _scan(self, data: str, pos: int, limit: int) -> int:
+        if self._state in (self.ANSWER, self.SKIP):
+            answer = self._state == self.ANSWER
+            stop = self._body_until(data, pos, limit, _CODEX_ANSWER_BREAK if answer else _CODEX_SKIP_BREAK,
+                                    keep=answer)
+            if stop > pos:
+                return stop
+        return self._next_line(data, pos, limit)
+
+    def _marker(self, data: str, start: int, end: int) -> Optional[re.Match]:
+        return _CODEX_MARKER.match(data, start, end)
+
+    def _line(self, data: str, start: int, end: int):
+        state = self._state
+
+        if state == self.ANSWER:
+            marker = self._marker(data, start, end)
+            kind = marker.group(1) if marker else None
+            if kind in ("thinking", "exec"):
+                self._state = self.SKIP
+            elif kind == "tokens used":
+                self._start_footer(data[start:end], marker)
+            else:
+                self._body(data, start, end)
+            return
+
+        if state == self.FOOTER:
+            line = data[start:end]
+            count = _TOKEN_COUNT.match(line)
+            if not line.strip() or (count and self._footer_tokens is None and len(self._footer) == 1):
+                if count:
+                    self._footer_tokens = int(count.group(1).replace(",", ""))
+                self._footer.append(line)
+                return
+            # Not the footer after all: back to the block it interrupted
+            if self._footer_from == self.ANSWER:
+                self._body_text("\n".join(self._footer) + "\n")
+            self._footer, self._footer_tokens = [], None
+            self._state = self._footer_from
+            self._line(data, start, end)
+            return
+
+        if state == self.USER and self._echo_pos < len(self._echo):
+            expected = self._echo[self._echo_pos]
+            if end - start == len(expected) and data.startswith(expected, start, end):
+                self._echo_pos += 1
+                return
+            # The echo differs from the prompt: fall back to markers
+            self._echo_pos = len(self._echo)
+
+        marker = self._marker(data, start, end)
+        kind = marker.group(1) if marker else None
+        if kind == "codex":
+            if self._answer_seen:
+                self._reset()
+            self._answer_seen = True
+            self._state = self.ANSWER
+        elif kind in ("thinking", "exec"):
+            self._state = self.SKIP
+        elif kind in ("user", "User instructions:") and state == self.HEADER:
+            self._state = self.USER
+        elif kind == "tokens used" and state == self.SKIP and self._answer_seen:
+            self._start_footer(data[start:end], marker)
+        elif state == self.HEADER:
+            self._header_line(data[start:end])
+
+    def _header_line(self, line: str):
+        self._unframed.append(line)
+        version = _CODEX_VERSION.search(line)
+        if version:
+            self.metadata["cli_version"] = version.group(1)
+            return
+        key, sep, value = line.partition(":")
+        field = _CODEX_HEADER_FIELDS.get(key.strip().lower())
+        if sep and field:
+            self.metadata[field] = value.strip()
+
+    def _start_footer(self, line: str, marker: re.Match):
+        self._footer_from = self._state
+        self._state = self.FOOTER
+        self._footer = [line]
+        self._footer_tokens = int(marker.group(2).replace(",", "")) if marker.group(2) else None
+
+    def _finish(self):
+        if self._state == self.FOOTER:
+            if self._footer_tokens is not None:
+                self.metadata["tokens_used"] = self._footer_tokens
+                self.metadata["usage"] = {"total_tokens": self._footer_tokens}
+        elif self._state == self.HEADER and self._unframed:
+            # No Codex framing at all: the whole output is the answer
+            self._body_text("\n".join(self._unframed))
+
+
+_PARSERS = {
+    "gemini": GeminiOutputParser,
+    "claude": ClaudeOutputParser,
+}
+
+
+def create_parser(cli_type: str, prompt: Optional[str] = None) -> OutputParser:
+    """
+    Parser for a CLI's output.
+
+    Args:
+        cli_type: CLI type (gemini, codex, claude; others keep every line)
+        prompt: The prompt sent to the CLI, to skip its echo (Codex)
+
+    Returns:
+        A fresh parser
+    """
+    if cli_type == "codex":
+        return CodexOutputParser(prompt)
+    return _PARSERS.get(cli_type, OutputParser)()
+
+
+# =============================================================================
+# Machine-readable output
+# =============================================================================
+
+def make_usage(
+    input_tokens: Optional[int] = None,
+    output_tokens: Optional[int] = None,
+    cached_input_tokens: Optional[int] = None,
+    total_tokens: Optional[int] = None,
+    cost_usd: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Normalized token usage of one call (only the known fields).
+
+    Args:
+        input_tokens: Prompt tokens, cached ones included
+        output_tokens: Generated tokens (reasoning included where reported)
+        cached_input_tokens: Prompt tokens served from the provider's cache
+        total_tokens: Input + output (computed when both are known)
+        cost_usd: Cost reported by the CLI
+    """
+    if total_tokens is None and input_tokens is not None and output_tokens is not None:
+        total_tokens = input_tokens + output_tokens
+    usage = {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cached_input_tokens": cached_input_tokens,
+        "total_tokens": total_tokens,
+        "cost_usd": cost_usd,
+    }
+    return {key: value for key, value in usage.items() if value is not None}
+
+
+def _json_events(output: str) -> List[Dict[str, Any]]:
+    """The output as one JSON object or as JSON lines (other lines ignored)."""
+    try:
+        event = json.loads(output)
+        return [event] if isinstance(event, dict) else []
+    except ValueError:
+        pass
+    events = []
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith("{"):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict):
+                events.append(event)
+    return events
+
+
+def _parse_claude_json(events: List[Dict[str, Any]]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """claude -p --output-format json (one result) or stream-json (events ending with it)."""
+    result = next((e for e in reversed(events) if e.get("type") == "result"), None)
+    if result is None:
+        return None
+
+    metadata: Dict[str, Any] = {"output_format": "json"}
+    reasoning = []
+    for event in events:
+        if event.get("type") == "system" and event.get("model"):
+            metadata["model"] = event["model"]
+        message = event.get("message") if event.get("type") == "assistant" else None
+        if isinstance(message, dict):
+            metadata.setdefault("model", message.get("model"))
+            reasoning += [{"type": "thinking", "text": block.get("thinking", "")}
+                          for block in message.get("content") or [] if block.get("type") == "thinking"]
+    model_usage = result.get("modelUsage") or {}
+    if not metadata.get("model") and model_usage:
+        # Several models may run (e.g. a small one for tools): the main one writes most
+        metadata["model"] = max(model_usage, key=lambda m: model_usage[m].get("outputTokens", 0))
+
+    usage = result.get("usage") or {}
+    cached = usage.get("cache_read_input_tokens")
+    prompt_tokens = [usage.get(key) for key in
+                     ("input_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")]
+    metadata["usage"] = make_usage(
+        input_tokens=sum(t or 0 for t in prompt_tokens) if any(t is not None for t in prompt_tokens) else None,
+        output_tokens=usage.get("output_tokens"),
+        cached_input_tokens=cached,
+        cost_usd=result.get("total_cost_usd"),
+    )
+    if result.get("duration_ms") is not None:
+        metadata["cli_seconds"] = round(result["duration_ms"] / 1000, 4)
+    if result.get("duration_api_ms") is not None:
+        metadata["api_seconds"] = round(result["duration_api_ms"] / 1000, 4)
+    if reasoning:
+        metadata["reasoning"] = reasoning
+
+    text = result.get("result") or ""
+    if result.get("is_error"):
+        metadata["error"] = text or result.get("subtype", "error")
+    return text.strip(), metadata
+
+
+def _parse_codex_json(events: List[Dict[str, Any]]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """codex exec --json: thread/turn/item events (or the legacy {"msg": ...} events)."""
+    metadata: Dict[str, Any] = {"output_format": "json"}
+    text, usage, reasoning, recognized = None, None, [], False
+    for event in events:
+        kind = event.get("type")
+        item = event.get("item") or {}
+        msg = event.get("msg") or {}
+        if event.get("model"):
+            metadata["model"] = event["model"]
+        if kind == "item.completed" and item.get("type") == "agent_message":
+            text = item.get("text", "")
+        elif kind == "item.completed" and item.get("type") == "reasoning":
+            reasoning.append({"type": "reasoning", "text": item.get("text", "")})
+        elif kind == "turn.completed":
+            usage = event.get("usage") or {}
+        elif kind in ("error", "turn.failed"):
+            error = event.get("error") or {}
+            metadata["error"] = event.get("message") or error.get("message") or kind
+        elif msg.get("type") == "agent_message":
+            text = msg.get("message", "")
+        elif msg.get("type") == "agent_reasoning":
+            reasoning.append({"type": "reasoning", "text": msg.get("text", "")})
+        elif msg.get("type") == "token_count":
+            usage = msg
+        elif msg.get("type") == "error":
+            metadata["error"] = msg.get("message", "error")
+        else:
+            recognized = recognized or kind in ("thread.started", "turn.started", "item.started")
+            continue
+        recognized = True
+    if not recognized:
+        return None
+
+    if usage is not None:
+        metadata["usage"] = make_usage(
+            input_tokens=usage.get("input_tokens"),
+            output_tokens=usage.get("output_tokens"),
+            cached_input_tokens=usage.get("cached_input_tokens"),
+            total_tokens=usage.get("total_tokens"),
+        )
+        if "total_tokens" in metadata["usage"]:
+            metadata["tokens_used"] = metadata["usage"]["total_tokens"]
+    if reasoning:
+        metadata["reasoning"] = reasoning
+    return (text or "").strip(), metadata
+
+
+def _parse_gemini_json(events: List[Dict[str, Any]]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """gemini --output-format json: {"response", "stats": {"models": {...}}, "error"}."""
+    if len(events) != 1 or not ("stats" in events[0] or "error" in events[0]):
+        return None
+    result = events[0]
+
+    metadata: Dict[str, Any] = {"output_format": "json"}
+    models = (result.get("stats") or {}).get("models") or {}
+    if models:
+        tokens = {name: stats.get("tokens") or {} for name, stats in models.items()}
+        metadata["model"] = max(tokens, key=lambda m: tokens[m].get("candidates", 0))
+
+        def total(key):
+            values = [t[key] for t in tokens.values() if t.get(key) is not None]
+            return sum(values) if values else None
+
+        candidates, thoughts = total("candidates"), total("thoughts")
+        metadata["usage"] = make_usage(
+            input_tokens=total("prompt"),
+            output_tokens=(candidates or 0) + (thoughts or 0) if candidates is not None else None,
+            cached_input_tokens=total("cached"),
+            total_tokens=total("total"),
+        )
+    error = result.get("error")
+    if error:
+        metadata["error"] = error.get("message", "error") if isinstance(error, dict) else str(error)
+    return (result.get("response") or "").strip(), metadata
+
+
+_JSON_PARSERS = {
+    "claude": _parse_claude_json,
+    "codex": _parse_codex_json,
+    "gemini": _parse_gemini_json,
+}
+
+
+def parse_json_output(output: str, cli_type: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Parse the machine-readable output of a CLI.
+
+    Returns:
+        Tuple (answer text, metadata with 'output_format', 'model', 'usage'
+        and, when the CLI reported a failure, 'error'), or None if the
+        output is not that CLI's JSON
+    """
+    parse = _JSON_PARSERS.get(cli_type)
+    if parse is None or not output.lstrip().startswith("{"):
+        return None
+    events = _json_events(output)
+    return parse(events) if events else None
+
+
+def parse_output(output: str, cli_type: str, prompt: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Parse a complete CLI output, JSON or text.
+
+    Returns:
+        Tuple (answer text, metadata dict)
+    """
+    parsed = parse_json_output(output, cli_type)
+    if parsed is not None:
+        return parsed
+    parser = create_parser(cli_type, prompt)
+    parser.feed(output)
+    parser.close()
+    return parser.text, parser.metadata
@@ -4,6 +4,8 @@ This version uses CLI tools (Gemini CLI, Codex CLI, Claude CLI) instead of
 external APIs. No API keys required - uses local CLI subscriptions.
 """
 
+import os
+
 # =============================================================================
 # CLI-Based Council Configuration
 # =============================================================================
@@ -23,9 +25,301 @@ COUNCIL_MODELS = [
 # Uses Gemini as default chairman (fast and good at synthesis)
 CHAIRMAN_MODEL = "gemini"
 
+# Output mode requested from each CLI:
+# - "json": machine-readable output with the model id and token usage
+#   (gemini/claude --output-format json, codex exec --json)
+# - "stream-json": Claude only, JSON events (also carries thinking blocks)
+# - "text": the human-readable output, scraped
+# A CLI that rejects the JSON flags (older versions) falls back to "text"
+# for the rest of the process, and output that is not JSON is always
+# parsed as text.
+CLI_OUTPUT_FORMAT = {
+    "gemini": "json",
+    "codex": "json",
+    "claude": "json",
+}
+
 # =============================================================================
 # Storage Configuration
 # =============================================================================
 
 # Data directory for conversation storage
 DATA_DIR = "data/conversations"
+
+# =============================================================================
+# Conversation Memory Configuration
+# =============================================================================
+
+# Model used to fold old turns into the rolling conversation summary
+MEMORY_MODEL = "gemini"
+
+# Re-summarise only when the unsummarised tail grows past this many characters
+MEMORY_TAIL_THRESHOLD_CHARS = 6000
+
+# Number of most recent messages always kept verbatim (never folded)
+MEMORY_KEEP_RECENT_MESSAGES = 2
+
+# Upper bound for the stored summary, so the injected context stays bounded
+MEMORY_SUMMARY_MAX_CHARS = 2000
+
+# =============================================================================
+# Scheduling Configuration
+# =============================================================================
+
+# Maximum number of concurrent subprocesses per CLI, shared by every caller
+# (API requests, batch runs, title and memory generation)
+CLI_MAX_CONCURRENCY = {
+    "gemini": 4,
+    "codex": 2,
+    "claude": 2,
+}
+
+# Default number of council pipelines run concurrently by the batch runner
+BATCH_CONCURRENCY = 4
+
+# Optional per-CLI resource limits (POSIX only), inherited by the whole
+# `cat prompt | cli` pipeline so one runaway process cannot starve the others:
+# - "memory_mb": cap on each process's data size (RLIMIT_DATA); the CLI
+#   fails with an out-of-memory error instead of growing without bound
+# - "nice": niceness added to the processes (1-19, higher = lower CPU priority)
+# Example: {"codex": {"memory_mb": 2048, "nice": 5}}
+CLI_RESOURCE_LIMITS = {}
+
+# CLIs run in pooled scratch directories instead of the backend's own
+# directory, so agentic CLIs (codex, claude) have no host project to scan,
+# index or modify. Each directory is set up as its CLI needs (an empty git
+# repository for Codex) and reset after every call. False runs the CLIs in
+# the current directory.
+CLI_WORKDIR_ISOLATION = True
+
+# Parent of the scratch directories (None = a temporary directory per process)
+CLI_WORKDIR_ROOT = None
+
+# Worker agents that run the CLIs on other machines (start one with
+# `python -m backend worker` on each). Entries are URLs, or
+# "unix:/path/to.sock" for agents on this machine. Empty = run the CLIs on
+# this host. Calls go to the healthy agent with the most free slots.
+CLI_WORKERS = []
+
+# Seconds between health and capacity checks of each agent (an unreachable
+# agent stays out of rotation until its next check)
+WORKER_HEALTH_INTERVAL_SECONDS = 10
+
+# Default port of `python -m backend worker`
+WORKER_PORT = 8101
+
+# Shared secret between the API servers and the worker agents: the agents
+# only answer requests carrying "Authorization: Bearer <token>". An agent
+# runs any prompt it is sent through the CLIs, so it refuses to listen on a
+# non-loopback address without one
+CLI_WORKER_TOKEN = os.environ.get("LLM_COUNCIL_WORKER_TOKEN") or None
+
+# =============================================================================
+# Deadline Configuration
+# =============================================================================
+
+# Default end-to-end budget of one council turn (API clients may pass less)
+REQUEST_DEADLINE_SECONDS = 600
+
+# Hard limit of a single CLI subprocess when no request deadline applies
+CLI_TIMEOUT_SECONDS = 300
+
+# Timeout for title generation (never more than what's left of the request)
+TITLE_TIMEOUT_SECONDS = 30
+
+# Share of the remaining budget given to Stage 1, then to Stage 2 (of what
+# is left after Stage 1); the chairman gets whatever remains
+STAGE1_BUDGET_SHARE = 0.45
+STAGE2_BUDGET_SHARE = 0.5
+
+# Degradation thresholds (seconds):
+# - skip Stage 2 if its share of the budget would be below STAGE2_MIN_SECONDS
+# - use FAST_CHAIRMAN_MODEL with a compact prompt below CHAIRMAN_MIN_SECONDS
+# - below CHAIRMAN_FLOOR_SECONDS, return the best Stage 1 answer as-is
+STAGE2_MIN_SECONDS = 30
+CHAIRMAN_MIN_SECONDS = 45
+CHAIRMAN_FLOOR_SECONDS = 5
+FAST_CHAIRMAN_MODEL = "gemini"
+
+# =============================================================================
+# Chairman Selection Configuration
+# =============================================================================
+
+# How the chairman is chosen for each turn:
+# - "fixed": CHAIRMAN_MODEL, then the other members as failover
+# - "fastest": healthy members ordered by their recent latency
+# - "top_ranked": members ordered by this turn's aggregate peer ranking
+CHAIRMAN_POLICY = "fixed"
+
+# A chairman candidate that takes longer than this is abandoned in favour
+# of the next one (the last candidate gets whatever budget remains)
+CHAIRMAN_FAILOVER_SECONDS = 120
+
+# Maximum number of chairman candidates tried per turn
+CHAIRMAN_MAX_ATTEMPTS = 3
+
+# A model is marked unhealthy after this many consecutive failed calls,
+# and skipped by the chairman policy until the cooldown expires
+HEALTH_MAX_CONSECUTIVE_FAILURES = 2
+HEALTH_COOLDOWN_SECONDS = 300
+
+# =============================================================================
+# Budget Configuration
+# =============================================================================
+
+# Token and cost budgets: "tokens" and/or "cost_usd", None = unlimited.
+# Usage is the one reported by the CLIs (see CLI_OUTPUT_FORMAT); calls that
+# report none are estimated from their prompt and response sizes.
+BUDGET_CONVERSATION = {"tokens": None, "cost_usd": None}
+BUDGET_DAILY = {"tokens": None, "cost_usd": None}
+
+# Per-member daily budgets, e.g. {"claude": {"tokens": 2_000_000}}
+BUDGET_MEMBER_DAILY = {}
+
+# Fraction of a budget at which the council switches to a cheaper plan:
+# - BUDGET_ECONOMY_RATIO: no Stage 2, compact chairman prompt
+# - BUDGET_MINIMAL_RATIO: a single member, its answer returned as-is
+#   (a member past this share of its own budget sits the turn out)
+BUDGET_ECONOMY_RATIO = 0.8
+BUDGET_MINIMAL_RATIO = 0.95
+
+# Bytes per token used to estimate calls whose CLI reports no usage
+BUDGET_BYTES_PER_TOKEN = 4
+
+# =============================================================================
+# Answer Cache Configuration
+# =============================================================================
+
+# What to do when a conversation opens with a near-duplicate of a question
+# already answered (clients can always ask for a fresh run):
+# - "return": reply with the stored Stage 3 answer, without running the council
+# - "offer": announce the stored answer, then run the council anyway
+# - None: disabled
+# Matching is lexical and can pair questions that differ in meaning, so
+# "return" is only safe for deployments that see many exact rewordings
+ANSWER_CACHE_MODE = "offer"
+
+# Minimum similarity (estimated Jaccard of the questions' meaningful words
+# and of their consecutive pairs)
+ANSWER_CACHE_THRESHOLD = 0.85
+
+# Questions with fewer meaningful words than this only match questions
+# with exactly the same words in the same order
+ANSWER_CACHE_MIN_WORDS = 4
+
+# Questions kept in the index (oldest dropped first)
+ANSWER_CACHE_MAX_ENTRIES = 5000
+
+# MinHash signature length (more = finer similarity estimates)
+ANSWER_CACHE_PERMUTATIONS = 64
+
+# =============================================================================
+# Admission Configuration
+# =============================================================================
+
+# Council runs allowed at once; further requests wait in the admission
+# queue (None disables admission control). Each run is 7+ CLI calls, so
+# this bounds the load on the CLIs no matter how many requests arrive
+ADMISSION_MAX_CONCURRENT_RUNS = 8
+
+# What fairness is computed over: "client" (the client address) or
+# "conversation"
+ADMISSION_FAIRNESS_KEY = "client"
+
+# Addresses of reverse proxies trusted to name the client behind them with
+# the X-Client-Id header (or the client_id query parameter). From any other
+# address the id is ignored, so a client cannot claim extra shares by
+# sending a new id with each request
+ADMISSION_TRUSTED_PROXIES = []
+
+# Share of the runs each client gets while several are waiting (default 1)
+ADMISSION_CLIENT_WEIGHTS = {}
+
+# Priority classes, most urgent first: a waiting request of an earlier
+# class is always admitted before one of a later class
+ADMISSION_PRIORITIES = ["interactive", "batch"]
+
+# =============================================================================
+# Preflight Configuration
+# =============================================================================
+
+# At startup, resolve each CLI, check its version and look for its
+# credentials (reported on GET /health)
+PREFLIGHT_ON_STARTUP = True
+
+# Time allowed to each probe (`<cli> --version`, warm-up prompt)
+PREFLIGHT_TIMEOUT_SECONDS = 20
+
+# Also send each CLI one short prompt, so that credentials are refreshed and
+# caches are warm before the first user request (costs one call per CLI)
+PREFLIGHT_WARMUP = False
+
+PREFLIGHT_WARMUP_PROMPT = "Reply with the single word: ready"
+
+# =============================================================================
+# Deployment Configuration
+# =============================================================================
+
+# API server processes (`python -m backend serve --workers N` sets it for
+# the processes it starts). With more than one, the CLI concurrency limits,
+# health statistics and background jobs are shared through SHARED_STATE_DIR
+API_WORKERS = int(os.environ.get("LLM_COUNCIL_WORKERS", "1"))
+
+# SQLite store and lock files shared by the API server processes
+SHARED_STATE_DIR = "data/state"
+
+# A background job claimed by a process that died is taken over after this
+SHARED_JOB_TTL_SECONDS = 600
+
+# How often a call waiting for a CLI slot held by another process retries
+SHARED_SLOT_POLL_SECONDS = 0.05
+
+# =============================================================================
+# Title Configuration
+# =============================================================================
+
+# Titles are generated locally from the first message. When enabled, an LLM
+# refines the title in the background (never delaying the council)
+TITLE_LLM_REFINEMENT = False
+
+# =============================================================================
+# Record / Replay Configuration
+# =============================================================================
+
+# "record" saves every CLI interaction (prompt, raw output, exit code, timing)
+# to CLI_CASSETTE_FILE; "replay" serves them from it instead of running the
+# CLIs, for offline and reproducible runs. None uses the live CLIs.
+CLI_CASSETTE_MODE = None
+
+CLI_CASSETTE_FILE = "data/cassettes/cli.jsonl"
+
+# When replaying, wait for each recorded latency instead of answering at once
+CLI_CASSETTE_REPLAY_LATENCY = False
+
+# =============================================================================
+# Tracing Configuration
+# =============================================================================
+
+# Where finished spans go: None (the default) disables tracing, "file"
+# appends every span to a rotating JSONL file on the event loop, "otlp"
+# sends them to an OTLP/HTTP JSON collector
+TRACE_EXPORTER = None
+
+# Rotating JSONL file for the "file" exporter
+TRACE_FILE = "data/traces/spans.jsonl"
+TRACE_MAX_BYTES = 10 * 1024 * 1024
+TRACE_BACKUP_COUNT = 5
+
+# Base URL of a local OTLP/HTTP collector for the "otlp" exporter
+TRACE_OTLP_ENDPOINT = "http://localhost:4318"
+
+# =============================================================================
+# Benchmark Configuration
+# =============================================================================
+
+# Micro-benchmark results are compared against this file
+# (`python -m backend bench --save-baseline` writes it)
+BENCHMARK_BASELINE_FILE = "benchmarks/baseline.json"
+
+# A benchmark slower than baseline * threshold is reported as a regression
+BENCHMARK_REGRESSION_THRESHOLD = 1.25
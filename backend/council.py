@@ -1,67 +1,163 @@
 """3-stage LLM Council orchestration."""
 
-from typing import List, Dict, Any, Tuple
-from .cli_bridge import query_models_parallel, query_model
-from .config import COUNCIL_MODELS, CHAIRMAN_MODEL
+import time
+from typing import List, Dict, Any, Tuple, Optional, AsyncIterator
+from .cli_bridge import iter_models_as_completed, query_model
+from .deadline import Deadline
+from . import budget, health, tracing
+from .metrics import STAGE_DURATION
+from .config import (
+    COUNCIL_MODELS,
+    CHAIRMAN_MODEL,
+    CHAIRMAN_POLICY,
+    CHAIRMAN_FAILOVER_SECONDS,
+    CHAIRMAN_MAX_ATTEMPTS,
+    TITLE_TIMEOUT_SECONDS,
+    STAGE1_BUDGET_SHARE,
+    STAGE2_BUDGET_SHARE,
+    STAGE2_MIN_SECONDS,
+    CHAIRMAN_MIN_SECONDS,
+    CHAIRMAN_FLOOR_SECONDS,
+    FAST_CHAIRMAN_MODEL,
+)
+
+# Per-response character limit in the compact chairman prompt
+COMPACT_RESPONSE_CHARS = 1500
+
+
+async def stage1_iter_responses(
+    user_query: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    models: Optional[List[str]] = None,
+    deadline: Optional[Deadline] = None
+) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]], float]]:
+    """
+    Stage 1, incremental: yield each member's response as soon as it arrives.
+
+    Args:
+        user_query: The user's question
+        history: Optional conversation context (rolling summary + recent turns)
+        models: Council members to query (defaults to COUNCIL_MODELS)
+        deadline: Optional deadline for every member's CLI call
+
+    Yields:
+        Tuples of (model, result dict with 'model' and 'response' or None
+        if the member failed, timing profile from member_timing)
+    """
+    messages = list(history or []) + [{"role": "user", "content": user_query}]
+
+    async for model, response, elapsed in iter_models_as_completed(models or COUNCIL_MODELS, messages, deadline):
+        result = None
+        if response is not None:
+            result = {
+                "model": model,
+                "response": response.get('content', '')
+            }
+        yield model, result, member_timing(response, elapsed)
 
 
-async def stage1_collect_responses(user_query: str) -> List[Dict[str, Any]]:
+async def stage1_collect_responses(
+    user_query: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    models: Optional[List[str]] = None,
+    deadline: Optional[Deadline] = None
+) -> List[Dict[str, Any]]:
     """
     Stage 1: Collect individual responses from all council models.
 
     Args:
         user_query: The user's question
+        history: Optional conversation context (rolling summary + recent turns)
+        models: Council members to query (defaults to COUNCIL_MODELS)
+        deadline: Optional deadline for every member's CLI call
 
     Returns:
         List of dicts with 'model' and 'response' keys
     """
-    messages = [{"role": "user", "content": user_query}]
+    results = {}
+    async for model, result, _ in stage1_iter_responses(user_query, history, models, deadline):
+        if result is not None:  # Only include successful responses
+            results[model] = result
 
-    # Query all models in parallel
-    responses = await query_models_parallel(COUNCIL_MODELS, messages)
+    return order_by_council(results, models)
 
-    # Format results
-    stage1_results = []
-    for model, response in responses.items():
-        if response is not None:  # Only include successful responses
-            stage1_results.append({
-                "model": model,
-                "response": response.get('content', '')
-            })
 
-    return stage1_results
+def member_timing(response: Optional[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """
+    Timing profile of one member's call within a stage.
 
+    Args:
+        response: The query_model response (None if the member failed)
+        elapsed: Seconds from the start of the stage to the member's answer
 
-async def stage2_collect_rankings(
-    user_query: str,
-    stage1_results: List[Dict[str, Any]]
-) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    Returns:
+        Dict with 'wall_seconds', 'success' and, for successful calls, the
+        CLI profile under 'cli' (queue wait, time-to-first-byte, process and
+        cleanup time, prompt and response sizes), the processes' CPU,
+        memory and I/O under 'resources' and the model and token count
+        reported by the CLI under 'output'
     """
-    Stage 2: Each model ranks the anonymized responses.
+    return {
+        "wall_seconds": round(elapsed, 3),
+        "success": response is not None,
+        **call_profile(response)
+    }
+
+
+def call_profile(response: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The 'cli' timing, 'resources' usage and 'output' metadata of a query_model response, if any."""
+    if response is None:
+        return {}
+    return {key: response[source] for key, source in
+            (("cli", "timing"), ("resources", "resources"), ("output", "cli_metadata"))
+            if response.get(source)}
+
+
+def order_by_council(
+    results: Dict[str, Dict[str, Any]],
+    models: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Order per-member results by council order, regardless of arrival order.
+
+    Keeps the Stage 2 anonymous labels (Response A, B, ...) stable.
+    """
+    return [results[model] for model in (models or COUNCIL_MODELS) if model in results]
+
+
+def build_label_to_model(stage1_results: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Create the anonymized labels for Stage 1 responses.
 
     Args:
-        user_query: The original user query
         stage1_results: Results from Stage 1
 
     Returns:
-        Tuple of (rankings list, label_to_model mapping)
+        Mapping from label ("Response A", ...) to model name
     """
-    # Create anonymized labels for responses (Response A, Response B, etc.)
-    labels = [chr(65 + i) for i in range(len(stage1_results))]  # A, B, C, ...
-
-    # Create mapping from label to model name
-    label_to_model = {
-        f"Response {label}": result['model']
-        for label, result in zip(labels, stage1_results)
+    return {
+        f"Response {chr(65 + i)}": result['model']  # A, B, C, ...
+        for i, result in enumerate(stage1_results)
     }
 
-    # Build the ranking prompt
+
+def build_ranking_prompt(user_query: str, stage1_results: List[Dict[str, Any]]) -> str:
+    """
+    Build the Stage 2 prompt with anonymized responses.
+
+    Args:
+        user_query: The original user query
+        stage1_results: Results from Stage 1
+
+    Returns:
+        The ranking prompt
+    """
     responses_text = "\n\n".join([
-        f"Response {label}:\n{result['response']}"
-        for label, result in zip(labels, stage1_results)
+        f"{label}:\n{result['response']}"
+        for label, result in zip(build_label_to_model(stage1_results), stage1_results)
     ])
 
-    ranking_prompt = f"""You are evaluating different responses to the following question:
+    return f"""You are evaluating different responses to the following question:
 
 Question: {user_query}
 
@@ -92,30 +188,73 @@ FINAL RANKING:
 
 Now provide your evaluation and ranking:"""
 
-    messages = [{"role": "user", "content": ranking_prompt}]
 
-    # Get rankings from all council models in parallel
-    responses = await query_models_parallel(COUNCIL_MODELS, messages)
+async def stage2_iter_rankings(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    models: Optional[List[str]] = None,
+    deadline: Optional[Deadline] = None
+) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]], float]]:
+    """
+    Stage 2, incremental: yield each member's ranking as soon as it arrives.
+
+    Args:
+        user_query: The original user query
+        stage1_results: Results from Stage 1
+        models: Council members acting as reviewers (defaults to COUNCIL_MODELS)
+        deadline: Optional deadline for every member's CLI call
+
+    Yields:
+        Tuples of (model, dict with 'model', 'ranking' and 'parsed_ranking'
+        or None if the member failed, timing profile from member_timing)
+    """
+    messages = [{"role": "user", "content": build_ranking_prompt(user_query, stage1_results)}]
 
-    # Format results
-    stage2_results = []
-    for model, response in responses.items():
+    async for model, response, elapsed in iter_models_as_completed(models or COUNCIL_MODELS, messages, deadline):
+        result = None
         if response is not None:
             full_text = response.get('content', '')
-            parsed = parse_ranking_from_text(full_text)
-            stage2_results.append({
+            result = {
                 "model": model,
                 "ranking": full_text,
-                "parsed_ranking": parsed
-            })
+                "parsed_ranking": parse_ranking_from_text(full_text)
+            }
+        yield model, result, member_timing(response, elapsed)
+
+
+async def stage2_collect_rankings(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    models: Optional[List[str]] = None,
+    deadline: Optional[Deadline] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Stage 2: Each model ranks the anonymized responses.
+
+    Args:
+        user_query: The original user query
+        stage1_results: Results from Stage 1
+        models: Council members acting as reviewers (defaults to COUNCIL_MODELS)
+        deadline: Optional deadline for every member's CLI call
 
-    return stage2_results, label_to_model
+    Returns:
+        Tuple of (rankings list, label_to_model mapping)
+    """
+    results = {}
+    async for model, result, _ in stage2_iter_rankings(user_query, stage1_results, models, deadline):
+        if result is not None:
+            results[model] = result
+
+    return order_by_council(results, models), build_label_to_model(stage1_results)
 
 
 async def stage3_synthesize_final(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
-    stage2_results: List[Dict[str, Any]]
+    stage2_results: List[Dict[str, Any]],
+    chairman_model: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    compact: bool = False
 ) -> Dict[str, Any]:
     """
     Stage 3: Chairman synthesizes final response.
@@ -123,23 +262,195 @@ async def stage3_synthesize_final(
     Args:
         user_query: The original user query
         stage1_results: Individual model responses from Stage 1
-        stage2_results: Rankings from Stage 2
+        stage2_results: Rankings from Stage 2 (may be empty if skipped)
+        chairman_model: Model that synthesizes (defaults to CHAIRMAN_MODEL)
+        deadline: Optional deadline for the chairman's CLI call
+        compact: Use a shorter prompt (truncated responses, no rankings text)
 
     Returns:
         Dict with 'model' and 'response' keys
     """
+    messages = [{"role": "user", "content": build_chairman_prompt(
+        user_query, stage1_results, stage2_results, compact
+    )}]
+
+    # Query the chairman model
+    chairman_model = chairman_model or CHAIRMAN_MODEL
+    response = await query_model(chairman_model, messages, deadline=deadline)
+
+    if response is None:
+        # Fallback if chairman fails
+        return {
+            "model": chairman_model,
+            "response": "Error: Unable to generate final synthesis."
+        }
+
+    return {
+        "model": chairman_model,
+        "response": response.get('content', '')
+    }
+
+
+def select_chairman_candidates(
+    council_models: Optional[List[str]] = None,
+    aggregate_rankings: Optional[List[Dict[str, Any]]] = None,
+    preferred: Optional[str] = None,
+    policy: Optional[str] = None
+) -> List[str]:
+    """
+    Order the chairman candidates for this turn according to a policy.
+
+    Policies (CHAIRMAN_POLICY):
+    - "fixed": CHAIRMAN_MODEL first, then the council members
+    - "fastest": by smoothed latency of recent successful calls (models
+      without data come after, in council order)
+    - "top_ranked": by this turn's aggregate peer ranking
+
+    In every policy an explicitly preferred chairman goes first and
+    unhealthy models go last, so they are only tried as a last resort.
+
+    Args:
+        council_models: Council members (defaults to COUNCIL_MODELS)
+        aggregate_rankings: Aggregate rankings of this turn, if any
+        preferred: Explicitly requested chairman, always tried first
+        policy: Override of CHAIRMAN_POLICY
+
+    Returns:
+        Candidate models, best first, without duplicates
+    """
+    policy = policy or CHAIRMAN_POLICY
+    members = list(council_models or COUNCIL_MODELS)
+
+    if policy == "fastest":
+        ordered = sorted(members, key=lambda m: (
+            health.get_latency(m) is None,
+            health.get_latency(m) or 0.0
+        ))
+    elif policy == "top_ranked":
+        ranked = [entry['model'] for entry in aggregate_rankings or []]
+        ordered = ranked + [m for m in members if m not in ranked]
+    else:
+        ordered = [CHAIRMAN_MODEL] + members
+
+    if preferred:
+        ordered = [preferred] + ordered
+
+    candidates = []
+    for model in ordered:
+        if model not in candidates:
+            candidates.append(model)
+
+    # Stable sort: healthy candidates keep their order, unhealthy ones go last
+    candidates.sort(key=lambda m: not health.is_healthy(m))
+    return candidates
+
+
+async def stage3_with_failover(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    stage2_results: List[Dict[str, Any]],
+    candidates: List[str],
+    aggregate_rankings: Optional[List[Dict[str, Any]]] = None,
+    deadline: Optional[Deadline] = None,
+    compact: bool = False
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Stage 3 with chairman failover.
+
+    Candidates are tried in order; each but the last is abandoned after
+    CHAIRMAN_FAILOVER_SECONDS. If every candidate fails (or the deadline
+    runs out) the best Stage 1 answer is returned, so the work of Stages 1
+    and 2 is never thrown away.
+
+    Args:
+        user_query: The original user query
+        stage1_results: Individual model responses from Stage 1
+        stage2_results: Rankings from Stage 2 (may be empty if skipped)
+        candidates: Chairman candidates, best first
+        aggregate_rankings: Aggregate rankings, used for the fallback answer
+        deadline: Optional request deadline
+        compact: Use the compact chairman prompt
+
+    Returns:
+        Tuple of (result dict with 'model' and 'response', chairman metadata)
+    """
+    messages = [{"role": "user", "content": build_chairman_prompt(
+        user_query, stage1_results, stage2_results, compact
+    )}]
+
+    attempts = []
+    candidates = candidates[:CHAIRMAN_MAX_ATTEMPTS]
+
+    for index, model in enumerate(candidates):
+        if deadline is not None and deadline.remaining() < CHAIRMAN_FLOOR_SECONDS:
+            break
+
+        is_last = index == len(candidates) - 1
+        started = time.monotonic()
+        response = await query_model(
+            model,
+            messages,
+            timeout=None if is_last else CHAIRMAN_FAILOVER_SECONDS,
+            deadline=deadline
+        )
+        attempt = {
+            "model": model,
+            "success": response is not None,
+            "duration_seconds": round(time.monotonic() - started, 3)
+        }
+        attempt.update(call_profile(response))
+        attempts.append(attempt)
+
+        if response is not None:
+            return {
+                "model": model,
+                "response": response.get('content', '')
+            }, {"candidates": candidates, "attempts": attempts, "fallback": False}
+
+    # Every chairman failed: fall back to the best individual answer
+    return best_stage1_response(stage1_results, aggregate_rankings), {
+        "candidates": candidates, "attempts": attempts, "fallback": True
+    }
+
+
+def build_chairman_prompt(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    stage2_results: List[Dict[str, Any]],
+    compact: bool = False
+) -> str:
+    """
+    Build the Stage 3 prompt for the chairman.
+
+    Args:
+        user_query: The original user query
+        stage1_results: Individual model responses from Stage 1
+        stage2_results: Rankings from Stage 2 (may be empty if skipped)
+        compact: Truncate responses and leave out the rankings text
+
+    Returns:
+        The chairman prompt
+    """
+    def shorten(text: str) -> str:
+        if compact and len(text) > COMPACT_RESPONSE_CHARS:
+            return text[:COMPACT_RESPONSE_CHARS] + "\n[...truncated]"
+        return text
+
     # Build comprehensive context for chairman
     stage1_text = "\n\n".join([
-        f"Model: {result['model']}\nResponse: {result['response']}"
+        f"Model: {result['model']}\nResponse: {shorten(result['response'])}"
         for result in stage1_results
     ])
 
-    stage2_text = "\n\n".join([
-        f"Model: {result['model']}\nRanking: {result['ranking']}"
-        for result in stage2_results
-    ])
+    if compact or not stage2_results:
+        stage2_text = "(Peer rankings omitted to meet the response deadline.)"
+    else:
+        stage2_text = "\n\n".join([
+            f"Model: {result['model']}\nRanking: {result['ranking']}"
+            for result in stage2_results
+        ])
 
-    chairman_prompt = f"""You are the Chairman of an LLM Council. Multiple AI models have provided responses to a user's question, and then ranked each other's responses.
+    return f"""You are the Chairman of an LLM Council. Multiple AI models have provided responses to a user's question, and then ranked each other's responses.
 
 Original Question: {user_query}
 
@@ -156,22 +467,29 @@ Your task as Chairman is to synthesize all of this information into a single, co
 
 Provide a clear, well-reasoned final answer that represents the council's collective wisdom:"""
 
-    messages = [{"role": "user", "content": chairman_prompt}]
 
-    # Query the chairman model
-    response = await query_model(CHAIRMAN_MODEL, messages)
+def best_stage1_response(
+    stage1_results: List[Dict[str, Any]],
+    aggregate_rankings: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Pick the best individual answer to use when no synthesis is possible.
 
-    if response is None:
-        # Fallback if chairman fails
-        return {
-            "model": CHAIRMAN_MODEL,
-            "response": "Error: Unable to generate final synthesis."
-        }
+    Uses the top of the aggregate rankings when available, otherwise the
+    first successful Stage 1 response (council order).
 
-    return {
-        "model": CHAIRMAN_MODEL,
-        "response": response.get('content', '')
-    }
+    Args:
+        stage1_results: Individual model responses from Stage 1
+        aggregate_rankings: Aggregate rankings from Stage 2, if any
+
+    Returns:
+        Dict with 'model' and 'response' keys
+    """
+    by_model = {result['model']: result for result in stage1_results}
+    for entry in aggregate_rankings or []:
+        if entry['model'] in by_model:
+            return dict(by_model[entry['model']])
+    return dict(stage1_results[0])
 
 
 def parse_ranking_from_text(ranking_text: str) -> List[str]:
@@ -255,13 +573,82 @@ def calculate_aggregate_rankings(
     return aggregate
 
 
-async def generate_conversation_title(user_query: str) -> str:
+# Words never used in local titles (English and Italian function words and
+# the usual question/request fillers)
+TITLE_STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because
+been before being below between both but by can could did do does doing down
+during each explain few for from further had has have having he her here hers
+him his how i if in into is it its itself just know let me more most my no nor
+not now of off on once only or other our ours out over own please same she
+should so some such tell than that the their theirs them then there these they
+this those through to too under until up very was we were what when where which
+while who whom why will with would you your yours give show help want need
+like make using use get difference vs versus whats hows
+il lo la i gli le un uno una di da in con su per tra fra e ed o che chi cosa
+come dove quando perché perche quale quali quanto non mi ti si ci vi ne del
+dello della dei degli delle al allo alla ai agli alle dal dalla nel nella sul
+sulla è sono essere ho hai ha abbiamo hanno mio tuo suo puoi può posso spiega
+dimmi vorrei fammi
+""".split())
+
+TITLE_MAX_WORDS = 5
+
+
+def generate_local_title(user_query: str) -> str:
     """
-    Generate a short title for a conversation based on the first user message.
+    Generate a short title locally, without any LLM call.
+
+    Keeps the first distinct keywords of the message (stop words, fillers
+    and one-letter tokens removed), in their original order.
 
     Args:
         user_query: The first user message
 
+    Returns:
+        A short title (up to 5 words), or "New Conversation"
+    """
+    import re
+
+    keywords = []
+    seen = set()
+    for word in re.findall(r"[^\W_][\w+#.-]*[\w+#]|[^\W_]", user_query[:500]):
+        lower = word.lower()
+        if lower in TITLE_STOP_WORDS or lower in seen:
+            continue
+        if len(word) < 2 and not word.isdigit():
+            continue
+        seen.add(lower)
+        # Keep acronyms and identifiers (CAP, gRPC, Python3) as written
+        keywords.append(word if not word.islower() else word.capitalize())
+        if len(keywords) == TITLE_MAX_WORDS:
+            break
+
+    if not keywords:
+        return "New Conversation"
+
+    title = " ".join(keywords)
+
+    # Truncate if too long
+    if len(title) > 50:
+        title = title[:47] + "..."
+
+    return title
+
+
+async def generate_conversation_title(
+    user_query: str,
+    deadline: Optional[Deadline] = None
+) -> str:
+    """
+    Generate a short title for a conversation with an LLM call.
+
+    Used to refine the local title when TITLE_LLM_REFINEMENT is enabled.
+
+    Args:
+        user_query: The first user message
+        deadline: Optional request deadline (the title never outlives it)
+
     Returns:
         A short title (3-5 words)
     """
@@ -275,7 +662,8 @@ Title:"""
     messages = [{"role": "user", "content": title_prompt}]
 
     # Use gemini for title generation (fast via CLI)
-    response = await query_model("gemini", messages, timeout=30.0)
+    with tracing.span("title.generate", method="llm"):
+        response = await query_model("gemini", messages, timeout=TITLE_TIMEOUT_SECONDS, deadline=deadline)
 
     if response is None:
         # Fallback to a generic title
@@ -293,43 +681,252 @@ Title:"""
     return title
 
 
-async def run_full_council(user_query: str) -> Tuple[List, List, Dict, Dict]:
+async def stream_council(
+    user_query: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    council_models: Optional[List[str]] = None,
+    chairman_model: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    plan: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[Dict[str, Any]]:
     """
-    Run the complete 3-stage council process.
+    Run the 3-stage council process, yielding progress events.
+
+    Events have the same shape as the SSE events of the streaming endpoint:
+    'stage1_start', 'stage1_complete', 'stage2_start', 'stage2_complete'
+    (with 'metadata'), 'stage3_start', 'stage3_complete'. Between a stage's
+    start and complete events, 'stage1_member_complete' and
+    'stage2_member_complete' report each member in completion order, with
+    its result ('data', None on failure) and 'duration_seconds'.
+
+    With a deadline, Stage 1 and Stage 2 each get a share of the remaining
+    budget and the pipeline degrades instead of overrunning it: Stage 2 is
+    skipped ('stage2_skipped' event), the chairman is swapped for
+    FAST_CHAIRMAN_MODEL with a compact prompt, or the best Stage 1 answer
+    is returned as-is. 'stage3_complete' then carries the applied
+    degradations in its 'metadata'.
+
+    The chairman is chosen by select_chairman_candidates (an explicit
+    `chairman_model` is tried first) and fails over to the next candidate;
+    'stage3_complete' metadata reports the attempts under 'chairman'.
+
+    A budget `plan` from budget.plan_turn replaces the council with its
+    'members'; the "economy" plan skips Stage 2 (reason "budget") and uses
+    the compact chairman prompt, the "minimal" plan also returns the Stage 1
+    answer without a chairman. 'stage3_complete' metadata carries the plan
+    under 'budget' and the turn's token and cost counters under 'usage'.
+
+    Each 'stage*_complete' event carries the stage's timing profile in
+    metadata['timing']: the stage's 'wall_seconds' and, per member, the
+    profile built by member_timing.
 
     Args:
         user_query: The user's question
-
-    Returns:
-        Tuple of (stage1_results, stage2_results, stage3_result, metadata)
+        history: Optional conversation context injected into Stage 1
+        council_models: Council members (defaults to COUNCIL_MODELS)
+        chairman_model: Chairman (defaults to CHAIRMAN_MODEL)
+        deadline: Optional request-wide deadline
+        plan: Optional budget plan (see budget.plan_turn)
+
+    Yields:
+        Event dicts with a 'type' key and optional 'data'/'metadata'
     """
-    # Stage 1: Collect individual responses
-    stage1_results = await stage1_collect_responses(user_query)
-
-    # If no models responded successfully, return error
+    degraded = []
+    plan_name = plan["plan"] if plan is not None else "full"
+    if plan is not None:
+        council_models = plan["members"]
+
+    # Stage 1: Collect individual responses, announcing each as it arrives
+    stage_started = time.monotonic()
+    yield {"type": "stage1_start"}
+    stage1_deadline = deadline.share(STAGE1_BUDGET_SHARE) if deadline else None
+    responses = {}
+    stage1_timing = {"members": {}}
+    with tracing.span("council.stage1", activate=False,
+                      members=len(council_models or COUNCIL_MODELS)) as stage_span:
+        async for model, result, timing in tracing.iterate(stage_span, stage1_iter_responses(
+            user_query, history, council_models, stage1_deadline
+        )):
+            if result is not None:
+                responses[model] = result
+            stage1_timing["members"][model] = timing
+            yield {"type": "stage1_member_complete", "data": result, "model": model,
+                   "success": result is not None, "duration_seconds": timing["wall_seconds"]}
+        stage_span.set("responses", len(responses))
+    stage1_results = order_by_council(responses, council_models)
+    stage1_timing["wall_seconds"] = round(time.monotonic() - stage_started, 3)
+    STAGE_DURATION.observe(stage1_timing["wall_seconds"], stage="stage1")
+    yield {"type": "stage1_complete", "data": stage1_results,
+           "metadata": {"timing": stage1_timing}}
+
+    # If no models responded successfully, skip straight to the error result
     if not stage1_results:
-        return [], [], {
+        yield {"type": "stage3_start"}
+        yield {"type": "stage3_complete", "data": {
             "model": "error",
             "response": "All models failed to respond. Please try again."
-        }, {}
+        }}
+        return
+
+    # Stage 2: Collect rankings (labels are known upfront for de-anonymization)
+    label_to_model = build_label_to_model(stage1_results)
+    stage2_deadline = deadline.share(STAGE2_BUDGET_SHARE) if deadline else None
+
+    skip_reason = None
+    if plan_name != "full":
+        skip_reason = "budget"
+    elif stage2_deadline is not None and stage2_deadline.remaining() < STAGE2_MIN_SECONDS:
+        # Not enough budget for a meaningful peer review: keep it for the chairman
+        skip_reason = "deadline"
+
+    if skip_reason is not None:
+        degraded.append("stage2_skipped")
+        yield {"type": "stage2_skipped", "reason": skip_reason}
+        stage2_results, aggregate_rankings = [], []
+        stage2_timing = {"members": {}, "wall_seconds": 0.0}
+    else:
+        stage_started = time.monotonic()
+        yield {"type": "stage2_start", "metadata": {"label_to_model": label_to_model}}
+        rankings = {}
+        stage2_timing = {"members": {}}
+        with tracing.span("council.stage2", activate=False,
+                          members=len(council_models or COUNCIL_MODELS)) as stage_span:
+            async for model, result, timing in tracing.iterate(stage_span, stage2_iter_rankings(
+                user_query, stage1_results, council_models, stage2_deadline
+            )):
+                if result is not None:
+                    rankings[model] = result
+                stage2_timing["members"][model] = timing
+                yield {"type": "stage2_member_complete", "data": result, "model": model,
+                       "success": result is not None, "duration_seconds": timing["wall_seconds"]}
+            stage_span.set("rankings", len(rankings))
+        stage2_results = order_by_council(rankings, council_models)
+
+        # Calculate aggregate rankings
+        parse_started = time.monotonic()
+        aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
+        stage2_timing["aggregate_seconds"] = round(time.monotonic() - parse_started, 4)
+        stage2_timing["wall_seconds"] = round(time.monotonic() - stage_started, 3)
+        STAGE_DURATION.observe(stage2_timing["wall_seconds"], stage="stage2")
+
+    yield {"type": "stage2_complete", "data": stage2_results, "metadata": {
+        "label_to_model": label_to_model,
+        "aggregate_rankings": aggregate_rankings,
+        "timing": stage2_timing
+    }}
+
+    # Stage 3: Synthesize final answer with whatever budget is left
+    stage_started = time.monotonic()
+    yield {"type": "stage3_start"}
+    chairman_metadata = {}
+    if plan_name == "minimal" or (
+        deadline is not None and deadline.remaining() < CHAIRMAN_FLOOR_SECONDS
+    ):
+        degraded.append("chairman_skipped")
+        stage3_result = best_stage1_response(stage1_results, aggregate_rankings)
+    else:
+        compact = plan_name == "economy"
+        policy = None
+        if deadline is not None and deadline.remaining() < CHAIRMAN_MIN_SECONDS:
+            # Short on time: prefer the fast chairman, then the fastest members
+            degraded.append("fast_chairman")
+            chairman_model = FAST_CHAIRMAN_MODEL
+            policy = "fastest"
+            compact = True
+        candidates = select_chairman_candidates(
+            council_models, aggregate_rankings, chairman_model, policy
+        )
+        with tracing.span("council.stage3", compact=compact) as stage_span:
+            stage3_result, chairman_metadata = await stage3_with_failover(
+                user_query,
+                stage1_results,
+                stage2_results,
+                candidates,
+                aggregate_rankings,
+                deadline,
+                compact
+            )
+            stage_span.set("chairman", stage3_result.get("model"))
+            stage_span.set("attempts", len(chairman_metadata["attempts"]))
+
+    stage3_timing = {
+        "members": {
+            attempt["model"]: {
+                "wall_seconds": attempt["duration_seconds"],
+                "success": attempt["success"],
+                **{key: attempt[key] for key in ("cli", "resources", "output") if key in attempt}
+            }
+            for attempt in chairman_metadata.get("attempts", [])
+        },
+        "wall_seconds": round(time.monotonic() - stage_started, 3)
+    }
+    STAGE_DURATION.observe(stage3_timing["wall_seconds"], stage="stage3")
+    stage3_event = {"type": "stage3_complete", "data": stage3_result, "metadata": {
+        "chairman": chairman_metadata,
+        "timing": stage3_timing,
+        "usage": budget.turn_usage([stage1_timing, stage2_timing, stage3_timing])
+    }}
+    if plan is not None:
+        stage3_event["metadata"]["budget"] = plan
+    if deadline is not None:
+        stage3_event["metadata"]["deadline"] = {
+            "budget_seconds": deadline.budget,
+            "remaining_seconds": round(deadline.remaining(), 3),
+            "degraded": degraded
+        }
+    yield stage3_event
 
-    # Stage 2: Collect rankings
-    stage2_results, label_to_model = await stage2_collect_rankings(user_query, stage1_results)
 
-    # Calculate aggregate rankings
-    aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
+async def run_full_council(
+    user_query: str,
+    history: Optional[List[Dict[str, str]]] = None,
+    council_models: Optional[List[str]] = None,
+    chairman_model: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    plan: Optional[Dict[str, Any]] = None
+) -> Tuple[List, List, Dict, Dict]:
+    """
+    Run the complete 3-stage council process.
 
-    # Stage 3: Synthesize final answer
-    stage3_result = await stage3_synthesize_final(
-        user_query,
-        stage1_results,
-        stage2_results
-    )
+    Args:
+        user_query: The user's question
+        history: Optional conversation context injected into Stage 1
+        council_models: Council members (defaults to COUNCIL_MODELS)
+        chairman_model: Chairman (defaults to CHAIRMAN_MODEL)
+        deadline: Optional request-wide deadline (see stream_council)
+        plan: Optional budget plan (see stream_council)
 
-    # Prepare metadata
-    metadata = {
-        "label_to_model": label_to_model,
-        "aggregate_rankings": aggregate_rankings
-    }
+    Returns:
+        Tuple of (stage1_results, stage2_results, stage3_result, metadata);
+        metadata['timing'] holds the per-stage profiles and 'total_seconds',
+        metadata['usage'] the turn's token and cost counters
+    """
+    stage1_results, stage2_results, stage3_result, metadata = [], [], {}, {}
+    timing = {}
+    started = time.monotonic()
+
+    async for event in stream_council(
+        user_query, history, council_models, chairman_model, deadline, plan
+    ):
+        if event["type"] == "stage1_complete":
+            stage1_results = event["data"]
+            timing["stage1"] = event["metadata"]["timing"]
+        elif event["type"] == "stage2_complete":
+            stage2_results = event["data"]
+            metadata.update(event["metadata"])
+            timing["stage2"] = metadata.pop("timing")
+        elif event["type"] == "stage3_complete":
+            stage3_result = event["data"]
+            metadata.update(event.get("metadata", {}))
+            if "timing" in metadata:
+                timing["stage3"] = metadata.pop("timing")
+
+    timing["total_seconds"] = round(time.monotonic() - started, 3)
+
+    # If no models responded successfully, return error (with the timing
+    # profile, to show where the turn's time went)
+    if not stage1_results:
+        return [], [], stage3_result, {"timing": timing}
 
+    metadata["timing"] = timing
     return stage1_results, stage2_results, stage3_result, metadata
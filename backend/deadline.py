@@ -0,0 +1,54 @@
+"""Request-wide deadlines shared by every stage and CLI call of a turn."""
+
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    An absolute point in time by which a council turn must finish.
+
+    Created once per API request and passed down through the stages to every
+    CLI call, so each step only uses what is left of the request's budget
+    instead of its own hard-coded timeout.
+    """
+
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        """True once the deadline has passed."""
+        return self.remaining() <= 0.0
+
+    def share(self, fraction: float) -> "Deadline":
+        """
+        Sub-deadline covering a fraction of the remaining budget.
+
+        Args:
+            fraction: Share of the remaining time (0.0 - 1.0)
+
+        Returns:
+            A new Deadline that never outlives this one
+        """
+        return Deadline(self.remaining() * min(max(fraction, 0.0), 1.0))
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """
+        Timeout to use for one operation under this deadline.
+
+        Args:
+            cap: Optional upper bound (e.g. the operation's own timeout)
+
+        Returns:
+            The remaining time, capped if requested
+        """
+        remaining = self.remaining()
+        return remaining if cap is None else min(remaining, cap)
+
+    def __repr__(self) -> str:
+        return f"Deadline(budget={self.budget:.1f}s, remaining={self.remaining():.1f}s)"
@@ -0,0 +1,103 @@
+"""Live latency and health statistics per council model.
+
+Updated by cli_bridge after every CLI call and read by the chairman
+selection policy. Kept in memory, so it resets on restart; when several
+API server processes run (see shared_state.py) the statistics live in the
+shared store instead, so that every process sees every call.
+"""
+
+import time
+from typing import Dict, Any, Optional
+from . import shared_state
+from .config import HEALTH_MAX_CONSECUTIVE_FAILURES, HEALTH_COOLDOWN_SECONDS
+
+# Weight of the newest sample in the exponentially weighted moving average
+LATENCY_EWMA_ALPHA = 0.3
+
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+def _get(model: str) -> Optional[Dict[str, Any]]:
+    if shared_state.enabled():
+        return shared_state.get("health", model)
+    return _stats.get(model)
+
+
+def _all() -> Dict[str, Dict[str, Any]]:
+    if shared_state.enabled():
+        return shared_state.items("health")
+    return _stats
+
+
+def record_call(model: str, duration: float, success: bool):
+    """
+    Record the outcome of one CLI call.
+
+    Args:
+        model: Model identifier as passed to query_model
+        duration: Wall time of the call in seconds
+        success: Whether the call produced a usable response
+    """
+    def update(stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        stats = stats or {
+            "calls": 0,
+            "failures": 0,
+            "consecutive_failures": 0,
+            "latency_ewma": None,
+            "last_failure_at": None,
+        }
+        stats["calls"] += 1
+        if success:
+            stats["consecutive_failures"] = 0
+            previous = stats["latency_ewma"]
+            stats["latency_ewma"] = duration if previous is None else (
+                LATENCY_EWMA_ALPHA * duration + (1 - LATENCY_EWMA_ALPHA) * previous
+            )
+        else:
+            stats["failures"] += 1
+            stats["consecutive_failures"] += 1
+            stats["last_failure_at"] = time.time()
+        return stats
+
+    if shared_state.enabled():
+        shared_state.update("health", model, update)
+    else:
+        _stats[model] = update(_stats.get(model))
+
+
+def get_latency(model: str) -> Optional[float]:
+    """Smoothed latency of successful calls, or None if never succeeded."""
+    stats = _get(model)
+    return stats["latency_ewma"] if stats else None
+
+
+def is_healthy(model: str) -> bool:
+    """
+    Whether a model is currently considered healthy.
+
+    Unknown models are healthy; a model that failed repeatedly is unhealthy
+    until the cooldown expires, after which it gets another chance.
+    """
+    stats = _get(model)
+    if stats is None or stats["consecutive_failures"] < HEALTH_MAX_CONSECUTIVE_FAILURES:
+        return True
+    return time.time() - stats["last_failure_at"] > HEALTH_COOLDOWN_SECONDS
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """Current statistics of every model seen so far."""
+    return {
+        model: {
+            **stats,
+            "latency_ewma": round(stats["latency_ewma"], 3) if stats["latency_ewma"] is not None else None,
+            "healthy": is_healthy(model),
+        }
+        for model, stats in _all().items()
+    }
+
+
+def reset():
+    """Forget all statistics."""
+    _stats.clear()
+    if shared_state.enabled():
+        shared_state.clear("health")
@@ -0,0 +1,383 @@
+"""End-to-end load test: N simulated users against the API.
+
+Usage:
+    python -m backend loadtest --users 8 --turns 3 --output loadtest.json
+    python -m backend loadtest --endpoint stream --cli-latency lognormal:2,0.5
+
+Each user creates a conversation and sends `--turns` messages through
+/message, /message/stream or both (alternating). The FastAPI app runs in
+process, behind a transport that streams response bodies, so the same event
+loop serves the requests and is probed for lag. By default the CLIs are the
+stand-ins from backend/tests/fake_cli (latency, failures and output size set
+with FAKE_CLI_* or the options below), and conversations go to a temporary
+data directory.
+
+The report (printed and saved as JSON) has turns per second, client latency
+and per-stage percentiles, event-loop lag, open file descriptors and memory
+growth, so orchestration or storage regressions show up between releases.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from .batch import summarize_latencies
+
+FAKE_CLI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "fake_cli")
+
+ENDPOINTS = ("message", "stream", "mixed")
+
+DEFAULT_QUESTION = "What are the tradeoffs between consistency and availability?"
+
+STAGES = ("stage1", "stage2", "stage3")
+
+
+def _open_fds() -> Optional[int]:
+    """Open file descriptors of this process (None where unsupported)."""
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir))
+    return None
+
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident memory of this process (None where unsupported)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        # Peak, not current, outside Linux: still shows growth over a run
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+    except ImportError:
+        return None
+
+
+class ProcessMonitor:
+    """Sample event-loop lag, open file descriptors and memory during a run."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.lags: List[float] = []
+        self.fds: List[int] = []
+        self.rss: List[int] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def _sample(self):
+        fds, rss = _open_fds(), _rss_bytes()
+        if fds is not None:
+            self.fds.append(fds)
+        if rss is not None:
+            self.rss.append(rss)
+
+    async def _run(self):
+        while True:
+            scheduled = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(time.perf_counter() - scheduled - self.interval, 0.0))
+            self._sample()
+
+    def start(self):
+        self._sample()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._sample()
+
+    def summary(self) -> Dict[str, Any]:
+        lag_ms = summarize_latencies([lag * 1000 for lag in self.lags])
+        return {
+            "event_loop_lag_ms": lag_ms,
+            "open_fds": {
+                "start": self.fds[0], "end": self.fds[-1], "peak": max(self.fds)
+            } if self.fds else None,
+            "rss_bytes": {
+                "start": self.rss[0], "end": self.rss[-1], "peak": max(self.rss),
+                "growth": self.rss[-1] - self.rss[0]
+            } if self.rss else None,
+        }
+
+
+async def _send_message(client, conversation_id: str, content: str) -> Dict[str, Any]:
+    """One turn through POST /message (always a fresh council run, never the answer cache)."""
+    started = time.monotonic()
+    response = await client.post(f"/api/conversations/{conversation_id}/message",
+                                 json={"content": content, "fresh": True})
+    response.raise_for_status()
+    data = response.json()
+    timing = data.get("metadata", {}).get("timing", {})
+    return {
+        "latency": time.monotonic() - started,
+        "stages": {stage: timing[stage]["wall_seconds"] for stage in STAGES if stage in timing},
+        "error": None if data.get("stage3", {}).get("model") != "error" else "all models failed",
+    }
+
+
+async def _send_message_stream(client, conversation_id: str, content: str) -> Dict[str, Any]:
+    """One turn through POST /message/stream, timing each event's arrival."""
+    started = time.monotonic()
+    turn = {"stages": {}, "first_event": None, "error": None}
+    async with client.stream("POST", f"/api/conversations/{conversation_id}/message/stream",
+                             json={"content": content, "fresh": True}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            if turn["first_event"] is None:
+                turn["first_event"] = time.monotonic() - started
+            event = json.loads(line[len("data: "):])
+            stage = event["type"].replace("_complete", "")
+            if stage in STAGES and "timing" in event.get("metadata", {}):
+                turn["stages"][stage] = event["metadata"]["timing"]["wall_seconds"]
+            if event["type"] == "stage3_complete" and event["data"].get("model") == "error":
+                turn["error"] = "all models failed"
+            elif event["type"] == "error":
+                turn["error"] = event.get("message", "error event")
+    turn["latency"] = time.monotonic() - started
+    return turn
+
+
+def _user_address(user: int) -> str:
+    """Distinct private address of a simulated user."""
+    return f"10.{user // 65536 % 256}.{user // 256 % 256}.{user % 256}"
+
+
+async def _simulate_user(
+    client,
+    user: int,
+    turns: int,
+    endpoint: str,
+    question: str,
+    think_time: float,
+    results: List[Dict[str, Any]]
+):
+    """One user: a conversation with `turns` messages, recording each turn."""
+    response = await client.post("/api/conversations", json={})
+    conversation_id = response.json()["id"]
+
+    for index in range(turns):
+        if endpoint == "mixed":
+            mode = "stream" if (user + index) % 2 else "message"
+        else:
+            mode = endpoint
+        content = question if index == 0 else f"{question} (follow-up {index})"
+        send = _send_message_stream if mode == "stream" else _send_message
+        try:
+            turn = await send(client, conversation_id, content)
+        except Exception as e:
+            turn = {"latency": None, "stages": {}, "error": f"{type(e).__name__}: {e}"}
+        turn["endpoint"] = mode
+        results.append(turn)
+        if think_time:
+            await asyncio.sleep(think_time)
+
+
+async def run_load_test(
+    users: int = 4,
+    turns: int = 2,
+    endpoint: str = "mixed",
+    question: str = DEFAULT_QUESTION,
+    think_time: float = 0.0
+) -> Dict[str, Any]:
+    """
+    Drive the API with concurrent simulated users and measure it.
+
+    Conversations are written to a temporary data directory, removed at the
+    end. The CLIs are whatever `gemini`/`codex`/`claude` resolve to in PATH
+    (see use_fake_clis).
+
+    Args:
+        users: Number of concurrent users
+        turns: Messages sent by each user
+        endpoint: "message", "stream" or "mixed" (alternating)
+        question: First message of every conversation
+        think_time: Pause between a user's turns, in seconds
+
+    Returns:
+        The report dict (see print_report)
+    """
+    import httpx
+    from . import main, storage
+    from .asgi_transport import StreamingASGITransport
+
+    data_dir = tempfile.mkdtemp(prefix="llm-council-loadtest-")
+    original_data_dir = storage.DATA_DIR
+    storage.DATA_DIR = data_dir
+
+    results: List[Dict[str, Any]] = []
+    monitor = ProcessMonitor()
+    try:
+        async with contextlib.AsyncExitStack() as stack:
+            # Each simulated user connects from its own address, so the
+            # admission scheduler treats it as a separate client
+            clients = [
+                await stack.enter_async_context(httpx.AsyncClient(
+                    transport=StreamingASGITransport(main.app, client=(_user_address(user), 50000)),
+                    base_url="http://loadtest", timeout=None
+                ))
+                for user in range(users)
+            ]
+            monitor.start()
+            started = time.monotonic()
+            await asyncio.gather(*[
+                _simulate_user(client, user, turns, endpoint, question, think_time, results)
+                for user, client in enumerate(clients)
+            ])
+            elapsed = time.monotonic() - started
+            # Let memory updates and title refinements finish before teardown
+            await asyncio.gather(*list(main._background_tasks), return_exceptions=True)
+            await monitor.stop()
+    finally:
+        storage.DATA_DIR = original_data_dir
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    completed = [r for r in results if r["error"] is None]
+    latencies = {
+        mode: [r["latency"] for r in completed if r["endpoint"] == mode]
+        for mode in ("message", "stream")
+    }
+    return {
+        "config": {
+            "users": users,
+            "turns_per_user": turns,
+            "endpoint": endpoint,
+            "think_time_seconds": think_time,
+            "fake_cli_settings": {k: v for k, v in sorted(os.environ.items()) if k.startswith("FAKE_")},
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "started_at": datetime.utcnow().isoformat(),
+        "elapsed_seconds": round(elapsed, 3),
+        "turns": {"completed": len(completed), "failed": len(results) - len(completed)},
+        "turns_per_second": round(len(completed) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency_seconds": {
+            "all": summarize_latencies(latencies["message"] + latencies["stream"]),
+            **{mode: summarize_latencies(values) for mode, values in latencies.items() if values},
+        },
+        "first_event_seconds": summarize_latencies(
+            [r["first_event"] for r in completed if r.get("first_event") is not None]
+        ),
+        "stage_seconds": {
+            stage: summarize_latencies([r["stages"][stage] for r in completed if stage in r["stages"]])
+            for stage in STAGES
+        },
+        "errors": sorted({r["error"] for r in results if r["error"]}),
+        **monitor.summary(),
+    }
+
+
+def use_fake_clis(latency: Optional[str] = None, failure_rate: Optional[float] = None,
+                  output_bytes: Optional[int] = None, seed: Optional[int] = None):
+    """
+    Put the stand-in CLIs first in PATH and apply their settings.
+
+    Args:
+        latency: FAKE_CLI_LATENCY spec (e.g. "0.5", "lognormal:2,0.5")
+        failure_rate: Probability that a CLI call fails
+        output_bytes: Size of each answer
+        seed: Seed for reproducible latencies, failures and answers
+    """
+    os.environ["PATH"] = FAKE_CLI_DIR + os.pathsep + os.environ.get("PATH", "")
+    os.environ.setdefault("FAKE_CLI_PYTHON", sys.executable)
+    for name, value in (("LATENCY", latency), ("FAILURE_RATE", failure_rate),
+                        ("OUTPUT_BYTES", output_bytes), ("SEED", seed)):
+        if value is not None:
+            os.environ[f"FAKE_CLI_{name}"] = str(value)
+
+
+def print_report(report: Dict[str, Any]):
+    """Print the load test report."""
+    def row(label, stats, unit="s"):
+        print(f"{label:<14}p50 {stats['p50']}{unit}  p95 {stats['p95']}{unit}  "
+              f"p99 {stats['p99']}{unit}  max {stats['max']}{unit}")
+
+    config = report["config"]
+    print("=" * 60)
+    print(f"Users:        {config['users']} x {config['turns_per_user']} turns ({config['endpoint']})")
+    print(f"Turns:        {report['turns']['completed']} completed, {report['turns']['failed']} failed "
+          f"in {report['elapsed_seconds']}s ({report['turns_per_second']} turns/s)")
+    for mode, stats in report["latency_seconds"].items():
+        row(f"Turn ({mode})", stats)
+    if report["first_event_seconds"]["max"]:
+        row("First event", report["first_event_seconds"])
+    for stage, stats in report["stage_seconds"].items():
+        row(stage.capitalize(), stats)
+    row("Loop lag", report["event_loop_lag_ms"], "ms")
+    if report["open_fds"]:
+        fds = report["open_fds"]
+        print(f"Open fds:     {fds['start']} -> {fds['end']} (peak {fds['peak']})")
+    if report["rss_bytes"]:
+        rss = {k: round(v / 1024 / 1024, 1) for k, v in report["rss_bytes"].items()}
+        print(f"Memory:       {rss['start']} -> {rss['end']} MB "
+              f"(peak {rss['peak']} MB, growth {rss['growth']} MB)")
+    for error in report["errors"]:
+        print(f"Error:        {error}")
+    print("=" * 60)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Register the load test arguments on a parser."""
+    parser.add_argument("--users", type=int, default=4, help="Concurrent simulated users (default: 4)")
+    parser.add_argument("--turns", type=int, default=2, help="Messages per user (default: 2)")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="mixed",
+                        help="Endpoint to drive; 'mixed' alternates them (default: mixed)")
+    parser.add_argument("--question", default=DEFAULT_QUESTION, help="First message of each conversation")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Seconds between a user's turns (default: 0)")
+    parser.add_argument("--output", default=None, help="Save the report as JSON to this file")
+    parser.add_argument("--real-clis", action="store_true",
+                        help="Use the CLIs in PATH instead of the stand-ins")
+    parser.add_argument("--cli-latency", default=None,
+                        help="Stand-in latency, e.g. '1.5', 'uniform:0.5,2', 'lognormal:2,0.5'")
+    parser.add_argument("--failure-rate", type=float, default=None,
+                        help="Probability that a stand-in CLI call fails")
+    parser.add_argument("--output-bytes", type=int, default=None,
+                        help="Size of each stand-in answer in bytes")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the stand-in CLIs")
+
+
+def run(args) -> Dict[str, Any]:
+    """Run the load test described by parsed arguments and report it."""
+    if not args.real_clis:
+        use_fake_clis(args.cli_latency, args.failure_rate, args.output_bytes, args.seed)
+
+    report = asyncio.run(run_load_test(args.users, args.turns, args.endpoint,
+                                       args.question, args.think_time))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.output}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the LLM Council API.")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Inter-process file locks (fcntl on POSIX, msvcrt on Windows)."""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import IO, Optional
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(f: IO, blocking: bool) -> bool:
+        f.seek(0)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+        # LK_LOCK gives up after 10 s: keep retrying
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return True
+            except OSError:
+                time.sleep(0.01)
+
+    def _unlock(f: IO):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(f: IO, blocking: bool) -> bool:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock(f: IO):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _open(path: str) -> IO:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return open(path, "a+b")
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Hold an exclusive lock on `path` (created if missing), waiting for it.
+
+    The lock is held by the open file, so it excludes other processes and
+    other threads alike, and is released if the holder dies.
+    """
+    f = _open(path)
+    try:
+        _lock(f, blocking=True)
+        try:
+            yield
+        finally:
+            _unlock(f)
+    finally:
+        f.close()
+
+
+def try_lock(path: str) -> Optional[IO]:
+    """
+    Take the lock on `path` if it is free.
+
+    Returns:
+        Handle to pass to unlock, or None if someone else holds the lock
+    """
+    f = _open(path)
+    if _lock(f, blocking=False):
+        return f
+    f.close()
+    return None
+
+
+def unlock(handle: IO):
+    """Release a lock taken with try_lock."""
+    try:
+        _unlock(handle)
+    finally:
+        handle.close()
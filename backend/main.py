@@ -1,19 +1,55 @@
 """FastAPI backend for LLM Council."""
 
 import os
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
-from typing import List, Dict, Any
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from starlette.requests import HTTPConnection
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, List, Dict, Any, Optional
 import uuid
 import json
 import asyncio
+from contextlib import aclosing, asynccontextmanager
 
+from . import admission
+from . import answer_cache
+from . import budget
 from . import storage
-from .council import run_full_council, generate_conversation_title, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final, calculate_aggregate_rankings
+from . import metrics
+from . import multiplex
+from . import preflight
+from . import remote
+from . import shared_state
+from . import tracing
+from . import workdirs
+from .config import (
+    ADMISSION_FAIRNESS_KEY,
+    ADMISSION_PRIORITIES,
+    ADMISSION_TRUSTED_PROXIES,
+    API_WORKERS,
+    COUNCIL_MODELS,
+    PREFLIGHT_ON_STARTUP,
+    REQUEST_DEADLINE_SECONDS,
+    SHARED_JOB_TTL_SECONDS,
+    TITLE_LLM_REFINEMENT,
+)
+from .deadline import Deadline
+from .memory import build_context_messages, update_conversation_memory
+from .council import run_full_council, stream_council, generate_conversation_title, generate_local_title
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare the CLIs' scratch directories and check the CLIs before the first request."""
+    await asyncio.to_thread(workdirs.prewarm, COUNCIL_MODELS)
+    # With worker agents the CLIs run (and are checked) on the agents
+    if PREFLIGHT_ON_STARTUP and remote.get_pool() is None:
+        await preflight.run(COUNCIL_MODELS)
+    yield
 
-app = FastAPI(title="LLM Council API")
+
+app = FastAPI(title="LLM Council API", lifespan=lifespan)
 
 # CORS configuration - use environment variable or default to localhost origins
 cors_origins = os.getenv(
@@ -29,6 +65,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Strong references to fire-and-forget tasks (asyncio only keeps weak ones)
+_background_tasks = set()
+
+
+def _run_in_background(coro):
+    """Schedule a coroutine that must not delay the response."""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+async def _exclusive(key: str, start):
+    """
+    Run a background job unless it is already running, here or in another
+    server process (see shared_state.claim_job).
+
+    Args:
+        key: Job identifier
+        start: Function returning the job's coroutine
+
+    Returns:
+        The job's result, or None if it was already running
+    """
+    # The claim is a SQLite transaction that can wait for other processes
+    if not await asyncio.to_thread(shared_state.claim_job, key, SHARED_JOB_TTL_SECONDS):
+        return None
+    try:
+        return await start()
+    finally:
+        await asyncio.to_thread(shared_state.release_job, key)
+
+
+async def _refine_title(conversation_id: str, content: str) -> Optional[str]:
+    """Replace the local title with an LLM-generated one, if it succeeds."""
+    title = await generate_conversation_title(content)
+    if title == "New Conversation":
+        return None
+    try:
+        storage.update_conversation_title(conversation_id, title)
+    except ValueError:
+        # Conversation deleted while the title was being generated
+        return None
+    return title
+
 
 class CreateConversationRequest(BaseModel):
     """Request to create a new conversation."""
@@ -38,6 +119,12 @@ class CreateConversationRequest(BaseModel):
 class SendMessageRequest(BaseModel):
     """Request to send a message in a conversation."""
     content: str
+    # End-to-end budget for the turn; the council degrades to stay within it
+    deadline_seconds: Optional[float] = Field(default=None, gt=0)
+    # Always run the council, even for a near-duplicate of an answered question
+    fresh: bool = False
+    # Admission priority class (ADMISSION_PRIORITIES, default the first)
+    priority: Optional[str] = None
 
 
 class ConversationMetadata(BaseModel):
@@ -56,12 +143,73 @@ class Conversation(BaseModel):
     messages: List[Dict[str, Any]]
 
 
+def _admission_client(connection: HTTPConnection, conversation_id: str, request: SendMessageRequest) -> str:
+    """
+    Fairness key of a council run (see admission.py), after checking its
+    priority class. Clients are keyed on their address; only a trusted
+    proxy (ADMISSION_TRUSTED_PROXIES) may name the client behind it with
+    the X-Client-Id header or the client_id query parameter.
+    """
+    if request.priority is not None and request.priority not in ADMISSION_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown priority: {request.priority}")
+    if ADMISSION_FAIRNESS_KEY == "conversation":
+        return conversation_id
+    address = connection.client.host if connection.client else "unknown"
+    if address in ADMISSION_TRUSTED_PROXIES:
+        client_id = connection.headers.get("x-client-id") or connection.query_params.get("client_id")
+        if client_id:
+            return client_id
+    return address
+
+
 @app.get("/")
 async def root():
     """Health check endpoint."""
     return {"status": "ok", "service": "LLM Council API"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Metrics in Prometheus text exposition format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health")
+async def get_health():
+    """
+    Readiness of the council: the startup preflight of the CLIs, or the
+    health of the worker agents when the CLIs run on them.
+    """
+    pool = remote.get_pool()
+    if pool is None:
+        return preflight.get_report()
+    await pool.refresh()
+    workers = pool.status()
+    return {"status": "ok" if all(w["healthy"] for w in workers) else "degraded", "workers": workers}
+
+
+@app.get("/api/workers")
+async def get_workers():
+    """Health and capacity of the CLI worker agents (empty when the CLIs run here)."""
+    pool = remote.get_pool()
+    if pool is None:
+        return []
+    await pool.refresh()
+    return pool.status()
+
+
+@app.get("/api/admission")
+async def get_admission():
+    """Council runs admitted and waiting for a slot."""
+    return admission.get_scheduler().status()
+
+
+@app.get("/api/usage")
+async def get_usage():
+    """Today's token and cost usage next to the configured budgets."""
+    return budget.usage_report()
+
+
 @app.get("/api/conversations", response_model=List[ConversationMetadata])
 async def list_conversations():
     """List all conversations (metadata only)."""
@@ -86,33 +234,171 @@ async def get_conversation(conversation_id: str):
 
 
 @app.post("/api/conversations/{conversation_id}/message")
-async def send_message(conversation_id: str, request: SendMessageRequest):
+async def send_message(conversation_id: str, request: SendMessageRequest, http_request: Request):
     """
     Send a message and run the 3-stage council process.
     Returns the complete response with all stages.
     """
-    # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
-    if conversation is None:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    deadline = Deadline(REQUEST_DEADLINE_SECONDS if request.deadline_seconds is None else request.deadline_seconds)
+    client = _admission_client(http_request, conversation_id, request)
+
+    with tracing.span("council.request", endpoint="message", conversation_id=conversation_id):
+        # Check if conversation exists
+        conversation = storage.get_conversation(conversation_id)
+        if conversation is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+
+        # Check if this is the first message
+        is_first_message = len(conversation["messages"]) == 0
+
+        # Context from previous turns (rolling summary + recent tail)
+        history = build_context_messages(conversation)
+
+        # Add user message
+        storage.add_user_message(conversation_id, request.content)
+
+        # If this is the first message, title it locally (no LLM call)
+        if is_first_message:
+            storage.update_conversation_title(conversation_id, generate_local_title(request.content))
+            if TITLE_LLM_REFINEMENT:
+                _run_in_background(_refine_title(conversation_id, request.content))
+
+        # A conversation opening with an answered question can reuse its answer
+        match = None
+        if is_first_message and not request.fresh:
+            match = answer_cache.lookup(request.content)
+
+        if match is not None and match["hit"]:
+            stage1_results, stage2_results = [], []
+            stage3_result = answer_cache.cached_result(match)
+            metadata = {"cache": answer_cache.match_metadata(match)}
+        else:
+            # Run the 3-stage council process once admitted, on a cheaper plan near the budgets
+            async with admission.get_scheduler().admit(client, request.priority) as ticket:
+                stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
+                    request.content,
+                    history,
+                    deadline=deadline,
+                    plan=budget.plan_turn(conversation)
+                )
+            budget.record_turn(conversation_id, metadata.get("usage"))
+            metadata["admission"] = admission.ticket_metadata(ticket)
+            if match is not None:
+                metadata["cache"] = answer_cache.match_metadata(match)
+
+        # Add assistant message with all stages
+        storage.add_assistant_message(
+            conversation_id,
+            stage1_results,
+            stage2_results,
+            stage3_result
+        )
+
+        # Index the question (the answer to a first turn is the second message)
+        if is_first_message and answer_cache.is_cacheable(stage3_result):
+            answer_cache.remember(conversation_id, request.content, 1)
+
+        # Fold old turns into the rolling summary without delaying the response
+        _run_in_background(_exclusive(
+            f"memory:{conversation_id}", lambda: update_conversation_memory(conversation_id)
+        ))
+
+        # Return the complete response with metadata
+        return {
+            "stage1": stage1_results,
+            "stage2": stage2_results,
+            "stage3": stage3_result,
+            "metadata": metadata
+        }
+
+
+async def _council_turn(
+    conversation_id: str,
+    conversation: Dict[str, Any],
+    request: SendMessageRequest,
+    client: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run one streamed turn: save the message, run the council (or reuse a
+    cached answer) once admitted, save the answer.
+
+    Yields:
+        The turn's events, as sent on the SSE stream and the WebSocket
+    """
+    deadline = Deadline(REQUEST_DEADLINE_SECONDS if request.deadline_seconds is None else request.deadline_seconds)
 
     # Check if this is the first message
     is_first_message = len(conversation["messages"]) == 0
 
+    # Context from previous turns (rolling summary + recent tail)
+    history = build_context_messages(conversation)
+
+    # Cheaper council plan when the conversation or the day nears its budget
+    plan = budget.plan_turn(conversation)
+
+    # A conversation opening with an answered question can reuse its answer
+    match = None
+    if is_first_message and not request.fresh:
+        match = answer_cache.lookup(request.content)
+
     # Add user message
     storage.add_user_message(conversation_id, request.content)
 
-    # If this is the first message, generate a title
+    # Title the conversation locally right away; the optional LLM
+    # refinement runs alongside and never delays the council
+    title_task = None
     if is_first_message:
-        title = await generate_conversation_title(request.content)
+        title = generate_local_title(request.content)
         storage.update_conversation_title(conversation_id, title)
-
-    # Run the 3-stage council process
-    stage1_results, stage2_results, stage3_result, metadata = await run_full_council(
-        request.content
-    )
-
-    # Add assistant message with all stages
+        yield {'type': 'title_complete', 'data': {'title': title}}
+        if TITLE_LLM_REFINEMENT:
+            title_task = _run_in_background(_refine_title(conversation_id, request.content))
+
+    stage1_results, stage2_results, stage3_result = [], [], {}
+    if match is not None and match["hit"]:
+        # Reply with the stored answer instead of running the council
+        stage3_result = answer_cache.cached_result(match)
+        yield {'type': 'stage3_start'}
+        yield {'type': 'stage3_complete', 'data': stage3_result,
+               'metadata': {'cache': answer_cache.match_metadata(match)}}
+    else:
+        if match is not None:
+            # Show the stored answer while the council runs
+            yield {'type': 'cache_match', 'data': match['stage3'],
+                   'metadata': answer_cache.match_metadata(match)}
+
+        scheduler = admission.get_scheduler()
+        ticket = scheduler.enqueue(client, request.priority)
+        try:
+            # Report the queue position while the run waits for a slot
+            queued = False
+            async for position in scheduler.positions(ticket):
+                queued = True
+                yield {'type': 'queued', 'position': position}
+            if queued:
+                yield {'type': 'admitted', 'metadata': admission.ticket_metadata(ticket)}
+
+            # Run the council, forwarding each stage event as it happens
+            async for event in stream_council(request.content, history, deadline=deadline, plan=plan):
+                if event["type"] == "stage1_complete":
+                    stage1_results = event["data"]
+                elif event["type"] == "stage2_complete":
+                    stage2_results = event["data"]
+                elif event["type"] == "stage3_complete":
+                    stage3_result = event["data"]
+                    budget.record_turn(conversation_id, event.get("metadata", {}).get("usage"))
+                yield event
+        finally:
+            scheduler.release(ticket)
+
+    # Announce the refined title if it is already there (otherwise it
+    # finishes in the background and only updates storage); a failed
+    # refinement must not cost the turn its answer
+    if (title_task and title_task.done() and not title_task.cancelled()
+            and title_task.exception() is None and title_task.result()):
+        yield {'type': 'title_complete', 'data': {'title': title_task.result()}}
+
+    # Save complete assistant message
     storage.add_assistant_message(
         conversation_id,
         stage1_results,
@@ -120,75 +406,66 @@ async def send_message(conversation_id: str, request: SendMessageRequest):
         stage3_result
     )
 
-    # Return the complete response with metadata
-    return {
-        "stage1": stage1_results,
-        "stage2": stage2_results,
-        "stage3": stage3_result,
-        "metadata": metadata
-    }
+    # Index the question (the answer to a first turn is the second message)
+    if is_first_message and answer_cache.is_cacheable(stage3_result):
+        answer_cache.remember(conversation_id, request.content, 1)
+
+    # Fold old turns into the rolling summary after the turn is saved
+    _run_in_background(_exclusive(
+        f"memory:{conversation_id}", lambda: update_conversation_memory(conversation_id)
+    ))
+
+    # Send completion event
+    yield {'type': 'complete'}
+
+
+async def _turn_events(
+    conversation_id: str,
+    conversation: Dict[str, Any],
+    request: SendMessageRequest,
+    client: str,
+    turn_id: Optional[str] = None,
+    source: Optional["multiplex.CouncilConnection"] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    A streamed turn's events, also published to the WebSocket subscribers
+    of the conversation (except `source`, the socket running the turn).
+    """
+    turn_id = turn_id or str(uuid.uuid4())
+    async with aclosing(_council_turn(conversation_id, conversation, request, client)) as events:
+        async for event in events:
+            multiplex.publish(conversation_id, turn_id, event, source)
+            yield event
 
 
 @app.post("/api/conversations/{conversation_id}/message/stream")
-async def send_message_stream(conversation_id: str, request: SendMessageRequest):
+async def send_message_stream(conversation_id: str, request: SendMessageRequest, http_request: Request):
     """
     Send a message and stream the 3-stage council process.
     Returns Server-Sent Events as each stage completes.
     """
+    client = _admission_client(http_request, conversation_id, request)
+
     # Check if conversation exists
     conversation = storage.get_conversation(conversation_id)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    # Check if this is the first message
-    is_first_message = len(conversation["messages"]) == 0
-
     async def event_generator():
+        metrics.SSE_CONNECTIONS.inc()
         try:
-            # Add user message
-            storage.add_user_message(conversation_id, request.content)
-
-            # Start title generation in parallel (don't await yet)
-            title_task = None
-            if is_first_message:
-                title_task = asyncio.create_task(generate_conversation_title(request.content))
-
-            # Stage 1: Collect responses
-            yield f"data: {json.dumps({'type': 'stage1_start'})}\n\n"
-            stage1_results = await stage1_collect_responses(request.content)
-            yield f"data: {json.dumps({'type': 'stage1_complete', 'data': stage1_results})}\n\n"
-
-            # Stage 2: Collect rankings
-            yield f"data: {json.dumps({'type': 'stage2_start'})}\n\n"
-            stage2_results, label_to_model = await stage2_collect_rankings(request.content, stage1_results)
-            aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
-            yield f"data: {json.dumps({'type': 'stage2_complete', 'data': stage2_results, 'metadata': {'label_to_model': label_to_model, 'aggregate_rankings': aggregate_rankings}})}\n\n"
-
-            # Stage 3: Synthesize final answer
-            yield f"data: {json.dumps({'type': 'stage3_start'})}\n\n"
-            stage3_result = await stage3_synthesize_final(request.content, stage1_results, stage2_results)
-            yield f"data: {json.dumps({'type': 'stage3_complete', 'data': stage3_result})}\n\n"
-
-            # Wait for title generation if it was started
-            if title_task:
-                title = await title_task
-                storage.update_conversation_title(conversation_id, title)
-                yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
-
-            # Save complete assistant message
-            storage.add_assistant_message(
-                conversation_id,
-                stage1_results,
-                stage2_results,
-                stage3_result
-            )
-
-            # Send completion event
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            with tracing.span("council.request", activate=False, endpoint="message/stream",
+                              conversation_id=conversation_id) as request_span:
+                turn = _turn_events(conversation_id, conversation, request, client)
+                async with aclosing(tracing.iterate(request_span, turn)) as events:
+                    async for event in events:
+                        yield f"data: {json.dumps(event)}\n\n"
 
         except Exception as e:
             # Send error event
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+        finally:
+            metrics.SSE_CONNECTIONS.dec()
 
     return StreamingResponse(
         event_generator(),
@@ -200,7 +477,63 @@ async def send_message_stream(conversation_id: str, request: SendMessageRequest)
     )
 
 
-if __name__ == "__main__":
+def _socket_turn(websocket: WebSocket, message: Dict[str, Any], source: "multiplex.CouncilConnection"):
+    """
+    Start a turn requested on the WebSocket (a "run" message: the
+    conversation_id plus the fields of SendMessageRequest).
+
+    Raises:
+        HTTPException: If the conversation does not exist or the priority
+            class is unknown
+        ValidationError: If the message fields are invalid
+    """
+    conversation_id = message.get("conversation_id")
+    request = SendMessageRequest(**{
+        field: message[field] for field in SendMessageRequest.model_fields if field in message
+    })
+    client = _admission_client(websocket, conversation_id, request)
+    conversation = storage.get_conversation(conversation_id) if conversation_id else None
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return _turn_events(conversation_id, conversation, request, client, message.get("turn"), source)
+
+
+@app.websocket("/api/ws")
+async def council_socket(websocket: WebSocket):
+    """Several council turns, and subscriptions to conversations, over one WebSocket (see multiplex.py)."""
+    # Browsers do not apply CORS to WebSockets: without this check any page
+    # the user opens could run turns on the local CLIs. Clients that are not
+    # browsers send no Origin and are let through, as for the HTTP endpoints
+    origin = websocket.headers.get("origin")
+    if origin is not None and origin not in cors_origins and "*" not in cors_origins:
+        await websocket.close(code=1008)
+        return
+    with tracing.span("council.request", endpoint="ws"):
+        await multiplex.CouncilConnection(websocket, _socket_turn).serve()
+
+
+def serve(host: str = "0.0.0.0", port: int = None, workers: int = None):
+    """
+    Run the API server with uvicorn.
+
+    Args:
+        host: Interface to listen on
+        port: Port (default: $PORT or 8001)
+        workers: Server processes (default: API_WORKERS); with more than
+            one, the processes share state through shared_state.py
+    """
     import uvicorn
-    port = int(os.getenv("PORT", "8001"))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    if port is None:
+        port = int(os.getenv("PORT", "8001"))
+    workers = workers or API_WORKERS
+    if workers > 1:
+        # The worker processes import the app themselves and read the
+        # worker count from the environment (config.API_WORKERS)
+        os.environ["LLM_COUNCIL_WORKERS"] = str(workers)
+        uvicorn.run("backend.main:app", host=host, port=port, workers=workers)
+    else:
+        uvicorn.run(app, host=host, port=port)
+
+
+if __name__ == "__main__":
+    serve()
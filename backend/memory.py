@@ -0,0 +1,153 @@
+"""Rolling conversation memory for multi-turn council context."""
+
+from typing import List, Dict, Any, Optional
+from . import storage
+from .cli_bridge import query_model
+from .config import (
+    MEMORY_MODEL,
+    MEMORY_TAIL_THRESHOLD_CHARS,
+    MEMORY_KEEP_RECENT_MESSAGES,
+    MEMORY_SUMMARY_MAX_CHARS,
+)
+
+
+def message_text(message: Dict[str, Any]) -> str:
+    """
+    Extract the text that represents a stored message in the memory.
+
+    User messages contribute their content, assistant messages only the
+    chairman's final answer (Stage 1/2 details are not carried forward).
+    """
+    if message.get("role") == "assistant":
+        stage3 = message.get("stage3") or {}
+        return stage3.get("response", "")
+    return message.get("content", "")
+
+
+def get_memory_tail(conversation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the messages not yet folded into the rolling summary."""
+    memory = conversation.get("memory") or {}
+    return conversation["messages"][memory.get("summarized_count", 0):]
+
+
+def tail_size(messages: List[Dict[str, Any]]) -> int:
+    """Total characters of the given messages, as seen by the memory."""
+    return sum(len(message_text(m)) for m in messages)
+
+
+def build_context_messages(conversation: Dict[str, Any]) -> List[Dict[str, str]]:
+    """
+    Build the context messages to prepend to a new Stage 1 query.
+
+    The context is the rolling summary (as a system message) followed by the
+    unsummarised tail, so its size stays bounded by the summary limit plus
+    the re-summarisation threshold.
+
+    Args:
+        conversation: Conversation dict as loaded from storage
+
+    Returns:
+        List of messages with 'role' and 'content'
+    """
+    context = []
+
+    summary = (conversation.get("memory") or {}).get("summary", "")
+    if summary:
+        context.append({
+            "role": "system",
+            "content": f"Summary of the conversation so far:\n{summary}"
+        })
+
+    for message in get_memory_tail(conversation):
+        text = message_text(message)
+        if text:
+            context.append({"role": message.get("role", "user"), "content": text})
+
+    return context
+
+
+async def summarize_messages(
+    previous_summary: str,
+    messages: List[Dict[str, Any]]
+) -> Optional[str]:
+    """
+    Fold messages into the previous summary with a single LLM call.
+
+    Args:
+        previous_summary: Current rolling summary (may be empty)
+        messages: Messages to fold into the summary
+
+    Returns:
+        The new summary, or None if the model failed
+    """
+    transcript = "\n\n".join([
+        f"{'User' if m.get('role') == 'user' else 'Council'}: {message_text(m)}"
+        for m in messages
+    ])
+
+    summary_prompt = f"""You maintain the running memory of a conversation between a user and an LLM Council.
+Update the existing summary with the new exchanges below. Keep facts, decisions, constraints and open questions the user may refer back to. Drop pleasantries and repetition.
+Answer with the updated summary only, in at most {MEMORY_SUMMARY_MAX_CHARS} characters.
+
+Existing summary:
+{previous_summary or "(empty)"}
+
+New exchanges:
+{transcript}
+
+Updated summary:"""
+
+    messages = [{"role": "user", "content": summary_prompt}]
+    response = await query_model(MEMORY_MODEL, messages, timeout=60.0)
+
+    if response is None:
+        return None
+
+    summary = response.get('content', '').strip()
+    if not summary:
+        return None
+
+    # Enforce the limit even if the model ignores it
+    if len(summary) > MEMORY_SUMMARY_MAX_CHARS:
+        summary = summary[:MEMORY_SUMMARY_MAX_CHARS - 3] + "..."
+
+    return summary
+
+
+async def update_conversation_memory(conversation_id: str) -> bool:
+    """
+    Incrementally update the rolling summary after a turn.
+
+    Only summarises when the unsummarised tail exceeds the configured
+    threshold; the most recent messages always stay verbatim.
+
+    Args:
+        conversation_id: Conversation identifier
+
+    Returns:
+        True if the summary was updated
+    """
+    conversation = storage.get_conversation(conversation_id)
+    if conversation is None:
+        return False
+
+    tail = get_memory_tail(conversation)
+    if tail_size(tail) <= MEMORY_TAIL_THRESHOLD_CHARS:
+        return False
+
+    to_fold = tail[:max(len(tail) - MEMORY_KEEP_RECENT_MESSAGES, 0)]
+    if not to_fold:
+        return False
+
+    memory = conversation.get("memory") or {}
+    summary = await summarize_messages(memory.get("summary", ""), to_fold)
+    if summary is None:
+        # Keep the raw tail; we'll retry after the next turn
+        return False
+
+    storage.update_conversation_memory(
+        conversation_id,
+        summary,
+        memory.get("summarized_count", 0) + len(to_fold)
+    )
+    return True
@@ -0,0 +1,276 @@
+"""In-process metrics with Prometheus text exposition.
+
+A deliberately small registry (counters, gauges, histograms with labels)
+so the hot path costs a dict lookup and a lock, with no extra dependency.
+The API serves `render()` at /metrics.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Sequence, Optional
+
+# Default buckets for CLI and stage durations (seconds)
+DURATION_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+
+# Buckets for fast local operations such as storage I/O (seconds)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+# Buckets for process memory (bytes): 64 MB to 4 GB
+MEMORY_BUCKETS = tuple(2 ** power * 1024 * 1024 for power in range(6, 13))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base class: a named family of samples keyed by label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ] + self._samples()
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Increment for the duration of a block (in-flight work)."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of a block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def get_count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {repr(float(total))}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# =============================================================================
+# Council metrics
+# =============================================================================
+
+CLI_CALL_DURATION = REGISTRY.register(Histogram(
+    "llm_council_cli_call_duration_seconds",
+    "Wall time of CLI subprocess calls.",
+    ["cli"]
+))
+
+CLI_CALLS = REGISTRY.register(Counter(
+    "llm_council_cli_calls_total",
+    "CLI calls by outcome (success, timeout, error).",
+    ["cli", "outcome"]
+))
+
+CLI_IN_FLIGHT = REGISTRY.register(Gauge(
+    "llm_council_cli_in_flight",
+    "CLI subprocesses currently running.",
+    ["cli"]
+))
+
+CLI_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "llm_council_cli_queue_depth",
+    "Calls waiting for a free CLI concurrency slot.",
+    ["cli"]
+))
+
+CLI_CPU_SECONDS = REGISTRY.register(Counter(
+    "llm_council_cli_cpu_seconds_total",
+    "CPU time used by CLI processes, by mode (user, system).",
+    ["cli", "mode"]
+))
+
+CLI_PEAK_RSS = REGISTRY.register(Histogram(
+    "llm_council_cli_peak_rss_bytes",
+    "Peak resident memory of the largest process of each CLI call.",
+    ["cli"],
+    buckets=MEMORY_BUCKETS
+))
+
+CLI_BLOCK_IO = REGISTRY.register(Counter(
+    "llm_council_cli_block_io_operations_total",
+    "Block I/O operations of CLI processes, by direction (in, out).",
+    ["cli", "direction"]
+))
+
+CLI_TOKENS = REGISTRY.register(Counter(
+    "llm_council_cli_tokens_total",
+    "Tokens reported by the CLIs, by kind (input, cached_input, output).",
+    ["cli", "kind"]
+))
+
+CLI_COST = REGISTRY.register(Counter(
+    "llm_council_cli_cost_usd_total",
+    "Cost in USD reported by the CLIs (where they report it).",
+    ["cli"]
+))
+
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "llm_council_stage_duration_seconds",
+    "Wall time of each council stage.",
+    ["stage"]
+))
+
+STORAGE_DURATION = REGISTRY.register(Histogram(
+    "llm_council_storage_operation_seconds",
+    "Latency of conversation storage operations.",
+    ["operation"],
+    buckets=FAST_BUCKETS
+))
+
+ADMISSION_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "llm_council_admission_queue_depth",
+    "Requests waiting for a council run slot, by priority class.",
+    ["priority"]
+))
+
+ADMISSION_WAIT = REGISTRY.register(Histogram(
+    "llm_council_admission_wait_seconds",
+    "Time requests waited in the admission queue, by priority class.",
+    ["priority"]
+))
+
+SSE_CONNECTIONS = REGISTRY.register(Gauge(
+    "llm_council_sse_connections",
+    "Open Server-Sent Events streams."
+))
+
+
+def render() -> str:
+    """Render every registered metric in Prometheus text format."""
+    return REGISTRY.render()
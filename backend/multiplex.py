@@ -0,0 +1,214 @@
+"""Several council turns over one WebSocket connection (GET /api/ws).
+
+Every frame is one compact JSON object. The client sends:
+
+    {"op": "run", "turn": "t1", "conversation_id": "...", "content": "..."}
+        start a turn (optional fields as in POST /message/stream:
+        deadline_seconds, fresh, priority); "turn" is chosen by the client
+        and tags the turn's events
+    {"op": "cancel", "turn": "t1"}
+        stop a turn; its CLI processes are killed
+    {"op": "subscribe", "conversation_id": "..."}
+    {"op": "unsubscribe", "conversation_id": "..."}
+        follow the turns of a conversation run by other connections or
+        over SSE
+    {"op": "ping"}
+
+The server sends each event of the SSE stream with the turn and the
+conversation it belongs to ({"turn": "t1", "conversation_id": "...",
+"type": "stage1_complete", ...}), plus {"type": "cancelled"} for a cancelled
+turn, {"type": "error", "message": ...} and {"type": "pong"}.
+
+Binary frames are answered with an error. A client that does not read its
+frames fast enough (OUTBOX_MAX_FRAMES behind) is disconnected with close
+code 1013 rather than buffered without limit.
+"""
+
+import asyncio
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+
+# Frames queued for one connection at most
+OUTBOX_MAX_FRAMES = 1000
+
+# Close code for a connection dropped for falling behind ("try again later")
+_CLOSE_TOO_SLOW = 1013
+
+# Connections subscribed to each conversation
+_subscribers: Dict[str, Set["CouncilConnection"]] = {}
+
+
+def encode(frame: Dict[str, Any]) -> str:
+    """A frame as compact JSON."""
+    return json.dumps(frame, separators=(",", ":"))
+
+
+def subscribe(conversation_id: str, connection: "CouncilConnection"):
+    """Send the events of a conversation's turns to `connection`."""
+    _subscribers.setdefault(conversation_id, set()).add(connection)
+
+
+def unsubscribe(conversation_id: str, connection: "CouncilConnection"):
+    """Stop sending a conversation's events to `connection`."""
+    connections = _subscribers.get(conversation_id)
+    if connections is not None:
+        connections.discard(connection)
+        if not connections:
+            del _subscribers[conversation_id]
+
+
+def publish(
+    conversation_id: str,
+    turn_id: str,
+    event: Dict[str, Any],
+    source: Optional["CouncilConnection"] = None
+):
+    """
+    Send a turn event to the conversation's subscribers.
+
+    Args:
+        conversation_id: Conversation of the turn
+        turn_id: Turn the event belongs to
+        event: The event
+        source: Connection running the turn, which already gets the event
+    """
+    connections = _subscribers.get(conversation_id)
+    if not connections:
+        return
+    frame = {"turn": turn_id, "conversation_id": conversation_id, **event}
+    # A subscriber that falls behind unsubscribes itself while we iterate
+    for connection in list(connections):
+        if connection is not source:
+            connection.send(frame)
+
+
+class CouncilConnection:
+    """
+    One WebSocket carrying any number of concurrent turns.
+
+    Each turn runs in its own task and its events go through a single
+    bounded outbox, written to the socket by one writer task. Closing the
+    socket cancels the connection's turns.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        start_turn: Callable[[WebSocket, Dict[str, Any], "CouncilConnection"], AsyncIterator[Dict[str, Any]]]
+    ):
+        """
+        Args:
+            websocket: The about-to-be-accepted socket
+            start_turn: Validates a "run" message and returns the turn's
+                events (see main._socket_turn)
+        """
+        self.websocket = websocket
+        self.start_turn = start_turn
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=OUTBOX_MAX_FRAMES)
+        self.turns: Dict[str, asyncio.Task] = {}
+        self.subscriptions: Set[str] = set()
+        self.overflowed = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def serve(self):
+        """Handle the connection until the client closes it (or falls behind)."""
+        self._task = asyncio.current_task()
+        await self.websocket.accept()
+        writer = asyncio.create_task(self._write())
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text") is None:
+                    self.send({"type": "error", "message": "binary frames are not supported, send JSON text"})
+                    continue
+                try:
+                    parsed = json.loads(message["text"])
+                except ValueError:
+                    parsed = None
+                if not isinstance(parsed, dict):
+                    self.send({"type": "error", "message": "frames must be JSON objects"})
+                    continue
+                self.handle(parsed)
+        except asyncio.CancelledError:
+            if not self.overflowed:
+                raise
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in self.turns.values():
+                task.cancel()
+            await asyncio.gather(*self.turns.values(), return_exceptions=True)
+            for conversation_id in self.subscriptions:
+                unsubscribe(conversation_id, self)
+            writer.cancel()
+        if self.overflowed:
+            try:
+                await self.websocket.close(code=_CLOSE_TOO_SLOW)
+            except RuntimeError:
+                pass
+
+    def send(self, frame: Dict[str, Any]):
+        """Queue a frame for the client; a client too far behind is dropped."""
+        if self.overflowed:
+            return
+        try:
+            self.outbox.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            for conversation_id in self.subscriptions:
+                unsubscribe(conversation_id, self)
+            if self._task is not None:
+                self._task.cancel()
+
+    async def _write(self):
+        while True:
+            frame = await self.outbox.get()
+            try:
+                await self.websocket.send_text(encode(frame))
+            except (WebSocketDisconnect, RuntimeError):
+                return
+
+    def handle(self, message: Dict[str, Any]):
+        """Act on one client message."""
+        op = message.get("op")
+        if op == "run":
+            turn_id = message.get("turn")
+            if not turn_id or turn_id in self.turns:
+                self.send({"type": "error", "turn": turn_id,
+                           "message": "'run' needs a 'turn' id not already in use"})
+                return
+            self.turns[turn_id] = asyncio.create_task(self._run(turn_id, message))
+        elif op == "cancel":
+            task = self.turns.get(message.get("turn"))
+            if task is not None:
+                task.cancel()
+        elif op == "subscribe" and message.get("conversation_id"):
+            self.subscriptions.add(message["conversation_id"])
+            subscribe(message["conversation_id"], self)
+        elif op == "unsubscribe" and message.get("conversation_id"):
+            self.subscriptions.discard(message["conversation_id"])
+            unsubscribe(message["conversation_id"], self)
+        elif op == "ping":
+            self.send({"type": "pong"})
+        else:
+            self.send({"type": "error", "message": f"Unknown or incomplete op: {op!r}"})
+
+    async def _run(self, turn_id: str, message: Dict[str, Any]):
+        """Run one turn, forwarding its events."""
+        tags = {"turn": turn_id, "conversation_id": message.get("conversation_id")}
+        try:
+            async with aclosing(self.start_turn(self.websocket, message, self)) as events:
+                async for event in events:
+                    self.send({**tags, **event})
+        except asyncio.CancelledError:
+            self.send({**tags, "type": "cancelled"})
+        except HTTPException as e:
+            self.send({**tags, "type": "error", "message": e.detail})
+        except Exception as e:
+            self.send({**tags, "type": "error", "message": str(e)})
+        finally:
+            self.turns.pop(turn_id, None)
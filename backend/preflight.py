@@ -0,0 +1,139 @@
+"""Startup checks of the CLIs the council depends on.
+
+A CLI that is missing or logged out would otherwise only show up as a
+failed first user request, and the first call to each CLI is the slowest
+(cold disk cache, credential refresh). At startup the server resolves each
+CLI, runs `<cli> --version`, looks for its credentials and, with
+PREFLIGHT_WARMUP, sends it one short prompt. The results are served on
+GET /health.
+"""
+
+import asyncio
+import os
+import subprocess
+import time
+from typing import List, Dict, Any, Optional
+from . import cli_bridge
+from .config import PREFLIGHT_TIMEOUT_SECONDS, PREFLIGHT_WARMUP, PREFLIGHT_WARMUP_PROMPT
+
+# Where each CLI keeps its login, and the environment variables that
+# replace it. Claude Code on macOS keeps its login in the keychain, so
+# credentials not found here are reported as unknown rather than missing.
+CREDENTIALS = {
+    "gemini": {"files": ["~/.gemini/oauth_creds.json"], "env": ["GEMINI_API_KEY", "GOOGLE_API_KEY"]},
+    "codex": {"files": ["~/.codex/auth.json"], "env": ["OPENAI_API_KEY", "CODEX_API_KEY"]},
+    "claude": {"files": ["~/.claude/.credentials.json"], "env": ["ANTHROPIC_API_KEY"]},
+}
+
+_report: Dict[str, Any] = {"status": "starting", "clis": {}}
+
+
+def find_credentials(cli_type: str) -> Optional[str]:
+    """
+    Where a CLI's credentials come from.
+
+    Returns:
+        The environment variable or file holding them, or None if neither
+        is found
+    """
+    spec = CREDENTIALS.get(cli_type, {})
+    for name in spec.get("env", []):
+        if os.environ.get(name):
+            return f"${name}"
+    for path in spec.get("files", []):
+        if os.path.exists(os.path.expanduser(path)):
+            return path
+    return None
+
+
+def _version(path: str, timeout: float) -> Dict[str, Any]:
+    """Run `<cli> --version` and return its first output line."""
+    try:
+        result = subprocess.run(
+            [path, "--version"], capture_output=True, text=True, timeout=timeout,
+            stdin=subprocess.DEVNULL
+        )
+    except subprocess.TimeoutExpired:
+        return {"ok": False, "error": f"--version timed out after {timeout:.0f}s"}
+    except OSError as e:
+        return {"ok": False, "error": str(e)}
+    output = (result.stdout or result.stderr or "").strip()
+    line = output.splitlines()[0] if output else None
+    if result.returncode != 0:
+        return {"ok": False, "error": line or f"exit code {result.returncode}"}
+    return {"ok": True, "version": line}
+
+
+async def check_cli(cli_type: str, warmup: bool = PREFLIGHT_WARMUP) -> Dict[str, Any]:
+    """
+    Check one CLI.
+
+    Args:
+        cli_type: CLI to check
+        warmup: Also send it PREFLIGHT_WARMUP_PROMPT
+
+    Returns:
+        Dict with 'path' (None if not installed), 'version', 'credentials',
+        'ready' and, when warming up, 'warmup' (outcome and duration);
+        'error' says why a CLI is not ready
+    """
+    path = cli_bridge._find_cli_path(cli_type)
+    result = {"path": path, "version": None, "credentials": find_credentials(cli_type), "ready": False}
+    if path is None:
+        result["error"] = "not found in PATH"
+        return result
+
+    version = await asyncio.to_thread(_version, path, PREFLIGHT_TIMEOUT_SECONDS)
+    result["version"] = version.get("version")
+    if not version["ok"]:
+        result["error"] = version["error"]
+        return result
+    result["ready"] = True
+
+    if warmup:
+        response = await cli_bridge.query_model(
+            cli_type, [{"role": "user", "content": PREFLIGHT_WARMUP_PROMPT}],
+            timeout=PREFLIGHT_TIMEOUT_SECONDS, local=True
+        )
+        result["warmup"] = {
+            "success": response is not None,
+            "seconds": round(response["timing"]["total_seconds"], 3) if response else None
+        }
+        if response is None:
+            # The CLI runs but cannot answer: usually a logged-out CLI
+            result["ready"] = False
+            result["error"] = "warm-up prompt failed (logged out or over quota?)"
+    return result
+
+
+async def run(cli_types: List[str], warmup: bool = PREFLIGHT_WARMUP) -> Dict[str, Any]:
+    """
+    Check every CLI in parallel and keep the report for get_report.
+
+    Args:
+        cli_types: CLIs to check (e.g. COUNCIL_MODELS)
+        warmup: Also send each CLI PREFLIGHT_WARMUP_PROMPT
+
+    Returns:
+        The report: overall 'status' ("ok" if every CLI is ready,
+        "degraded" otherwise), 'clis' and 'checked_at'
+    """
+    cli_types = list(dict.fromkeys(cli_bridge.determine_cli(model) for model in cli_types))
+    results = await asyncio.gather(*(check_cli(cli, warmup) for cli in cli_types))
+    clis = dict(zip(cli_types, results))
+    for cli, result in clis.items():
+        if not result["ready"]:
+            print(f"Preflight: {cli} CLI not ready: {result['error']}")
+
+    _report.clear()
+    _report.update({
+        "status": "ok" if all(r["ready"] for r in results) else "degraded",
+        "clis": clis,
+        "checked_at": time.time()
+    })
+    return get_report()
+
+
+def get_report() -> Dict[str, Any]:
+    """The last preflight report ("starting" until the first one finishes)."""
+    return {**_report, "clis": dict(_report["clis"])}
@@ -0,0 +1,276 @@
+"""Client side of the CLI worker agents: load balancing, health and capacity."""
+
+import asyncio
+import time
+from typing import List, Dict, Any, Optional, Tuple
+import httpx
+from .config import CLI_WORKERS, CLI_WORKER_TOKEN, WORKER_HEALTH_INTERVAL_SECONDS
+
+# Extra seconds allowed for the HTTP round trip on top of the CLI timeout
+_NETWORK_SLACK_SECONDS = 10.0
+
+
+class RemoteWorker:
+    """One worker agent, with its last reported health and capacity."""
+
+    def __init__(
+        self,
+        url: str,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        token: Optional[str] = CLI_WORKER_TOKEN
+    ):
+        """
+        Args:
+            url: "http://host:port", or "unix:/path/to.sock" for an agent
+                listening on a Unix socket
+            transport: Custom httpx transport (tests run agents in-process)
+            token: Shared secret sent to the agent (see CLI_WORKER_TOKEN)
+        """
+        self.url = url
+        self._headers = {"Authorization": f"Bearer {token}"} if token else {}
+        if transport is None and url.startswith("unix:"):
+            transport = httpx.AsyncHTTPTransport(uds=url[len("unix:"):])
+        self._transport = transport
+        self._base_url = "http://worker" if url.startswith("unix:") else url.rstrip("/")
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self.healthy = False
+        self.checked_at: Optional[float] = None
+        self.name = url
+        self.capacity: Dict[str, int] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.error: Optional[str] = None
+
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client bound to the current event loop (recreated if it changes)."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(transport=self._transport, base_url=self._base_url,
+                                             headers=self._headers)
+            self._client_loop = loop
+        return self._client
+
+    def free_slots(self, cli_type: str) -> int:
+        """Slots of a CLI not taken by calls from this process."""
+        return self.capacity.get(cli_type, 0) - self.in_flight.get(cli_type, 0)
+
+    async def check(self):
+        """Refresh health and capacity from the agent's /health endpoint."""
+        self.checked_at = time.monotonic()
+        try:
+            response = await self.client().get("/health", timeout=5.0)
+            response.raise_for_status()
+            report = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            self.mark_down(e)
+            return
+        self.healthy = report.get("status") == "ok"
+        self.name = report.get("name", self.url)
+        self.capacity = {
+            cli: limit for cli, limit in report.get("capacity", {}).items()
+            if report.get("clis", {}).get(cli, True)
+        }
+        self.error = None
+
+    def mark_down(self, error: Exception):
+        """Take the agent out of rotation until the next health check."""
+        self.healthy = False
+        self.checked_at = time.monotonic()
+        self.error = f"{type(error).__name__}: {error}"
+
+    def status(self) -> Dict[str, Any]:
+        """Health and load of the agent as seen from this process."""
+        return {"url": self.url, "name": self.name, "healthy": self.healthy,
+                "capacity": self.capacity, "in_flight": dict(self.in_flight),
+                "error": self.error}
+
+
+class WorkerPool:
+    """
+    Load balancer over the worker agents.
+
+    Each call goes to the healthy agent with the most free slots for its
+    CLI, as reported by the agents' /health and minus the calls this
+    process already sent there. When every slot is taken the call waits
+    for one. An agent that cannot be reached is taken out of rotation
+    and the call moves on to the next one.
+    """
+
+    def __init__(self, workers: List[RemoteWorker], health_interval: float = WORKER_HEALTH_INTERVAL_SECONDS):
+        self.workers = workers
+        self.health_interval = health_interval
+        self._slot_freed: Optional[asyncio.Condition] = None
+        self._loop = None
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._slot_freed is None or self._loop is not loop:
+            self._slot_freed = asyncio.Condition()
+            self._loop = loop
+        return self._slot_freed
+
+    async def refresh(self, force: bool = False):
+        """Check the agents whose last health check is older than the interval."""
+        now = time.monotonic()
+        stale = [w for w in self.workers if force or w.checked_at is None
+                 or now - w.checked_at >= self.health_interval]
+        if stale:
+            await asyncio.gather(*(w.check() for w in stale))
+
+    def _pick(self, cli_type: str, exclude: List[RemoteWorker]) -> Tuple[Optional[RemoteWorker], bool]:
+        """
+        The agent for the next call of a CLI.
+
+        Returns:
+            Tuple of (agent with a free slot or None, whether any healthy
+            agent serves the CLI at all)
+        """
+        serving = [w for w in self.workers
+                   if w.healthy and w not in exclude and w.capacity.get(cli_type)]
+        free = [w for w in serving if w.free_slots(cli_type) > 0]
+        if not free:
+            return None, bool(serving)
+        return max(free, key=lambda w: w.free_slots(cli_type)), True
+
+    async def acquire(
+        self,
+        cli_type: str,
+        exclude: List[RemoteWorker],
+        timeout: Optional[float] = None
+    ) -> Optional[RemoteWorker]:
+        """
+        Reserve a slot of a CLI on the best agent, waiting for one if all are busy.
+
+        Args:
+            cli_type: CLI to reserve a slot of
+            exclude: Agents not to use (they failed this call already)
+            timeout: Seconds to wait for a slot (None = no limit)
+
+        Returns:
+            The agent, or None if no healthy agent serves the CLI
+
+        Raises:
+            asyncio.TimeoutError: No slot was freed within the timeout
+        """
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        await self.refresh()
+        condition = self._condition()
+        async with condition:
+            while True:
+                worker, serving = self._pick(cli_type, exclude)
+                if worker is not None:
+                    worker.in_flight[cli_type] = worker.in_flight.get(cli_type, 0) + 1
+                    return worker
+                if not serving:
+                    return None
+                if give_up_at is None:
+                    await condition.wait()
+                    continue
+                remaining = give_up_at - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    await asyncio.wait_for(condition.wait(), remaining)
+                except asyncio.TimeoutError:
+                    # One last look: a slot may have been freed just now
+                    continue
+
+    async def release(self, worker: RemoteWorker, cli_type: str):
+        """Give back a slot reserved by acquire."""
+        condition = self._condition()
+        async with condition:
+            worker.in_flight[cli_type] -= 1
+            condition.notify_all()
+
+    async def query(
+        self,
+        model: str,
+        cli_type: str,
+        prompt: str,
+        timeout: float
+    ) -> Tuple[Optional[Dict[str, Any]], str, Dict[str, Any]]:
+        """
+        Run a CLI call on an agent.
+
+        Args:
+            model: Model identifier
+            cli_type: CLI the model runs on
+            prompt: Full prompt
+            timeout: Seconds for the whole call, including the wait for a
+                slot; the agent gets what is left as the CLI timeout
+
+        Returns:
+            Tuple of (query_model response from the agent or None, outcome
+            'success', 'timeout' or 'error', dict with the 'worker' name
+            and the time spent waiting for a slot in 'queue_seconds')
+        """
+        tried = []
+        info = {"worker": None, "queue_seconds": 0.0}
+        started = time.monotonic()
+        while True:
+            queued = time.monotonic()
+            try:
+                # Time spent queued (and on agents that failed) comes off the call's budget
+                worker = await self.acquire(cli_type, tried, timeout - (queued - started))
+            except asyncio.TimeoutError:
+                info["queue_seconds"] = round(info["queue_seconds"] + time.monotonic() - queued, 4)
+                print(f"Timed out waiting for a worker slot for {model}")
+                return None, "timeout", info
+            info["queue_seconds"] = round(info["queue_seconds"] + time.monotonic() - queued, 4)
+            remaining = timeout - (time.monotonic() - started)
+            if worker is None:
+                print(f"No healthy worker agent for {model}")
+                return None, "error", info
+            info["worker"] = worker.name
+            if remaining <= 0:
+                await self.release(worker, cli_type)
+                print(f"Timed out waiting for a worker slot for {model}")
+                return None, "timeout", info
+            try:
+                response = await worker.client().post("/query", json={
+                    "model": model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "timeout": remaining
+                }, timeout=remaining + _NETWORK_SLACK_SECONDS)
+                response.raise_for_status()
+                result = response.json()
+            except httpx.TimeoutException:
+                print(f"Worker {worker.name} timed out for {model}")
+                return None, "timeout", info
+            except (httpx.HTTPError, ValueError) as e:
+                # Unreachable or broken agent: try the next one
+                print(f"Worker {worker.name} failed for {model}: {e}")
+                worker.mark_down(e)
+                tried.append(worker)
+                continue
+            finally:
+                await self.release(worker, cli_type)
+            return result.get("response"), result.get("outcome", "error"), info
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Health and load of every agent."""
+        return [worker.status() for worker in self.workers]
+
+
+_pool: Optional[WorkerPool] = None
+
+
+def set_workers(urls: Optional[List[str]], transports: Optional[Dict[str, httpx.AsyncBaseTransport]] = None):
+    """
+    Send the CLI calls to worker agents (None or empty: run them locally).
+
+    Args:
+        urls: Agent URLs (see RemoteWorker)
+        transports: Optional custom transport per URL
+    """
+    global _pool
+    transports = transports or {}
+    _pool = WorkerPool([RemoteWorker(url, transports.get(url)) for url in urls]) if urls else None
+
+
+def get_pool() -> Optional[WorkerPool]:
+    """The worker pool, or None when the CLIs run on this host."""
+    return _pool
+
+
+set_workers(CLI_WORKERS)
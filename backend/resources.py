@@ -0,0 +1,149 @@
+"""Resource accounting and limits for CLI subprocesses.
+
+Each CLI call runs a shell pipeline (`cat prompt | gemini`) whose members
+are reaped by the shell, so the rusage of the shell collected with wait4
+covers the whole pipeline: CPU time, peak RSS of the largest member and
+block I/O. Limits from CLI_RESOURCE_LIMITS are applied by the shell itself
+(`ulimit`, `nice`) and inherited by every process of the pipeline. They are
+not set from a preexec_fn, which is unsafe in a program with threads (the
+calls run on asyncio.to_thread workers).
+
+Accounting and limits are POSIX-only; on Windows calls simply report no
+resource usage.
+"""
+
+import os
+import shlex
+import subprocess
+import sys
+import threading
+from typing import Dict, Any, Optional, Callable, Tuple
+
+from .config import CLI_RESOURCE_LIMITS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def usage_from_rusage(ru) -> Dict[str, Any]:
+    """
+    Convert a struct_rusage into the dict attached to call results.
+
+    Returns:
+        Dict with 'user_cpu_seconds', 'system_cpu_seconds', 'max_rss_bytes',
+        'block_input_ops' and 'block_output_ops'
+    """
+    return {
+        "user_cpu_seconds": round(ru.ru_utime, 4),
+        "system_cpu_seconds": round(ru.ru_stime, 4),
+        "max_rss_bytes": ru.ru_maxrss * _MAXRSS_UNIT,
+        "block_input_ops": ru.ru_inblock,
+        "block_output_ops": ru.ru_oublock,
+    }
+
+
+def merge_usage(total: Dict[str, Any], usage: Dict[str, Any]):
+    """
+    Add one process's usage to a call total (a call may run several processes).
+
+    CPU time and I/O are summed, peak RSS is the maximum.
+    """
+    for key, value in usage.items():
+        if key == "max_rss_bytes":
+            total[key] = max(total.get(key, 0), value)
+        else:
+            total[key] = round(total.get(key, 0) + value, 4)
+
+
+def get_limits(cli_type: str) -> Dict[str, Any]:
+    """Configured limits for a CLI (empty dict if none)."""
+    return CLI_RESOURCE_LIMITS.get(cli_type) or {}
+
+
+def limit_command(cli_type: str, cmd: str) -> str:
+    """
+    Wrap a shell command so that it runs under the CLI's limits.
+
+    The memory cap is set with `ulimit -d` and the niceness with `nice` on
+    a new shell, which then runs the command; `exec` keeps the pid, so
+    the process group (and the rusage) are those of the original shell.
+
+    Args:
+        cli_type: CLI type (gemini, codex, claude)
+        cmd: Shell command of the call
+
+    Returns:
+        The command to run (unchanged if the CLI has no limits or the
+        platform does not support them)
+    """
+    limits = get_limits(cli_type)
+    if resource is None or not limits:
+        return cmd
+
+    memory_mb = limits.get("memory_mb")
+    nice = limits.get("nice")
+    prefix = ""
+    if memory_mb:
+        prefix += f"ulimit -d {int(memory_mb * 1024)} || exit 126; "
+    if nice:
+        return f"{prefix}exec nice -n {int(nice)} /bin/sh -c {shlex.quote(cmd)}"
+    return prefix + cmd
+
+
+def wait_with_usage(
+    process: subprocess.Popen,
+    timeout: float,
+    kill: Callable[[subprocess.Popen], None]
+) -> Tuple[int, Optional[Dict[str, Any]], bool]:
+    """
+    Wait for a process like Popen.wait, collecting its rusage.
+
+    The blocking wait4 runs in a helper thread so the timeout is honoured
+    without polling. On timeout the process is killed and still reaped,
+    so runaway calls are accounted for too.
+
+    Args:
+        process: The started process (must not have been waited for)
+        timeout: Seconds to wait before killing it
+        kill: Sends the kill signal(s); must not wait for the process
+
+    Returns:
+        Tuple (exit code, usage dict or None where unsupported, timed out)
+    """
+    if not hasattr(os, "wait4"):
+        try:
+            return process.wait(timeout=timeout), None, False
+        except subprocess.TimeoutExpired:
+            kill(process)
+            return process.wait(), None, True
+
+    result = {}
+
+    def wait():
+        try:
+            _, status, ru = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            return
+        result["returncode"] = os.waitstatus_to_exitcode(status)
+        result["usage"] = usage_from_rusage(ru)
+
+    waiter = threading.Thread(target=wait, daemon=True)
+    waiter.start()
+    waiter.join(timeout)
+    timed_out = waiter.is_alive()
+    if timed_out:
+        kill(process)
+        waiter.join()
+
+    if "returncode" not in result:
+        # Already reaped elsewhere: let Popen settle the exit code
+        return process.wait(), None, timed_out
+
+    # Popen must not wait for the pid again
+    process.returncode = result["returncode"]
+    return result["returncode"], result["usage"], timed_out
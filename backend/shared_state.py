@@ -0,0 +1,211 @@
+"""State shared by the API server processes of one host.
+
+With several uvicorn workers (`python -m backend serve --workers N`) every
+process has its own memory, so what they must agree on lives here: a small
+SQLite key-value store (WAL mode) for the CLI health statistics and the
+background job claims, and lock files that count the CLI calls in flight
+across processes. With a single process (API_WORKERS = 1) the store is not
+used and CLI slots are left to the in-process semaphores.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, IO, Optional
+from . import locks
+from .config import API_WORKERS, SHARED_STATE_DIR, SHARED_SLOT_POLL_SECONDS
+
+_enabled = API_WORKERS > 1
+_directory = SHARED_STATE_DIR
+_local = threading.local()
+
+# Job claims of a single process (used when the store is disabled)
+_claims: Dict[str, float] = {}
+_claims_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+)
+"""
+
+
+def set_shared(enabled: bool, directory: Optional[str] = None):
+    """
+    Share state between processes (True) or keep it in this process.
+
+    Args:
+        enabled: Whether to use the shared store and CLI slots
+        directory: Directory of the store and lock files (default:
+            SHARED_STATE_DIR)
+    """
+    global _enabled, _directory
+    _enabled = enabled
+    _directory = directory or SHARED_STATE_DIR
+
+
+def enabled() -> bool:
+    """Whether state is shared between processes."""
+    return _enabled
+
+
+def _connection() -> sqlite3.Connection:
+    """This thread's connection to the store (one per thread and directory)."""
+    path = os.path.join(_directory, "state.db")
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    if path not in connections:
+        os.makedirs(_directory, exist_ok=True)
+        connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(_SCHEMA)
+        connections[path] = connection
+    return connections[path]
+
+
+def get(namespace: str, key: str) -> Any:
+    """Value stored under `key`, or None."""
+    row = _connection().execute(
+        "SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def items(namespace: str) -> Dict[str, Any]:
+    """Every value of a namespace, by key."""
+    rows = _connection().execute(
+        "SELECT key, value FROM kv WHERE namespace = ? ORDER BY key", (namespace,)
+    ).fetchall()
+    return {key: json.loads(value) for key, value in rows}
+
+
+def update(namespace: str, key: str, change: Callable[[Any], Any]) -> Any:
+    """
+    Replace a value with `change(current value or None)`, atomically.
+
+    Args:
+        namespace: Group of keys (e.g. "health")
+        key: Key within the namespace
+        change: Function from the current value to the new one
+
+    Returns:
+        The new value
+    """
+    connection = _connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute(
+            "SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        value = change(json.loads(row[0]) if row else None)
+        connection.execute(
+            "INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)",
+            (namespace, key, json.dumps(value))
+        )
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+    return value
+
+
+def clear(namespace: str):
+    """Remove every key of a namespace."""
+    _connection().execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+
+
+def claim_job(key: str, ttl: float) -> bool:
+    """
+    Claim a background job so that no other process runs it at the same time.
+
+    Args:
+        key: Job identifier (e.g. "memory:<conversation id>")
+        ttl: Seconds after which the claim lapses if never released
+
+    Returns:
+        True if the claim was taken, False if the job is already running
+    """
+    now = time.time()
+    if not _enabled:
+        with _claims_lock:
+            if _claims.get(key, 0) > now:
+                return False
+            _claims[key] = now + ttl
+            return True
+
+    connection = _connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute(
+            "SELECT expires_at FROM kv WHERE namespace = 'jobs' AND key = ?", (key,)
+        ).fetchone()
+        claimed = row is None or row[0] <= now
+        if claimed:
+            connection.execute(
+                "INSERT OR REPLACE INTO kv (namespace, key, value, expires_at) VALUES ('jobs', ?, ?, ?)",
+                (key, json.dumps({"pid": os.getpid(), "claimed_at": now}), now + ttl)
+            )
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+    return claimed
+
+
+def release_job(key: str):
+    """Release a job claimed with claim_job."""
+    if not _enabled:
+        with _claims_lock:
+            _claims.pop(key, None)
+        return
+    _connection().execute("DELETE FROM kv WHERE namespace = 'jobs' AND key = ?", (key,))
+
+
+async def acquire_cli_slot(cli_type: str, limit: Optional[int], timeout: Optional[float] = None) -> Optional[IO]:
+    """
+    Wait for one of a CLI's `limit` slots, shared by every process.
+
+    A slot is a lock file (slots/<cli>-<i>.lock) held for the whole call,
+    so it is released even if the process holding it dies.
+
+    Args:
+        cli_type: CLI about to be run
+        limit: Calls of this CLI allowed at once across processes
+        timeout: Seconds to wait at most (None: no limit)
+
+    Returns:
+        Handle for release_cli_slot, or None when state is not shared or
+        the CLI has no limit
+
+    Raises:
+        asyncio.TimeoutError: If no slot was free within `timeout`
+    """
+    if not _enabled or not limit:
+        return None
+    paths = [os.path.join(_directory, "slots", f"{cli_type}-{i}.lock") for i in range(limit)]
+    give_up_at = None if timeout is None else time.monotonic() + timeout
+    while True:
+        for path in paths:
+            handle = locks.try_lock(path)
+            if handle is not None:
+                return handle
+        if give_up_at is not None and time.monotonic() >= give_up_at:
+            raise asyncio.TimeoutError(f"no free {cli_type} slot")
+        delay = SHARED_SLOT_POLL_SECONDS
+        if give_up_at is not None:
+            delay = min(delay, max(give_up_at - time.monotonic(), 0.0))
+        await asyncio.sleep(delay)
+
+
+def release_cli_slot(handle: Optional[IO]):
+    """Release a slot taken with acquire_cli_slot (None is ignored)."""
+    if handle is not None:
+        locks.unlock(handle)
@@ -1,11 +1,21 @@
-"""JSON-based storage for conversations."""
+"""JSON-based storage for conversations.
+
+Safe with several API processes: files are replaced atomically (readers
+never see a partial write) and every read-modify-write holds an
+inter-process lock on the file it changes.
+"""
 
 import json
 import os
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from pathlib import Path
+from contextlib import contextmanager
 from .config import DATA_DIR
+from .metrics import STORAGE_DURATION
+from . import locks
+from . import tracing
 
 
 def ensure_data_dir():
@@ -13,6 +23,66 @@ def ensure_data_dir():
     Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
 
 
+@contextmanager
+def _instrumented(operation: str, **attributes):
+    """Time a storage operation for /metrics and record it as a trace span."""
+    with tracing.span(f"storage.{operation}", **attributes):
+        with STORAGE_DURATION.time(operation=operation):
+            yield
+
+
+def _write_json(path: str, data: Any, indent: Optional[int] = 2):
+    """Write JSON to a temporary file, then atomically replace `path` with it."""
+    directory, name = os.path.split(path)
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(temp_path, path)
+
+
+def _lock(name: str):
+    """Inter-process lock guarding the read-modify-write of one stored file."""
+    return locks.file_lock(os.path.join(DATA_DIR, ".locks", f"{name}.lock"))
+
+
+@contextmanager
+def _updating_conversation(conversation_id: str):
+    """
+    Load a conversation for a change and save it afterwards, under its lock.
+
+    Raises:
+        ValueError: If the conversation does not exist
+    """
+    with _lock(conversation_id):
+        conversation = get_conversation(conversation_id)
+        if conversation is None:
+            raise ValueError(f"Conversation {conversation_id} not found")
+        yield conversation
+        save_conversation(conversation)
+
+
+def _update_json(
+    path: str,
+    lock_name: str,
+    empty: Any,
+    update: Callable[[Any], Any],
+    attributes: Dict[str, Any],
+    indent: Optional[int] = 2
+) -> Any:
+    """Read a JSON file (or `empty`), apply `update` and write the result, under a lock."""
+    with _lock(lock_name):
+        data = empty
+        if os.path.exists(path):
+            with _instrumented("read", **attributes):
+                with open(path, 'r') as f:
+                    data = json.load(f)
+        data = update(data)
+        with _instrumented("write", **attributes):
+            _write_json(path, data, indent)
+        return data
+
+
 def get_conversation_path(conversation_id: str) -> str:
     """Get the file path for a conversation."""
     return os.path.join(DATA_DIR, f"{conversation_id}.json")
@@ -39,8 +109,8 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
 
     # Save to file
     path = get_conversation_path(conversation_id)
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    with _instrumented("write", conversation_id=conversation_id):
+        _write_json(path, conversation)
 
     return conversation
 
@@ -60,8 +130,9 @@ def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
     if not os.path.exists(path):
         return None
 
-    with open(path, 'r') as f:
-        return json.load(f)
+    with _instrumented("read", conversation_id=conversation_id):
+        with open(path, 'r') as f:
+            return json.load(f)
 
 
 def save_conversation(conversation: Dict[str, Any]):
@@ -74,8 +145,8 @@ def save_conversation(conversation: Dict[str, Any]):
     ensure_data_dir()
 
     path = get_conversation_path(conversation['id'])
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    with _instrumented("write", conversation_id=conversation['id']):
+        _write_json(path, conversation)
 
 
 def list_conversations() -> List[Dict[str, Any]]:
@@ -88,18 +159,19 @@ def list_conversations() -> List[Dict[str, Any]]:
     ensure_data_dir()
 
     conversations = []
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith('.json'):
-            path = os.path.join(DATA_DIR, filename)
-            with open(path, 'r') as f:
-                data = json.load(f)
-                # Return metadata only
-                conversations.append({
-                    "id": data["id"],
-                    "created_at": data["created_at"],
-                    "title": data.get("title", "New Conversation"),
-                    "message_count": len(data["messages"])
-                })
+    with _instrumented("list"):
+        for filename in os.listdir(DATA_DIR):
+            if filename.endswith('.json'):
+                path = os.path.join(DATA_DIR, filename)
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                    # Return metadata only
+                    conversations.append({
+                        "id": data["id"],
+                        "created_at": data["created_at"],
+                        "title": data.get("title", "New Conversation"),
+                        "message_count": len(data["messages"])
+                    })
 
     # Sort by creation time, newest first
     conversations.sort(key=lambda x: x["created_at"], reverse=True)
@@ -115,16 +187,11 @@ def add_user_message(conversation_id: str, content: str):
         conversation_id: Conversation identifier
         content: User message content
     """
-    conversation = get_conversation(conversation_id)
-    if conversation is None:
-        raise ValueError(f"Conversation {conversation_id} not found")
-
-    conversation["messages"].append({
-        "role": "user",
-        "content": content
-    })
-
-    save_conversation(conversation)
+    with _updating_conversation(conversation_id) as conversation:
+        conversation["messages"].append({
+            "role": "user",
+            "content": content
+        })
 
 
 def add_assistant_message(
@@ -142,31 +209,177 @@ def add_assistant_message(
         stage2: List of model rankings
         stage3: Final synthesized response
     """
+    with _updating_conversation(conversation_id) as conversation:
+        conversation["messages"].append({
+            "role": "assistant",
+            "stage1": stage1,
+            "stage2": stage2,
+            "stage3": stage3
+        })
+
+
+def update_conversation_title(conversation_id: str, title: str):
+    """
+    Update the title of a conversation.
+
+    Args:
+        conversation_id: Conversation identifier
+        title: New title for the conversation
+    """
+    with _updating_conversation(conversation_id) as conversation:
+        conversation["title"] = title
+
+
+def get_conversation_memory(conversation_id: str) -> Dict[str, Any]:
+    """
+    Get the rolling memory of a conversation.
+
+    Args:
+        conversation_id: Conversation identifier
+
+    Returns:
+        Dict with 'summary' and 'summarized_count' (messages folded into it)
+    """
     conversation = get_conversation(conversation_id)
     if conversation is None:
         raise ValueError(f"Conversation {conversation_id} not found")
 
-    conversation["messages"].append({
-        "role": "assistant",
-        "stage1": stage1,
-        "stage2": stage2,
-        "stage3": stage3
-    })
+    return conversation.get("memory", {"summary": "", "summarized_count": 0})
 
-    save_conversation(conversation)
 
+def update_conversation_memory(
+    conversation_id: str,
+    summary: str,
+    summarized_count: int
+):
+    """
+    Update the rolling memory of a conversation.
 
-def update_conversation_title(conversation_id: str, title: str):
+    Args:
+        conversation_id: Conversation identifier
+        summary: New rolling summary
+        summarized_count: Number of leading messages covered by the summary
     """
-    Update the title of a conversation.
+    with _updating_conversation(conversation_id) as conversation:
+        conversation["memory"] = {
+            "summary": summary,
+            "summarized_count": summarized_count
+        }
+
+
+def get_conversation_usage(conversation_id: str) -> Dict[str, Any]:
+    """
+    Get the token and cost counters of a conversation.
 
     Args:
         conversation_id: Conversation identifier
-        title: New title for the conversation
+
+    Returns:
+        Usage record ('turns', 'total', 'members'), empty if none yet
     """
     conversation = get_conversation(conversation_id)
     if conversation is None:
         raise ValueError(f"Conversation {conversation_id} not found")
 
-    conversation["title"] = title
-    save_conversation(conversation)
+    return conversation.get("usage", {})
+
+
+def update_conversation_usage(
+    conversation_id: str,
+    update: Callable[[Dict[str, Any]], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Update the token and cost counters of a conversation.
+
+    Args:
+        conversation_id: Conversation identifier
+        update: Function from the current usage record (empty if none yet)
+            to the new one, applied under the conversation's lock
+
+    Returns:
+        The new usage record
+    """
+    with _updating_conversation(conversation_id) as conversation:
+        conversation["usage"] = update(conversation.get("usage", {}))
+    return conversation["usage"]
+
+
+def get_daily_usage_path(day: str) -> str:
+    """Get the file path for the usage counters of a day (YYYY-MM-DD)."""
+    return os.path.join(DATA_DIR, "usage", f"{day}.json")
+
+
+def get_daily_usage(day: str) -> Dict[str, Any]:
+    """
+    Get the token and cost counters of a day, across all conversations.
+
+    Args:
+        day: Day as YYYY-MM-DD
+
+    Returns:
+        Usage record ('turns', 'total', 'members'), empty if none yet
+    """
+    path = get_daily_usage_path(day)
+
+    if not os.path.exists(path):
+        return {}
+
+    with _instrumented("read", usage_day=day):
+        with open(path, 'r') as f:
+            return json.load(f)
+
+
+def update_daily_usage(
+    day: str,
+    update: Callable[[Dict[str, Any]], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Update the token and cost counters of a day.
+
+    Args:
+        day: Day as YYYY-MM-DD
+        update: Function from the current usage record (empty if none yet)
+            to the new one, applied under the day's lock
+
+    Returns:
+        The new usage record
+    """
+    return _update_json(get_daily_usage_path(day), f"usage-{day}", {}, update, {"usage_day": day})
+
+
+def get_answer_index_path() -> str:
+    """Get the file path for the index of answered questions."""
+    return os.path.join(DATA_DIR, "cache", "answers.json")
+
+
+def get_answer_index() -> List[Dict[str, Any]]:
+    """
+    Get the index of answered questions used by the answer cache.
+
+    Returns:
+        List of index entries, oldest first
+    """
+    path = get_answer_index_path()
+
+    if not os.path.exists(path):
+        return []
+
+    with _instrumented("read", index="answers"):
+        with open(path, 'r') as f:
+            return json.load(f)
+
+
+def update_answer_index(
+    update: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """
+    Update the index of answered questions.
+
+    Args:
+        update: Function from the current entries (oldest first) to the
+            new ones, applied under the index's lock
+
+    Returns:
+        The new entries
+    """
+    return _update_json(get_answer_index_path(), "answer-index", [], update, {"index": "answers"}, indent=None)
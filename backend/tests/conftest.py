@@ -0,0 +1,19 @@
+"""Fixture condivise dei test del backend."""
+
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import tracing
+
+
+@pytest.fixture(autouse=True)
+def disable_tracing():
+    """I test non scrivono span in data/traces"""
+    previous = tracing._exporter
+    tracing.set_exporter(None)
+    yield
+    tracing.set_exporter(previous)
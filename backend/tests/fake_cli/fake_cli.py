@@ -0,0 +1,264 @@
+"""
+Stand-in per le CLI gemini, codex e claude (test e benchmark senza rete).
+
+Legge il prompt da stdin come le CLI reali e risponde con il loro framing:
+- gemini: righe "Loaded cached credentials." / "Using model: ..." in testa
+- codex: header "OpenAI Codex v..." con workdir/model, blocco "codex" e
+  footer "tokens used" con il conteggio; come la CLI reale rifiuta di
+  girare fuori da un repository git (senza --skip-git-repo-check)
+- claude: testo semplice
+
+Con i flag dell'output strutturato (gemini/claude --output-format json,
+claude --output-format stream-json, codex exec --json) risponde con il JSON
+delle CLI reali, con modello e usage dei token (circa 4 caratteri a token).
+
+Le risposte sono deterministiche dato il prompt (e FAKE_CLI_SEED): il prompt
+di ranking dello Stage 2 riceve un "FINAL RANKING:" valido, quello del
+titolo un titolo breve, tutti gli altri una risposta della dimensione
+configurata.
+
+Configurazione via variabili d'ambiente, con override per CLI
+(FAKE_GEMINI_LATENCY vince su FAKE_CLI_LATENCY):
+
+    FAKE_CLI_LATENCY         attesa prima del primo byte: "0.5" (fissa),
+                             "uniform:0.2,1.5", "normal:1.0,0.3",
+                             "lognormal:1.0,0.5" (mediana, sigma)
+    FAKE_CLI_FAILURE_RATE    probabilità di fallimento (0.0 - 1.0)
+    FAKE_CLI_FAILURE_MODES   modi scelti a caso: exit (stderr + exit 1),
+                             empty (nessun output), hang (non termina mai),
+                             garbage (output senza framing); default "exit"
+    FAKE_CLI_OUTPUT_BYTES    dimensione della risposta (default 400)
+    FAKE_CLI_CHUNK_BYTES     byte per chunk in streaming (default: tutto)
+    FAKE_CLI_CHUNK_INTERVAL  secondi tra un chunk e il successivo
+    FAKE_CLI_SEED            seed per latenze, fallimenti e contenuti
+    FAKE_CLI_JSON_UNSUPPORTED  se "1", rifiuta i flag JSON come una
+                             versione vecchia della CLI (exit 2)
+    FAKE_CLI_PID_DIR         directory dove annotare il pid di ogni
+                             esecuzione (un file vuoto per pid)
+
+Con --version stampa la versione ed esce, come le CLI reali.
+
+Uso: fake_cli.py <gemini|codex|claude> [argomenti ignorati]
+"""
+
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+import zlib
+
+WORDS = (
+    "council consensus latency model answer review ranking synthesis prompt "
+    "context evidence tradeoff system design cache queue stream token budget"
+).split()
+
+
+def setting(cli_type, name, default=None):
+    """Legge FAKE_<CLI>_<NAME>, poi FAKE_CLI_<NAME>."""
+    value = os.environ.get(f"FAKE_{cli_type.upper()}_{name}")
+    if value is None:
+        value = os.environ.get(f"FAKE_CLI_{name}")
+    return default if value in (None, "") else value
+
+
+def sample_latency(spec, rng):
+    """Campiona una latenza (secondi) da una specifica di distribuzione."""
+    if ":" not in spec:
+        return float(spec)
+    kind, params = spec.split(":", 1)
+    a, b = (float(x) for x in params.split(","))
+    if kind == "uniform":
+        return rng.uniform(a, b)
+    if kind == "normal":
+        return max(rng.gauss(a, b), 0.0)
+    if kind == "lognormal":
+        return rng.lognormvariate(math.log(a), b)
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+
+def filler(rng, size):
+    """Testo pseudo-casuale di circa `size` byte, a paragrafi."""
+    words, length = [], 0
+    while length < size:
+        word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    text = " ".join(words)
+    return "\n\n".join(text[i:i + 400] for i in range(0, len(text), 400))
+
+
+def build_answer(prompt, rng, size):
+    """Risposta plausibile per il tipo di prompt del council."""
+    if prompt.rstrip().endswith("Now provide your evaluation and ranking:"):
+        labels = sorted(set(re.findall(r"Response [A-Z]\b", prompt)))
+        rng.shuffle(labels)
+        evaluation = "\n".join(f"{label} is {rng.choice(WORDS)}." for label in labels)
+        ranking = "\n".join(f"{i}. {label}" for i, label in enumerate(labels, 1))
+        return f"{evaluation}\n\nFINAL RANKING:\n{ranking}"
+    if "Generate a very short title" in prompt:
+        return " ".join(rng.choice(WORDS).capitalize() for _ in range(3))
+    return filler(rng, size)
+
+
+def frame(cli_type, answer, prompt):
+    """Aggiunge header e footer come la CLI reale."""
+    if cli_type == "gemini":
+        return f"Loaded cached credentials.\nUsing model: gemini-2.5-pro\n{answer}\n"
+    if cli_type == "codex":
+        tokens = (len(prompt) + len(answer)) // 4
+        return (
+            "OpenAI Codex v0.65.0 (research preview)\n"
+            "--------\n"
+            f"workdir: {os.getcwd()}\n"
+            "model: gpt-5-codex\n"
+            "provider: openai\n"
+            "approval: never\n"
+            "sandbox: read-only\n"
+            "--------\n"
+            f"user\n{prompt}\n\n"
+            f"codex\n{answer}\n"
+            f"tokens used\n{tokens:,}\n"
+        )
+    return f"{answer}\n"
+
+
+MODELS = {
+    "gemini": "gemini-2.5-pro",
+    "codex": "gpt-5-codex",
+    "claude": "claude-sonnet-4-5",
+}
+
+
+def output_format(cli_type, args):
+    """Formato richiesto dagli argomenti: "text", "json" o "stream-json"."""
+    if cli_type == "codex":
+        return "json" if "--json" in args else "text"
+    if "--output-format" in args:
+        index = args.index("--output-format")
+        if index + 1 < len(args):
+            return args[index + 1]
+    return "text"
+
+
+def frame_json(cli_type, fmt, answer, prompt, elapsed):
+    """Output strutturato come la CLI reale, con usage dei token."""
+    model = MODELS[cli_type]
+    input_tokens, output_tokens = len(prompt) // 4, len(answer) // 4
+    if cli_type == "gemini":
+        return json.dumps({"response": answer, "stats": {"models": {model: {"tokens": {
+            "prompt": input_tokens, "candidates": output_tokens, "total": input_tokens + output_tokens,
+            "cached": 0, "thoughts": 0, "tool": 0,
+        }}}}}) + "\n"
+    if cli_type == "codex":
+        events = [
+            {"type": "thread.started", "thread_id": "fake-thread"},
+            {"type": "turn.started"},
+            {"type": "item.completed", "item": {"id": "item_0", "type": "reasoning", "text": "**Answering**"}},
+            {"type": "item.completed", "item": {"id": "item_1", "type": "agent_message", "text": answer}},
+            {"type": "turn.completed", "usage": {
+                "input_tokens": input_tokens, "cached_input_tokens": 0, "output_tokens": output_tokens,
+            }},
+        ]
+        return "".join(json.dumps(event) + "\n" for event in events)
+    usage = {"input_tokens": input_tokens, "cache_creation_input_tokens": 0,
+             "cache_read_input_tokens": 0, "output_tokens": output_tokens}
+    result = {
+        "type": "result", "subtype": "success", "is_error": False,
+        "duration_ms": int(elapsed * 1000), "duration_api_ms": int(elapsed * 1000),
+        "num_turns": 1, "result": answer, "session_id": "fake-session",
+        "total_cost_usd": round((input_tokens * 3 + output_tokens * 15) / 1e6, 6),
+        "usage": usage,
+        "modelUsage": {model: {"inputTokens": input_tokens, "outputTokens": output_tokens}},
+    }
+    if fmt == "stream-json":
+        events = [
+            {"type": "system", "subtype": "init", "model": model, "session_id": "fake-session"},
+            {"type": "assistant", "message": {"model": model, "role": "assistant", "usage": usage,
+                                              "content": [{"type": "text", "text": answer}]}},
+            result,
+        ]
+        return "".join(json.dumps(event) + "\n" for event in events)
+    return json.dumps(result) + "\n"
+
+
+def in_git_repo(path):
+    """Come codex exec: la directory o una delle superiori contiene .git."""
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return True
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+
+
+def emit(data, chunk_bytes, interval):
+    """Scrive l'output a chunk, con la cadenza configurata."""
+    out = sys.stdout.buffer
+    payload = data.encode("utf-8")
+    step = chunk_bytes or len(payload) or 1
+    for i in range(0, len(payload), step):
+        if i and interval:
+            time.sleep(interval)
+        out.write(payload[i:i + step])
+        out.flush()
+
+
+def main(argv):
+    cli_type = os.path.basename(argv[1]) if len(argv) > 1 else "claude"
+    if "--version" in argv[2:]:
+        sys.stdout.write(f"{cli_type} 0.0.0-fake\n")
+        return 0
+    fmt = output_format(cli_type, argv[2:])
+    if fmt != "text" and setting(cli_type, "JSON_UNSUPPORTED") == "1":
+        flag = "--json" if cli_type == "codex" else "--output-format"
+        sys.stderr.write(f"error: unexpected argument '{flag}' found\n")
+        return 2
+    if cli_type == "codex" and "--skip-git-repo-check" not in argv and not in_git_repo(os.getcwd()):
+        sys.stderr.write("Not inside a trusted directory and --skip-git-repo-check was not specified.\n")
+        return 1
+    pid_dir = setting(cli_type, "PID_DIR")
+    if pid_dir:
+        open(os.path.join(pid_dir, str(os.getpid())), "w").close()
+    started = time.monotonic()
+    prompt = sys.stdin.read()
+
+    seed = setting(cli_type, "SEED")
+    rng = random.Random(
+        (int(seed) << 32) ^ zlib.crc32(f"{cli_type}\0{prompt}".encode("utf-8"))
+        if seed is not None else None
+    )
+
+    time.sleep(sample_latency(setting(cli_type, "LATENCY", "0"), rng))
+
+    if rng.random() < float(setting(cli_type, "FAILURE_RATE", "0")):
+        mode = rng.choice(setting(cli_type, "FAILURE_MODES", "exit").split(","))
+        if mode == "hang":
+            while True:
+                time.sleep(60)
+        if mode == "empty":
+            return 0
+        if mode == "garbage":
+            emit("\x1b[2K\rspinner...\nunexpected output without framing\n", 0, 0)
+            return 0
+        sys.stderr.write(f"{cli_type}: simulated failure (quota exceeded)\n")
+        return 1
+
+    answer = build_answer(prompt, rng, int(setting(cli_type, "OUTPUT_BYTES", "400")))
+    if fmt == "text":
+        output = frame(cli_type, answer, prompt)
+    else:
+        output = frame_json(cli_type, fmt, answer, prompt, time.monotonic() - started)
+    emit(
+        output,
+        int(setting(cli_type, "CHUNK_BYTES", "0")),
+        float(setting(cli_type, "CHUNK_INTERVAL", "0")),
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
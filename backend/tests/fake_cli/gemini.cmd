@@ -0,0 +1,4 @@
+@echo off
+rem Stand-in per la CLI gemini: vedi fake_cli.py
+if "%FAKE_CLI_PYTHON%"=="" (set FAKE_CLI_PYTHON=python)
+"%FAKE_CLI_PYTHON%" "%~dp0fake_cli.py" gemini %*
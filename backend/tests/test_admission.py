@@ -0,0 +1,175 @@
+"""
+Test suite per admission.py
+
+Esegui con: pytest backend/tests/test_admission.py -v
+"""
+
+import asyncio
+import json
+import httpx
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import admission, main, storage
+from backend.admission import AdmissionScheduler
+
+
+def admission_order(scheduler, tickets):
+    """Chiude le run una alla volta e ritorna i client nell'ordine di ammissione."""
+    order = []
+    while True:
+        running = [t for t in tickets if t["state"] == "running"]
+        if not running:
+            return order
+        for ticket in running:
+            order.append(ticket["client"])
+            scheduler.release(ticket)
+
+
+class TestScheduler:
+    """Test per limite globale, fair queueing e priorità"""
+
+    def test_cap_and_positions(self):
+        scheduler = AdmissionScheduler(max_running=2)
+        tickets = [scheduler.enqueue(f"c{i}") for i in range(5)]
+
+        assert [t["state"] for t in tickets] == ["running"] * 2 + ["waiting"] * 3
+        assert [scheduler.position(t) for t in tickets] == [0, 0, 1, 2, 3]
+
+        scheduler.release(tickets[3])
+        assert tickets[3]["state"] == "cancelled"
+        assert scheduler.position(tickets[4]) == 2
+        scheduler.release(tickets[0])
+        assert tickets[2]["state"] == "running"
+        assert scheduler.status()["waiting"] == {"interactive": {"c4": 1}, "batch": {}}
+
+    def test_busy_client_does_not_starve_others(self):
+        scheduler = AdmissionScheduler(max_running=1)
+        tickets = [scheduler.enqueue("flood") for _ in range(6)]
+        tickets += [scheduler.enqueue("alice"), scheduler.enqueue("bob")]
+
+        order = admission_order(scheduler, tickets)
+        assert order[:5] == ["flood", "flood", "alice", "bob", "flood"]
+
+    def test_weights(self):
+        scheduler = AdmissionScheduler(max_running=1, weights={"premium": 2})
+        tickets = [scheduler.enqueue("basic") for _ in range(4)]
+        tickets += [scheduler.enqueue("premium") for _ in range(4)]
+
+        order = admission_order(scheduler, tickets)
+        # Dopo la prima run, due run di premium per ognuna di basic
+        assert order[1:7].count("premium") == 4
+
+    def test_priority_classes(self):
+        scheduler = AdmissionScheduler(max_running=1)
+        tickets = [scheduler.enqueue("nightly", "batch") for _ in range(3)]
+        tickets.append(scheduler.enqueue("alice", "interactive"))
+
+        assert admission_order(scheduler, tickets) == ["nightly", "alice", "nightly", "nightly"]
+        with pytest.raises(ValueError):
+            scheduler.enqueue("alice", "urgent")
+
+    @pytest.mark.asyncio
+    async def test_positions_follow_the_queue(self):
+        scheduler = AdmissionScheduler(max_running=1)
+        first = scheduler.enqueue("a")
+        second = scheduler.enqueue("b")
+        third = scheduler.enqueue("c")
+
+        async def follow(ticket):
+            return [position async for position in scheduler.positions(ticket)]
+
+        following = asyncio.create_task(follow(third))
+        await asyncio.sleep(0.01)
+        scheduler.release(first)
+        await asyncio.sleep(0.01)
+        scheduler.release(second)
+
+        assert await asyncio.wait_for(following, 1) == [2, 1]
+        assert third["state"] == "running"
+        assert third["queue_seconds"] >= 0.02
+
+
+class TestApi:
+    """Test per l'ammissione negli endpoint dei messaggi"""
+
+    @pytest.mark.asyncio
+    async def test_stream_reports_queue_position(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path))
+        release = asyncio.Event()
+
+        async def fake_council(content, history=None, deadline=None, plan=None):
+            await release.wait()
+            yield {"type": "stage3_complete", "data": {"model": "gemini", "response": content}}
+
+        monkeypatch.setattr(main, "stream_council", fake_council)
+        admission.set_scheduler(AdmissionScheduler(max_running=1))
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                async def ask(address):
+                    transport = httpx.ASGITransport(app=main.app, client=(address, 123))
+                    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                        conversation = (await client.post("/api/conversations", json={})).json()
+                        response = await client.post(
+                            f"/api/conversations/{conversation['id']}/message/stream",
+                            json={"content": f"question from {address}", "fresh": True}
+                        )
+                    return [json.loads(line[6:]) for line in response.text.splitlines()
+                            if line.startswith("data: ")]
+
+                first = asyncio.create_task(ask("10.0.0.1"))
+                await asyncio.sleep(0.1)
+                second = asyncio.create_task(ask("10.0.0.2"))
+                await asyncio.sleep(0.1)
+                assert (await client.get("/api/admission")).json()["waiting"]["interactive"] == {"10.0.0.2": 1}
+                release.set()
+                first_events, second_events = await asyncio.gather(first, second)
+
+                bad = await client.post("/api/conversations/x/message", json={"content": "q", "priority": "urgent"})
+        finally:
+            admission.set_scheduler(AdmissionScheduler())
+
+        assert "queued" not in [e["type"] for e in first_events]
+        types = [e["type"] for e in second_events]
+        assert types.index("queued") < types.index("admitted") < types.index("stage3_complete")
+        assert second_events[types.index("queued")]["position"] == 1
+        assert bad.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_clients_are_keyed_on_their_address(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path))
+        release = asyncio.Event()
+
+        async def fake_council(content, history=None, deadline=None, plan=None):
+            await release.wait()
+            yield {"type": "stage3_complete", "data": {"model": "gemini", "response": content}}
+
+        monkeypatch.setattr(main, "stream_council", fake_council)
+        monkeypatch.setattr(main, "ADMISSION_TRUSTED_PROXIES", ["10.0.0.9"])
+        admission.set_scheduler(AdmissionScheduler(max_running=1))
+        try:
+            async def ask(address, client_id):
+                transport = httpx.ASGITransport(app=main.app, client=(address, 123))
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    conversation = (await client.post("/api/conversations", json={})).json()
+                    await client.post(f"/api/conversations/{conversation['id']}/message",
+                                      json={"content": "q", "fresh": True},
+                                      headers={"X-Client-Id": client_id})
+
+            # Ids scelti dal client non gli danno quote in più...
+            tasks = [asyncio.create_task(ask("10.0.0.1", f"id-{n}")) for n in range(3)]
+            await asyncio.sleep(0.1)
+            # ...ma un proxy fidato può nominare i client dietro di sé
+            tasks += [asyncio.create_task(ask("10.0.0.9", name)) for name in ("alice", "bob")]
+            await asyncio.sleep(0.1)
+            waiting = admission.get_scheduler().status()["waiting"]["interactive"]
+            release.set()
+            await asyncio.gather(*tasks)
+        finally:
+            admission.set_scheduler(AdmissionScheduler())
+
+        assert waiting == {"10.0.0.1": 2, "alice": 1, "bob": 1}
@@ -0,0 +1,141 @@
+"""
+Test suite per answer_cache.py
+
+Esegui con: pytest backend/tests/test_answer_cache.py -v
+"""
+
+import httpx
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import answer_cache, main, storage
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Storage in una directory temporanea."""
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def answered(conversation_id, question, answer):
+    """Conversazione con una domanda e la sua sintesi, indicizzata nella cache."""
+    storage.create_conversation(conversation_id)
+    storage.add_user_message(conversation_id, question)
+    storage.add_assistant_message(conversation_id, [], [], {"model": "gemini", "response": answer})
+    answer_cache.remember(conversation_id, question, 1)
+
+
+class TestSimilarity:
+    """Test per normalizzazione e MinHash"""
+
+    def test_rewordings_share_terms(self):
+        assert answer_cache.normalize("What is the CAP theorem?") == ["cap", "cap theorem", "theorem"]
+        assert answer_cache.normalize("Can you explain the CAP theorem, please") == ["cap", "cap theorem", "theorem"]
+        assert answer_cache.normalize("Spiegami il teorema CAP") == ["cap", "teorema", "teorema cap"]
+
+    def test_meaning_changes_are_kept(self):
+        pairs = [
+            ("Why is Rust memory safe?", "How is Rust memory safe?"),
+            ("What is 2*2?", "What is 2+2?"),
+            ("Is Python faster than Go?", "Is Go faster than Python?"),
+            ("When should I use Redis?", "Why should I use Redis?"),
+        ]
+        for first, second in pairs:
+            assert answer_cache.normalize(first) != answer_cache.normalize(second)
+        assert answer_cache.words("redis classes databases") == ["redis", "class", "database"]
+
+    def test_signature_estimates_jaccard(self):
+        first = answer_cache.signature(answer_cache.normalize("python decorators closures generators"))
+        second = answer_cache.signature(answer_cache.normalize("python decorators closures iterators"))
+
+        assert answer_cache.similarity(first, first) == 1.0
+        # Jaccard reale 5/11 (parole e coppie): la stima a 64 permutazioni resta vicina
+        assert 0.25 <= answer_cache.similarity(first, second) <= 0.65
+        assert answer_cache.similarity(first, []) == 0.0
+
+
+class TestLookup:
+    """Test per remember e lookup"""
+
+    def test_near_duplicate_matches(self, data_dir, monkeypatch):
+        monkeypatch.setattr(answer_cache, "ANSWER_CACHE_MODE", "return")
+        answered("c1", "What is the CAP theorem?", "Consistency, availability, partition tolerance")
+        answered("c2", "How do Python decorators work?", "They wrap functions")
+
+        match = answer_cache.lookup("can you explain the cap theorem")
+        assert match["conversation_id"] == "c1"
+        assert match["score"] == 1.0
+        assert match["hit"] is True
+        assert match["stage3"]["response"].startswith("Consistency")
+
+        assert answer_cache.lookup("How do Python generators work?") is None
+
+    def test_different_questions_do_not_match(self, data_dir):
+        answered("c1", "Is Python faster than Go?", "It depends")
+        answered("c2", "Why is Rust memory safe?", "Ownership")
+        answered("c3", "What is 2*2?", "4")
+        answered("c4", "Should I use Rust or Go for a high performance web server?", "Rust")
+
+        assert answer_cache.lookup("Is Go faster than Python?") is None
+        assert answer_cache.lookup("Should I not use Rust or Go for a high performance web server?") is None
+        assert answer_cache.lookup("Shouldn't I use Rust or Go for a high performance web server?") is None
+        assert answer_cache.lookup("How is Rust memory safe?") is None
+        assert answer_cache.lookup("What is 2+2?") is None
+        assert answer_cache.lookup("what's 2 * 2")["conversation_id"] == "c3"
+
+    def test_deleted_conversation_is_skipped(self, data_dir):
+        answered("c1", "What is the CAP theorem?", "old")
+        os.remove(storage.get_conversation_path("c1"))
+        assert answer_cache.lookup("What is the CAP theorem?") is None
+
+    def test_disabled_and_offer_modes(self, data_dir, monkeypatch):
+        answered("c1", "What is the CAP theorem?", "answer")
+
+        monkeypatch.setattr(answer_cache, "ANSWER_CACHE_MODE", "offer")
+        assert answer_cache.lookup("What is the CAP theorem?")["hit"] is False
+        monkeypatch.setattr(answer_cache, "ANSWER_CACHE_MODE", None)
+        assert answer_cache.lookup("What is the CAP theorem?") is None
+
+    def test_index_is_bounded(self, data_dir, monkeypatch):
+        monkeypatch.setattr(answer_cache, "ANSWER_CACHE_MAX_ENTRIES", 2)
+        for index in range(3):
+            answer_cache.remember(f"c{index}", f"question number {index}", 1)
+        assert [e["conversation_id"] for e in storage.get_answer_index()] == ["c1", "c2"]
+
+
+class TestApi:
+    """Test per l'uso della cache negli endpoint dei messaggi"""
+
+    @pytest.mark.asyncio
+    async def test_cached_answer_and_fresh_run(self, data_dir, monkeypatch):
+        monkeypatch.setattr(answer_cache, "ANSWER_CACHE_MODE", "return")
+        runs = []
+
+        async def fake_council(content, history=None, deadline=None, plan=None):
+            runs.append(content)
+            return [{"model": "gemini", "response": "s1"}], [], \
+                {"model": "gemini", "response": f"answer {len(runs)}"}, {}
+
+        monkeypatch.setattr(main, "run_full_council", fake_council)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def ask(content, **extra):
+                conversation = (await client.post("/api/conversations", json={})).json()
+                response = await client.post(f"/api/conversations/{conversation['id']}/message",
+                                             json={"content": content, **extra})
+                return conversation["id"], response.json()
+
+            first_id, _ = await ask("What is the CAP theorem?")
+            _, cached = await ask("Explain the CAP theorem")
+            _, fresh = await ask("Explain the CAP theorem", fresh=True)
+
+        assert runs == ["What is the CAP theorem?", "Explain the CAP theorem"]
+        assert cached["stage3"]["response"] == "answer 1"
+        assert cached["metadata"]["cache"]["conversation_id"] == first_id
+        assert cached["metadata"]["cache"]["score"] == 1.0
+        assert fresh["stage3"]["response"] == "answer 2"
+        assert "cache" not in fresh["metadata"]
@@ -0,0 +1,100 @@
+"""
+Test suite per batch.py
+
+Esegui con: pytest backend/tests/test_batch.py -v
+"""
+
+import json
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import batch
+
+
+def _write_jsonl(path, items):
+    path.write_text("".join(json.dumps(item) + "\n" for item in items))
+
+
+class TestPercentile:
+    """Test per percentile"""
+
+    def test_empty(self):
+        assert batch.percentile([], 50) == 0.0
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        assert batch.percentile(values, 50) == 50
+        assert batch.percentile(values, 95) == 95
+        assert batch.percentile(values, 99) == 99
+        assert batch.percentile(values, 100) == 100
+
+
+class TestRunBatch:
+    """Test per run_batch"""
+
+    @pytest.mark.asyncio
+    async def test_writes_results_and_resumes(self, tmp_path, monkeypatch):
+        calls = []
+
+        async def fake_council(question):
+            calls.append(question)
+            return [{"model": "codex", "response": question}], [], \
+                {"model": "gemini", "response": question.upper()}, {}
+
+        monkeypatch.setattr(batch, "run_full_council", fake_council)
+
+        input_path = tmp_path / "in.jsonl"
+        output_path = tmp_path / "out.jsonl"
+        _write_jsonl(input_path, [
+            {"id": "a", "question": "first"},
+            {"id": "b", "question": "second"},
+        ])
+        # Simula un run precedente interrotto: 'a' completato, riga troncata
+        output_path.write_text(json.dumps({"id": "a", "stage3": {}}) + "\n{\"id\": \"b\", \"sta")
+
+        stats = await batch.run_batch(str(input_path), str(output_path), concurrency=2)
+
+        assert calls == ["second"]
+        assert stats["skipped"] == 1
+        assert stats["processed"] == 1
+        assert batch.load_completed_ids(str(output_path)) == {"a", "b"}
+
+    @pytest.mark.asyncio
+    async def test_failures_are_retried(self, tmp_path, monkeypatch):
+        async def failing_council(question):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(batch, "run_full_council", failing_council)
+
+        input_path = tmp_path / "in.jsonl"
+        output_path = tmp_path / "out.jsonl"
+        _write_jsonl(input_path, [{"question": "only"}])
+
+        stats = await batch.run_batch(str(input_path), str(output_path))
+
+        assert stats["failed"] == 1
+        assert batch.load_completed_ids(str(output_path)) == set()
+
+    @pytest.mark.asyncio
+    async def test_failed_council_runs_are_retried(self, tmp_path, monkeypatch):
+        async def failed_council(question):
+            if question == "members":
+                return [], [], {"model": "error", "response": "All models failed to respond."}, {}
+            return [{"model": "codex", "response": "r"}], [], \
+                {"model": "gemini", "response": "Error: Unable to generate final synthesis."}, {}
+
+        monkeypatch.setattr(batch, "run_full_council", failed_council)
+
+        input_path = tmp_path / "in.jsonl"
+        output_path = tmp_path / "out.jsonl"
+        _write_jsonl(input_path, [{"id": "a", "question": "members"}, {"id": "b", "question": "chairman"}])
+        # Una riga senza id (scritta a mano) non blocca la ripresa
+        output_path.write_text(json.dumps({"stage3": {}}) + "\n")
+
+        stats = await batch.run_batch(str(input_path), str(output_path))
+
+        assert stats["failed"] == 2
+        assert batch.load_completed_ids(str(output_path)) == set()
@@ -0,0 +1,84 @@
+"""
+Test suite per benchmarks.py
+
+Esegui con: pytest backend/tests/test_benchmarks.py -v
+"""
+
+import json
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import benchmarks, storage
+
+
+class TestSampleData:
+    """Test per i dati di esempio dei benchmark"""
+
+    def test_cli_outputs_are_cleaned(self):
+        from backend.cli_bridge import clean_cli_output
+
+        for cli_type in ("gemini", "codex", "claude"):
+            cleaned = clean_cli_output(benchmarks._cli_output(cli_type, 2000), cli_type)
+            assert cleaned == benchmarks._text(2000)
+
+    def test_ranking_text_parses_all_labels(self):
+        from backend.council import parse_ranking_from_text
+
+        labels = benchmarks._labels(26)
+        assert sorted(parse_ranking_from_text(benchmarks._ranking_text(labels))) == labels
+
+
+class TestRunBenchmarks:
+    """Test per run_benchmarks e measure"""
+
+    def test_selection_by_prefix(self):
+        names = benchmarks.select(["ranking", "aggregate.council_5"])
+        assert names == ["ranking.parse_5", "ranking.parse_26", "aggregate.council_5"]
+        assert benchmarks.select() == list(benchmarks.BENCHMARKS)
+
+    def test_storage_benchmarks_use_temp_dir(self):
+        original_data_dir = storage.DATA_DIR
+        results = benchmarks.run_benchmarks(["storage.load_300_turns"], repeat=2, min_time=0.001)
+
+        result = results["storage.load_300_turns"]
+        assert 0 < result["min_seconds"] <= result["median_seconds"]
+        assert result["repeat"] == 2
+        assert storage.DATA_DIR == original_data_dir
+
+
+class TestBaseline:
+    """Test per il confronto con la baseline"""
+
+    def test_compare_statuses(self):
+        baseline = {"a": {"min_seconds": 1.0}, "b": {"min_seconds": 1.0}, "c": {"min_seconds": 1.0}}
+        results = {name: {"min_seconds": value} for name, value in
+                   (("a", 1.1), ("b", 1.5), ("c", 0.5), ("d", 1.0))}
+
+        comparison = benchmarks.compare_to_baseline(results, baseline, threshold=1.25)
+
+        assert comparison["a"]["status"] == "ok"
+        assert comparison["b"]["status"] == "regression"
+        assert comparison["b"]["ratio"] == 1.5
+        assert comparison["c"]["status"] == "improvement"
+        assert comparison["d"]["status"] == "new"
+
+    def test_save_merges_and_loads(self, tmp_path):
+        path = str(tmp_path / "bench" / "baseline.json")
+        assert benchmarks.load_baseline(path) is None
+
+        benchmarks.save_baseline(path, {"a": {"min_seconds": 1.0}})
+        benchmarks.save_baseline(path, {"b": {"min_seconds": 2.0}})
+
+        assert set(benchmarks.load_baseline(path)) == {"a", "b"}
+        assert "python" in json.loads(open(path).read())["environment"]
+
+    def test_regression_exit_code(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "baseline.json")
+        benchmarks.save_baseline(path, {"ranking.parse_5": {"min_seconds": 1e-12}})
+        argv = ["ranking.parse_5", "--baseline", path, "--repeat", "2", "--min-time", "0.001"]
+
+        assert benchmarks.main(argv) == 1
+        assert benchmarks.main(argv + ["--threshold", "1e15"]) == 0
@@ -0,0 +1,119 @@
+"""
+Test suite per budget.py
+
+Esegui con: pytest backend/tests/test_budget.py -v
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import budget, storage
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Storage in una directory temporanea."""
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def profile(tokens=None, cost=None, success=True, prompt_bytes=400, response_bytes=800):
+    """Profilo di timing di una chiamata, con o senza usage riportato dalla CLI."""
+    result = {"wall_seconds": 1.0, "success": success,
+              "cli": {"prompt_bytes": prompt_bytes, "response_bytes": response_bytes}}
+    if tokens is not None:
+        usage = {"input_tokens": tokens - 10, "output_tokens": 10, "total_tokens": tokens}
+        if cost is not None:
+            usage["cost_usd"] = cost
+        result["output"] = {"usage": usage}
+    return result
+
+
+class TestUsage:
+    """Test per il conteggio dei token di un turno"""
+
+    def test_reported_and_estimated_calls(self):
+        usage = budget.turn_usage([
+            {"members": {"claude": profile(1000, 0.02), "gemini": profile(), "codex": profile(success=False)}},
+            {"members": {"claude": profile(500, 0.01)}},
+        ])
+
+        claude = usage["members"]["claude"]
+        assert claude["calls"] == 2
+        assert claude["total_tokens"] == 1500
+        assert claude["cost_usd"] == 0.03
+        assert usage["members"]["gemini"]["estimated_calls"] == 1
+        assert usage["members"]["gemini"]["total_tokens"] == 300
+        assert "codex" not in usage["members"]
+        assert usage["total"]["total_tokens"] == 1800
+
+    def test_record_turn_updates_conversation_and_day(self, data_dir):
+        storage.create_conversation("c1")
+        usage = budget.turn_usage([{"members": {"claude": profile(1000)}}])
+
+        budget.record_turn("c1", usage, day="2026-01-01")
+        budget.record_turn("c1", usage, day="2026-01-01")
+
+        conversation = storage.get_conversation_usage("c1")
+        assert conversation["turns"] == 2
+        assert conversation["members"]["claude"]["total_tokens"] == 2000
+        assert storage.get_daily_usage("2026-01-01")["total"]["total_tokens"] == 2000
+        assert storage.get_daily_usage("2026-01-02") == {}
+        # I contatori giornalieri non compaiono tra le conversazioni
+        assert [c["id"] for c in storage.list_conversations()] == ["c1"]
+
+
+class TestPlan:
+    """Test per la scelta del piano in base ai budget"""
+
+    def spend(self, conversation_tokens=0, daily_members=None):
+        """Conversazione e contatori del giorno con i token indicati."""
+        conversation = {"usage": {"total": {"total_tokens": conversation_tokens}}}
+        members = {m: {"total_tokens": t} for m, t in (daily_members or {}).items()}
+        storage.update_daily_usage("2026-01-01", lambda _: {
+            "total": {"total_tokens": sum(t for t in (daily_members or {}).values())},
+            "members": members
+        })
+        return conversation
+
+    def test_unlimited_is_full(self, data_dir):
+        plan = budget.plan_turn(self.spend(10 ** 9), day="2026-01-01")
+        assert plan == {"plan": "full", "members": ["gemini", "codex", "claude"],
+                        "excluded": [], "ratio": 0.0, "limit": None}
+
+    @pytest.mark.parametrize("tokens, expected", [(700, "full"), (850, "economy"), (990, "minimal")])
+    def test_conversation_budget(self, data_dir, monkeypatch, tokens, expected):
+        monkeypatch.setattr(budget, "BUDGET_CONVERSATION", {"tokens": 1000})
+        plan = budget.plan_turn(self.spend(tokens), day="2026-01-01")
+
+        assert plan["plan"] == expected
+        assert len(plan["members"]) == (1 if expected == "minimal" else 3)
+        if expected != "full":
+            assert plan["limit"] == "conversation_tokens"
+
+    def test_daily_budget(self, data_dir, monkeypatch):
+        monkeypatch.setattr(budget, "BUDGET_DAILY", {"tokens": 1000, "cost_usd": None})
+        plan = budget.plan_turn(self.spend(0, {"gemini": 400, "codex": 450}), day="2026-01-01")
+
+        assert plan["plan"] == "economy"
+        assert plan["limit"] == "daily_tokens"
+
+    def test_member_budget_excludes_members(self, data_dir, monkeypatch):
+        monkeypatch.setattr(budget, "BUDGET_MEMBER_DAILY", {
+            "claude": {"tokens": 100}, "codex": {"tokens": 100}
+        })
+        conversation = self.spend(0, {"claude": 100, "codex": 50})
+
+        plan = budget.plan_turn(conversation, day="2026-01-01")
+        assert plan["plan"] == "full"
+        assert plan["members"] == ["gemini", "codex"]
+        assert plan["excluded"] == ["claude"]
+
+        # Con un solo membro rimasto il turno passa al piano minimo
+        plan = budget.plan_turn(conversation, ["codex", "claude"], day="2026-01-01")
+        assert plan["plan"] == "minimal"
+        assert plan["members"] == ["codex"]
+        assert plan["limit"] == "member_daily"
@@ -0,0 +1,115 @@
+"""
+Test suite per cassette.py (registrazione e replay delle interazioni CLI)
+
+Esegui con: pytest backend/tests/test_cassette.py -v
+"""
+
+import sys
+import os
+import time
+import subprocess
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import cassette, cli_bridge, council
+from backend.cassette import Cassette
+
+CODEX_OUTPUT = """OpenAI Codex v0.65.0 (research preview)
+--------
+workdir: /test
+codex
+The answer is 4
+tokens used
+123"""
+
+
+@pytest.fixture
+def runners(monkeypatch):
+    """CLI finte: registrano le chiamate e rispondono con l'output grezzo."""
+    calls = []
+
+    def make_runner(cli_type):
+        def run(prompt, cwd, timeout):
+            calls.append((cli_type, prompt))
+            if "slow" in prompt:
+                raise subprocess.TimeoutExpired(cli_type, timeout)
+            if "Now provide your evaluation and ranking:" in prompt:
+                stdout = "FINAL RANKING:\n1. Response B\n2. Response A\n3. Response C"
+            elif cli_type == "codex":
+                stdout = CODEX_OUTPUT
+            else:
+                stdout = f"Loaded cached credentials.\nAnswer from {cli_type} #{len(calls)}"
+            return subprocess.CompletedProcess(cli_type, 0, stdout, "")
+        return run
+
+    for cli_type in ("gemini", "codex", "claude"):
+        monkeypatch.setitem(cli_bridge._RUNNERS, cli_type, make_runner(cli_type))
+    yield calls
+    cassette.set_cassette(None)
+
+
+def record(path, prompts):
+    cassette.set_cassette(Cassette(path, "record"))
+    results = [cli_bridge._run_cli_sync(cli_type, prompt, 10) for cli_type, prompt in prompts]
+    cassette.set_cassette(Cassette(path, "replay"))
+    return results
+
+
+class TestReplay:
+    """Test per il replay delle interazioni registrate"""
+
+    def test_round_trip_without_running_clis(self, runners, tmp_path):
+        prompts = [("codex", "q"), ("gemini", "q"), ("gemini", "slow")]
+        recorded = record(str(tmp_path / "c.jsonl"), prompts)
+        runners.clear()
+
+        replayed = [cli_bridge._run_cli_sync(cli_type, prompt, 10) for cli_type, prompt in prompts]
+        assert replayed == recorded
+        assert replayed[0] == "The answer is 4"
+        assert replayed[2].startswith("Error: CLI timeout")
+        assert runners == []
+
+    def test_repeated_prompt_served_in_order(self, runners, tmp_path):
+        record(str(tmp_path / "c.jsonl"), [("gemini", "q"), ("gemini", "q")])
+
+        answers = [cli_bridge._run_cli_sync("gemini", "q", 10) for _ in range(3)]
+        assert answers == ["Answer from gemini #1", "Answer from gemini #2", "Answer from gemini #2"]
+
+    def test_missing_recording_is_an_error(self, runners, tmp_path):
+        record(str(tmp_path / "c.jsonl"), [("gemini", "q")])
+
+        result = cli_bridge._run_cli_sync("claude", "q", 10)
+        assert result.startswith("Error: No cassette recording for claude")
+
+    def test_replay_latency(self, tmp_path):
+        path = str(tmp_path / "c.jsonl")
+        Cassette(path, "record").record(
+            "gemini", "q", subprocess.CompletedProcess("gemini", 0, "ok", ""), duration=0.2
+        )
+
+        started = time.monotonic()
+        assert Cassette(path, "replay", replay_latency=True).replay("gemini", "q", 10).stdout == "ok"
+        assert time.monotonic() - started >= 0.2
+
+        with pytest.raises(subprocess.TimeoutExpired):
+            Cassette(path, "replay", replay_latency=True).replay("gemini", "q", 0.05)
+
+
+class TestPipelineReplay:
+    """Test del council completo servito dalla cassetta"""
+
+    @pytest.mark.asyncio
+    async def test_full_council_is_reproducible(self, runners, tmp_path):
+        path = str(tmp_path / "c.jsonl")
+        cassette.set_cassette(Cassette(path, "record"))
+        recorded = await council.run_full_council("What is 2+2?")
+
+        cassette.set_cassette(Cassette(path, "replay"))
+        runners.clear()
+        replayed = await council.run_full_council("What is 2+2?")
+
+        assert runners == []
+        assert replayed[:3] == recorded[:3]
+        assert replayed[3]["aggregate_rankings"] == recorded[3]["aggregate_rankings"]
@@ -0,0 +1,186 @@
+"""
+Test suite per cli_output.py
+
+Esegui con: pytest backend/tests/test_cli_output.py -v
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import json
+
+from backend.cli_output import create_parser, parse_output, parse_json_output
+
+
+CODEX_PROMPT = "Explain the codex\ncodex\nthinking"
+
+CODEX_OUTPUT = (
+    "OpenAI Codex v0.65.0 (research preview)\n"
+    "--------\n"
+    "workdir: /tmp\n"
+    "model: gpt-5-codex\n"
+    "provider: openai\n"
+    "reasoning effort: high\n"
+    "--------\n"
+    f"user\n{CODEX_PROMPT}\n\n"
+    "thinking\n**Planning**\n"
+    "exec\nbash -lc ls\nsucceeded in 12ms\n"
+    "codex\nA draft that gets replaced\n"
+    "exec\nbash -lc cat README.md\nsucceeded in 8ms\n"
+    "codex\n"
+    "The codex CLI prints:\n"
+    "codex\n"
+    "then the answer.\n"
+    "tokens used\n"
+    "1,234\n"
+)
+
+
+def _feed_in_chunks(cli_type, output, size, prompt=None):
+    parser = create_parser(cli_type, prompt)
+    deltas = [parser.feed(output[i:i + size]) for i in range(0, len(output), size)]
+    deltas.append(parser.close())
+    return parser, deltas
+
+
+class TestCodexParser:
+    """Test per il parser dell'output di Codex"""
+
+    def test_answer_is_last_codex_block(self):
+        text, metadata = parse_output(CODEX_OUTPUT, "codex", CODEX_PROMPT)
+        assert text == "The codex CLI prints:\ncodex\nthen the answer."
+        assert metadata == {
+            "cli_version": "0.65.0",
+            "model": "gpt-5-codex",
+            "provider": "openai",
+            "reasoning_effort": "high",
+            "tokens_used": 1234,
+            "usage": {"total_tokens": 1234},
+        }
+
+    def test_tokens_used_inside_answer_is_text(self):
+        output = "codex\nCount the tokens used\ntokens used\n12\nby the model.\ntokens used\n99\n"
+        text, metadata = parse_output(output, "codex")
+        assert text == "Count the tokens used\ntokens used\n12\nby the model."
+        assert metadata["tokens_used"] == 99
+
+    def test_timestamped_format(self):
+        output = (
+            "[2025-08-20T10:00:00] OpenAI Codex v0.20.0 (research preview)\n--------\n"
+            "model: o3\n--------\n"
+            "[2025-08-20T10:00:00] User instructions:\nhi\n"
+            "[2025-08-20T10:00:05] codex\nHello\n"
+            "[2025-08-20T10:00:06] tokens used: 321\n"
+        )
+        assert parse_output(output, "codex") == ("Hello", {"cli_version": "0.20.0", "model": "o3",
+                                                          "tokens_used": 321, "usage": {"total_tokens": 321}})
+
+    def test_unframed_output_is_kept(self):
+        assert parse_output("just text\nno framing\n", "codex") == ("just text\nno framing", {})
+
+    @pytest.mark.parametrize("size", [1, 2, 5, 17, 64, 4096])
+    def test_chunked_equals_whole(self, size):
+        parser, deltas = _feed_in_chunks("codex", CODEX_OUTPUT, size, CODEX_PROMPT)
+        assert parser.text == parse_output(CODEX_OUTPUT, "codex", CODEX_PROMPT)[0]
+        assert parser.resets == 1
+        assert parser.metadata["tokens_used"] == 1234
+
+
+class TestOtherParsers:
+    """Test per i parser di Gemini, Claude e CLI sconosciute"""
+
+    GEMINI_OUTPUT = "Loaded cached credentials.\nUsing model: gemini-2.5-pro\n\n  Hello\n\nworld  \n\n"
+
+    def test_gemini(self):
+        assert parse_output(self.GEMINI_OUTPUT, "gemini") == ("Hello\n\nworld", {"model": "gemini-2.5-pro"})
+
+    def test_claude_warnings(self):
+        text, metadata = parse_output("\n\nWarning: slow\nNote: beta\nAnswer\n\nWarning: kept\n", "claude")
+        assert text == "Answer\n\nWarning: kept"
+        assert metadata["warnings"] == ["Warning: slow", "Note: beta"]
+
+    def test_unknown_cli_is_stripped(self):
+        assert parse_output("\n  text \n", "other") == ("text", {})
+
+    @pytest.mark.parametrize("size", [1, 3, 8, 1000])
+    def test_streamed_deltas_join_to_answer(self, size):
+        parser, deltas = _feed_in_chunks("gemini", self.GEMINI_OUTPUT, size)
+        assert "".join(deltas) == parser.text == "Hello\n\nworld"
+
+
+class TestJsonOutput:
+    """Test per l'output strutturato (JSON) delle CLI"""
+
+    CLAUDE_RESULT = {
+        "type": "result", "subtype": "success", "is_error": False,
+        "duration_ms": 2500, "duration_api_ms": 2000, "result": "  The answer\n",
+        "total_cost_usd": 0.0123,
+        "usage": {"input_tokens": 10, "cache_creation_input_tokens": 5,
+                  "cache_read_input_tokens": 100, "output_tokens": 50},
+        "modelUsage": {"claude-haiku": {"outputTokens": 3}, "claude-sonnet-4-5": {"outputTokens": 47}},
+    }
+
+    def test_claude_json(self):
+        text, metadata = parse_output(json.dumps(self.CLAUDE_RESULT), "claude")
+        assert text == "The answer"
+        assert metadata["model"] == "claude-sonnet-4-5"
+        assert metadata["usage"] == {"input_tokens": 115, "output_tokens": 50, "cached_input_tokens": 100,
+                                     "total_tokens": 165, "cost_usd": 0.0123}
+        assert (metadata["cli_seconds"], metadata["api_seconds"]) == (2.5, 2.0)
+
+    def test_claude_stream_json_with_thinking(self):
+        events = [
+            {"type": "system", "subtype": "init", "model": "claude-opus"},
+            {"type": "assistant", "message": {"model": "claude-opus", "content": [
+                {"type": "thinking", "thinking": "Let me think"}, {"type": "text", "text": "The answer"}]}},
+            dict(self.CLAUDE_RESULT, modelUsage={}),
+        ]
+        text, metadata = parse_output("".join(json.dumps(e) + "\n" for e in events), "claude")
+        assert text == "The answer"
+        assert metadata["model"] == "claude-opus"
+        assert metadata["reasoning"] == [{"type": "thinking", "text": "Let me think"}]
+
+    def test_claude_error(self):
+        result = dict(self.CLAUDE_RESULT, is_error=True, result="Credit balance is too low")
+        assert parse_output(json.dumps(result), "claude")[1]["error"] == "Credit balance is too low"
+
+    def test_codex_events(self):
+        events = [
+            {"type": "thread.started", "thread_id": "t"},
+            {"type": "item.completed", "item": {"type": "reasoning", "text": "plan"}},
+            {"type": "item.completed", "item": {"type": "command_execution", "command": "ls"}},
+            {"type": "item.completed", "item": {"type": "agent_message", "text": "Done"}},
+            {"type": "turn.completed", "usage": {"input_tokens": 900, "cached_input_tokens": 800,
+                                                 "output_tokens": 20}},
+        ]
+        text, metadata = parse_output("".join(json.dumps(e) + "\n" for e in events), "codex")
+        assert text == "Done"
+        assert metadata["usage"] == {"input_tokens": 900, "output_tokens": 20,
+                                     "cached_input_tokens": 800, "total_tokens": 920}
+        assert metadata["tokens_used"] == 920
+        assert metadata["reasoning"] == [{"type": "reasoning", "text": "plan"}]
+
+    def test_codex_turn_failed(self):
+        output = json.dumps({"type": "turn.failed", "error": {"message": "stream disconnected"}})
+        assert parse_output(output, "codex")[1]["error"] == "stream disconnected"
+
+    def test_gemini_json(self):
+        output = json.dumps({"response": "Hi", "stats": {"models": {
+            "gemini-2.5-flash-lite": {"tokens": {"prompt": 50, "candidates": 2, "total": 52}},
+            "gemini-2.5-pro": {"tokens": {"prompt": 100, "candidates": 10, "thoughts": 30,
+                                          "total": 140, "cached": 40}},
+        }}})
+        text, metadata = parse_output(output, "gemini")
+        assert text == "Hi"
+        assert metadata["model"] == "gemini-2.5-pro"
+        assert metadata["usage"] == {"input_tokens": 150, "output_tokens": 42,
+                                     "cached_input_tokens": 40, "total_tokens": 192}
+
+    def test_text_answer_that_looks_like_json(self):
+        # Una risposta testuale che è JSON non va scambiata per l'output strutturato
+        assert parse_json_output('{"a": 1}', "claude") is None
+        assert parse_output('{"a": 1}\n', "claude") == ('{"a": 1}', {})
+        assert parse_json_output("Loaded cached credentials.\nHi", "gemini") is None
@@ -0,0 +1,68 @@
+"""
+Test suite per __main__.py (comando `python -m backend ask`)
+
+Esegui con: pytest backend/tests/test_command_line.py -v
+"""
+
+import io
+import json
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import loadtest
+from backend.__main__ import main
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="CLI finte via script shell POSIX")
+
+
+@pytest.fixture
+def fake_env(monkeypatch, tmp_path):
+    """CLI finte istantanee, con guasti come "exit 1"; PATH e FAKE_* ripristinati a fine test."""
+    for key in list(os.environ):
+        if key.startswith("FAKE_"):
+            monkeypatch.delenv(key)
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    monkeypatch.setenv("FAKE_CLI_FAILURE_MODES", "exit")
+    monkeypatch.chdir(tmp_path)
+    loadtest.use_fake_clis(latency="0", seed=5)
+
+
+class TestAsk:
+    """Test per output ed exit code di `ask`"""
+
+    def test_answer_on_stdout(self, fake_env, capsys):
+        assert main(["ask", "--quiet", "What is a cache?"]) == 0
+
+        out, err = capsys.readouterr()
+        assert out.strip()
+        assert "Stage" not in out and err == ""
+
+    def test_json_survives_failing_members(self, fake_env, monkeypatch, capsys):
+        monkeypatch.setenv("FAKE_CODEX_FAILURE_RATE", "1")
+
+        assert main(["ask", "--json", "What is a cache?"]) == 0
+
+        out, err = capsys.readouterr()
+        report = json.loads(out)
+        assert [r["model"] for r in report["stage1"]] == ["gemini", "claude"]
+        assert report["stage3"]["response"]
+        assert "CLI error for codex" in err
+
+    def test_exit_codes(self, fake_env, monkeypatch, capsys):
+        monkeypatch.setattr(sys, "stdin", io.StringIO("  \n"))
+        assert main(["ask", "-"]) == 2
+
+        monkeypatch.setenv("FAKE_CLI_FAILURE_RATE", "1")
+        assert main(["ask", "--json", "What is a cache?"]) == 1
+        assert json.loads(capsys.readouterr().out)["stage3"]["model"] == "error"
+
+    @pytest.mark.parametrize("deadline", ["0", "-5", "nan"])
+    def test_deadline_must_be_positive(self, fake_env, capsys, deadline):
+        with pytest.raises(SystemExit) as usage:
+            main(["ask", "--deadline", deadline, "What is a cache?"])
+
+        assert usage.value.code == 2
+        assert "--deadline" in capsys.readouterr().err
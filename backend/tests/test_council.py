@@ -0,0 +1,240 @@
+"""
+Test suite per council.py
+
+Esegui con: pytest backend/tests/test_council.py -v
+"""
+
+import asyncio
+import httpx
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import cli_bridge, council, health, main
+from backend.deadline import Deadline
+
+
+# Latenze simulate: codex è il più veloce, gemini il più lento
+DELAYS = {"gemini": 0.05, "codex": 0.0, "broken": 0.01, "claude": 0.02}
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """Sostituisce query_model con risposte deterministiche e latenze fisse."""
+    async def fake_query(model, messages, timeout=None, deadline=None):
+        await asyncio.sleep(DELAYS.get(model, 0.0))
+        if model == "broken":
+            return None
+        if messages[-1]["content"].endswith("Now provide your evaluation and ranking:"):
+            return {"content": "FINAL RANKING:\n1. Response B\n2. Response A",
+                    "reasoning_details": None}
+        return {"content": f"answer from {model}", "reasoning_details": None,
+                "timing": {"ttfb_seconds": DELAYS.get(model, 0.0), "prompt_bytes": 1}}
+
+    monkeypatch.setattr(cli_bridge, "query_model", fake_query)
+    monkeypatch.setattr(council, "query_model", fake_query)
+
+
+class TestParseRanking:
+    """Test per parse_ranking_from_text"""
+
+    def test_numbered_list(self):
+        text = "Analysis...\nFINAL RANKING:\n1. Response C\n2. Response A\n3. Response B"
+        assert council.parse_ranking_from_text(text) == ["Response C", "Response A", "Response B"]
+
+    def test_fallback_without_header(self):
+        text = "I prefer Response B over Response A"
+        assert council.parse_ranking_from_text(text) == ["Response B", "Response A"]
+
+
+class TestIncrementalStages:
+    """Test per gli eventi incrementali di Stage 1 e Stage 2"""
+
+    @pytest.mark.asyncio
+    async def test_stage1_yields_in_completion_order(self, fake_models):
+        order = [model async for model, _, _ in council.stage1_iter_responses("q")]
+        assert order == ["codex", "claude", "gemini"]
+
+    @pytest.mark.asyncio
+    async def test_stage1_results_keep_council_order(self, fake_models):
+        results = await council.stage1_collect_responses("q")
+        assert [r["model"] for r in results] == ["gemini", "codex", "claude"]
+
+    @pytest.mark.asyncio
+    async def test_stream_emits_member_events(self, fake_models):
+        events = [e async for e in council.stream_council("q", None, ["gemini", "broken", "codex"])]
+        types = [e["type"] for e in events]
+
+        assert types[0] == "stage1_start"
+        members = [e for e in events if e["type"] == "stage1_member_complete"]
+        assert [e["model"] for e in members] == ["codex", "broken", "gemini"]
+        assert [e["success"] for e in members] == [True, False, True]
+        assert all(e["duration_seconds"] >= 0 for e in members)
+
+        # Gli eventi di stage restano invariati e arrivano dopo quelli dei membri
+        assert types.index("stage1_complete") > types.index("stage1_member_complete")
+        stage2_start = next(e for e in events if e["type"] == "stage2_start")
+        assert stage2_start["metadata"]["label_to_model"] == {
+            "Response A": "gemini", "Response B": "codex"
+        }
+        assert types.count("stage2_member_complete") == 3
+        assert types[-1] == "stage3_complete"
+
+    @pytest.mark.asyncio
+    async def test_run_full_council(self, fake_models):
+        stage1, stage2, stage3, metadata = await council.run_full_council("q")
+        assert len(stage1) == 3
+        assert len(stage2) == 3
+        assert stage3["response"] == "answer from gemini"
+        assert metadata["aggregate_rankings"][0]["model"] == "codex"
+
+    @pytest.mark.asyncio
+    async def test_timing_profile(self, fake_models):
+        _, _, _, metadata = await council.run_full_council("q", None, ["gemini", "broken", "codex"])
+        timing = metadata["timing"]
+
+        assert set(timing) == {"stage1", "stage2", "stage3", "total_seconds"}
+        stage1 = timing["stage1"]["members"]
+        assert stage1["gemini"]["cli"]["ttfb_seconds"] == 0.05
+        assert stage1["gemini"]["wall_seconds"] >= 0.05
+        assert stage1["broken"] == {"wall_seconds": stage1["broken"]["wall_seconds"], "success": False}
+        assert timing["stage3"]["members"]["gemini"]["success"] is True
+        assert timing["total_seconds"] >= timing["stage1"]["wall_seconds"]
+
+
+class TestDeadline:
+    """Test per la degradazione in base alla deadline"""
+
+    @pytest.mark.asyncio
+    async def test_generous_deadline_runs_everything(self, fake_models):
+        _, stage2, stage3, metadata = await council.run_full_council("q", deadline=Deadline(600))
+        assert len(stage2) == 3
+        assert stage3["model"] == "gemini"
+        assert metadata["deadline"]["degraded"] == []
+
+    @pytest.mark.asyncio
+    async def test_short_deadline_skips_ranking_and_uses_fast_chairman(self, fake_models, monkeypatch):
+        monkeypatch.setattr(council, "FAST_CHAIRMAN_MODEL", "claude")
+        events = [e async for e in council.stream_council("q", deadline=Deadline(40))]
+        types = [e["type"] for e in events]
+
+        assert "stage2_skipped" in types
+        assert "stage2_start" not in types
+        stage3 = events[-1]
+        assert stage3["data"]["model"] == "claude"
+        assert stage3["metadata"]["deadline"]["degraded"] == ["stage2_skipped", "fast_chairman"]
+
+    @pytest.mark.asyncio
+    async def test_exhausted_deadline_returns_best_answer(self, fake_models, monkeypatch):
+        monkeypatch.setattr(council, "CHAIRMAN_FLOOR_SECONDS", 1000)
+        _, _, stage3, metadata = await council.run_full_council("q", deadline=Deadline(600))
+        assert stage3 == {"model": "codex", "response": "answer from codex"}
+        assert "chairman_skipped" in metadata["deadline"]["degraded"]
+
+
+    @pytest.mark.asyncio
+    async def test_api_rejects_non_positive_deadlines(self):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for endpoint in ("message", "message/stream"):
+                for seconds in (0, -5):
+                    response = await client.post(f"/api/conversations/c1/{endpoint}",
+                                                 json={"content": "q", "deadline_seconds": seconds})
+                    assert response.status_code == 422
+
+
+class TestBudgetPlan:
+    """Test per i piani ridotti scelti in base al budget"""
+
+    @pytest.mark.asyncio
+    async def test_economy_skips_ranking(self, fake_models):
+        plan = {"plan": "economy", "members": ["gemini", "codex"], "excluded": ["claude"],
+                "ratio": 0.85, "limit": "daily_tokens"}
+        events = [e async for e in council.stream_council("q", plan=plan)]
+
+        skipped = next(e for e in events if e["type"] == "stage2_skipped")
+        assert skipped["reason"] == "budget"
+        stage3 = events[-1]
+        assert stage3["data"]["model"] == "gemini"
+        assert stage3["metadata"]["budget"] == plan
+        assert set(stage3["metadata"]["usage"]["members"]) == {"gemini", "codex"}
+
+    @pytest.mark.asyncio
+    async def test_minimal_returns_single_answer(self, fake_models):
+        plan = {"plan": "minimal", "members": ["claude"], "excluded": ["gemini", "codex"],
+                "ratio": 0.99, "limit": "conversation_tokens"}
+        stage1, stage2, stage3, metadata = await council.run_full_council("q", plan=plan)
+
+        assert [r["model"] for r in stage1] == ["claude"]
+        assert stage2 == []
+        assert stage3 == {"model": "claude", "response": "answer from claude"}
+        assert metadata["usage"]["total"]["calls"] == 1
+
+
+class TestChairmanSelection:
+    """Test per la policy di selezione del chairman e il failover"""
+
+    @pytest.fixture(autouse=True)
+    def clean_health(self):
+        health.reset()
+        yield
+        health.reset()
+
+    def test_fixed_policy_puts_chairman_first(self):
+        candidates = council.select_chairman_candidates(["codex", "gemini", "claude"], policy="fixed")
+        assert candidates[0] == council.CHAIRMAN_MODEL
+        assert sorted(candidates) == ["claude", "codex", "gemini"]
+
+    def test_fastest_policy_uses_latency(self):
+        health.record_call("gemini", 30.0, True)
+        health.record_call("claude", 5.0, True)
+        candidates = council.select_chairman_candidates(policy="fastest")
+        assert candidates == ["claude", "gemini", "codex"]
+
+    def test_top_ranked_policy(self):
+        rankings = [{"model": "claude", "average_rank": 1.0}, {"model": "codex", "average_rank": 2.0}]
+        candidates = council.select_chairman_candidates(aggregate_rankings=rankings, policy="top_ranked")
+        assert candidates == ["claude", "codex", "gemini"]
+
+    def test_unhealthy_models_go_last(self):
+        for _ in range(council.health.HEALTH_MAX_CONSECUTIVE_FAILURES):
+            health.record_call("gemini", 1.0, False)
+        candidates = council.select_chairman_candidates(preferred="gemini", policy="fixed")
+        assert candidates[-1] == "gemini"
+
+    @pytest.mark.asyncio
+    async def test_failover_to_next_candidate(self, fake_models, monkeypatch):
+        stage1 = [{"model": "codex", "response": "answer from codex"}]
+        result, meta = await council.stage3_with_failover("q", stage1, [], ["broken", "claude"])
+        assert result["model"] == "claude"
+        assert [a["success"] for a in meta["attempts"]] == [False, True]
+        assert meta["fallback"] is False
+
+    @pytest.mark.asyncio
+    async def test_all_chairmen_fail_returns_best_answer(self, fake_models):
+        stage1 = [{"model": "codex", "response": "answer from codex"}]
+        result, meta = await council.stage3_with_failover("q", stage1, [], ["broken"])
+        assert result == {"model": "codex", "response": "answer from codex"}
+        assert meta["fallback"] is True
+
+
+class TestLocalTitle:
+    """Test per generate_local_title"""
+
+    def test_keywords_in_order(self):
+        title = council.generate_local_title("What is the CAP theorem and how does it apply to MongoDB?")
+        assert title == "CAP Theorem Apply MongoDB"
+
+    def test_italian_stop_words(self):
+        title = council.generate_local_title("Come funziona il garbage collector di Python?")
+        assert title == "Funziona Garbage Collector Python"
+
+    def test_at_most_five_words(self):
+        title = council.generate_local_title("alpha beta gamma delta epsilon zeta eta theta")
+        assert len(title.split()) == 5
+
+    def test_fallback(self):
+        assert council.generate_local_title("?? !!") == "New Conversation"
+        assert council.generate_local_title("") == "New Conversation"
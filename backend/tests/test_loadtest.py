@@ -0,0 +1,56 @@
+"""
+Test suite per loadtest.py
+
+Esegui con: pytest backend/tests/test_loadtest.py -v
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import loadtest, storage
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="CLI finte via script shell POSIX")
+
+
+@pytest.fixture
+def fake_env(monkeypatch):
+    """CLI finte veloci e deterministiche; PATH e FAKE_* ripristinati a fine test."""
+    for key in list(os.environ):
+        if key.startswith("FAKE_"):
+            monkeypatch.delenv(key)
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    loadtest.use_fake_clis(latency="0.05", seed=7)
+
+
+class TestRunLoadTest:
+    """Test per run_load_test"""
+
+    @pytest.mark.asyncio
+    async def test_mixed_endpoints_report(self, fake_env):
+        original_data_dir = storage.DATA_DIR
+        report = await loadtest.run_load_test(users=2, turns=1, endpoint="mixed")
+
+        assert report["turns"] == {"completed": 2, "failed": 0}
+        assert report["turns_per_second"] > 0
+        # Un utente per endpoint
+        assert report["latency_seconds"]["message"]["p50"] > 0
+        assert report["latency_seconds"]["stream"]["p50"] > 0
+        assert 0 < report["first_event_seconds"]["max"] <= report["latency_seconds"]["stream"]["max"]
+        for stage in loadtest.STAGES:
+            assert report["stage_seconds"][stage]["p50"] > 0
+        assert report["config"]["fake_cli_settings"]["FAKE_CLI_LATENCY"] == "0.05"
+        assert set(report["event_loop_lag_ms"]) == {"p50", "p95", "p99", "max"}
+        assert report["rss_bytes"]["peak"] >= report["rss_bytes"]["start"]
+        # Le conversazioni finiscono in una directory temporanea
+        assert storage.DATA_DIR == original_data_dir
+
+    @pytest.mark.asyncio
+    async def test_failed_turns_are_counted(self, fake_env, monkeypatch):
+        monkeypatch.setenv("FAKE_CLI_FAILURE_RATE", "1")
+        report = await loadtest.run_load_test(users=1, turns=1, endpoint="stream")
+
+        assert report["turns"] == {"completed": 0, "failed": 1}
+        assert report["errors"]
@@ -0,0 +1,100 @@
+"""
+Test suite per memory.py
+
+Esegui con: pytest backend/tests/test_memory.py -v
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import memory, storage
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Isola lo storage in una directory temporanea."""
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _add_turn(conversation_id, question, answer):
+    storage.add_user_message(conversation_id, question)
+    storage.add_assistant_message(
+        conversation_id, [], [], {"model": "gemini", "response": answer}
+    )
+
+
+class TestBuildContextMessages:
+    """Test per build_context_messages"""
+
+    def test_empty_conversation(self, data_dir):
+        conversation = storage.create_conversation("c1")
+        assert memory.build_context_messages(conversation) == []
+
+    def test_tail_uses_final_answer(self, data_dir):
+        storage.create_conversation("c1")
+        _add_turn("c1", "What is X?", "X is Y.")
+        context = memory.build_context_messages(storage.get_conversation("c1"))
+        assert context == [
+            {"role": "user", "content": "What is X?"},
+            {"role": "assistant", "content": "X is Y."},
+        ]
+
+    def test_summary_replaces_folded_messages(self, data_dir):
+        storage.create_conversation("c1")
+        _add_turn("c1", "old question", "old answer")
+        _add_turn("c1", "new question", "new answer")
+        storage.update_conversation_memory("c1", "User asked about old things.", 2)
+
+        context = memory.build_context_messages(storage.get_conversation("c1"))
+        assert context[0]["role"] == "system"
+        assert "User asked about old things." in context[0]["content"]
+        assert [m["content"] for m in context[1:]] == ["new question", "new answer"]
+
+
+class TestUpdateConversationMemory:
+    """Test per update_conversation_memory"""
+
+    @pytest.mark.asyncio
+    async def test_below_threshold_does_not_summarize(self, data_dir, monkeypatch):
+        async def fail_query(*args, **kwargs):
+            raise AssertionError("should not be called")
+
+        monkeypatch.setattr(memory, "query_model", fail_query)
+        storage.create_conversation("c1")
+        _add_turn("c1", "short", "short")
+
+        assert await memory.update_conversation_memory("c1") is False
+
+    @pytest.mark.asyncio
+    async def test_above_threshold_folds_all_but_recent(self, data_dir, monkeypatch):
+        async def fake_query(model, messages, timeout=120.0):
+            return {"content": "rolling summary", "reasoning_details": None}
+
+        monkeypatch.setattr(memory, "query_model", fake_query)
+        monkeypatch.setattr(memory, "MEMORY_TAIL_THRESHOLD_CHARS", 10)
+        storage.create_conversation("c1")
+        _add_turn("c1", "first question", "first answer")
+        _add_turn("c1", "second question", "second answer")
+
+        assert await memory.update_conversation_memory("c1") is True
+        state = storage.get_conversation_memory("c1")
+        assert state["summary"] == "rolling summary"
+        assert state["summarized_count"] == 4 - memory.MEMORY_KEEP_RECENT_MESSAGES
+
+    @pytest.mark.asyncio
+    async def test_failed_summary_keeps_tail(self, data_dir, monkeypatch):
+        async def failing_query(model, messages, timeout=120.0):
+            return None
+
+        monkeypatch.setattr(memory, "query_model", failing_query)
+        monkeypatch.setattr(memory, "MEMORY_TAIL_THRESHOLD_CHARS", 10)
+        storage.create_conversation("c1")
+        _add_turn("c1", "first question", "first answer")
+        _add_turn("c1", "second question", "second answer")
+
+        assert await memory.update_conversation_memory("c1") is False
+        assert storage.get_conversation_memory("c1")["summarized_count"] == 0
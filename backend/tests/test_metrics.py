@@ -0,0 +1,52 @@
+"""
+Test suite per metrics.py
+
+Esegui con: pytest backend/tests/test_metrics.py -v
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestExposition:
+    """Test per il formato di esposizione Prometheus"""
+
+    def test_counter_with_labels(self):
+        registry = Registry()
+        calls = registry.register(Counter("calls_total", "Calls.", ["cli", "outcome"]))
+        calls.inc(cli="gemini", outcome="success")
+        calls.inc(2, cli="gemini", outcome="success")
+
+        text = registry.render()
+        assert "# TYPE calls_total counter" in text
+        assert 'calls_total{cli="gemini",outcome="success"} 3' in text
+
+    def test_gauge_track(self):
+        registry = Registry()
+        in_flight = registry.register(Gauge("in_flight", "Running.", ["cli"]))
+        with in_flight.track(cli="codex"):
+            assert in_flight.get(cli="codex") == 1
+        assert in_flight.get(cli="codex") == 0
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        latency = registry.register(Histogram("latency_seconds", "Latency.", ["cli"], buckets=(1, 5)))
+        for value in (0.5, 3, 3, 10):
+            latency.observe(value, cli="claude")
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{cli="claude",le="1"} 1' in text
+        assert 'latency_seconds_bucket{cli="claude",le="5"} 3' in text
+        assert 'latency_seconds_bucket{cli="claude",le="+Inf"} 4' in text
+        assert 'latency_seconds_sum{cli="claude"} 16.5' in text
+        assert 'latency_seconds_count{cli="claude"} 4' in text
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        counter = registry.register(Counter("c_total", "C.", ["model"]))
+        counter.inc(model='we"ird\\')
+        assert 'c_total{model="we\\"ird\\\\"} 1' in registry.render()
@@ -0,0 +1,206 @@
+"""
+Test suite per multiplex.py (endpoint WebSocket /api/ws)
+
+Esegui con: pytest backend/tests/test_multiplex.py -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from backend import admission, loadtest, main, multiplex, storage
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Client di test dell'API, con lo storage in una directory temporanea."""
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path / "data"))
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def fake_council(monkeypatch):
+    """Council finto: ogni stage dura `delay` secondi; annota i turni interrotti."""
+    state = {"delay": 0.05, "interrupted": []}
+
+    async def stream(content, history=None, deadline=None, plan=None):
+        try:
+            for stage in ("stage1", "stage2"):
+                await asyncio.sleep(state["delay"])
+                yield {"type": f"{stage}_complete", "data": [], "metadata": {}}
+            yield {"type": "stage3_complete", "data": {"model": "gemini", "response": f"re: {content}"}}
+        except asyncio.CancelledError:
+            state["interrupted"].append(content)
+            raise
+
+    monkeypatch.setattr(main, "stream_council", stream)
+    return state
+
+
+def new_conversation(client):
+    return client.post("/api/conversations", json={}).json()["id"]
+
+
+def receive_until(socket, done):
+    """Riceve frame finché `done(frame)` non è vero; ritorna tutti i frame ricevuti."""
+    frames = []
+    while not frames or not done(frames[-1]):
+        frames.append(socket.receive_json())
+    return frames
+
+
+class TestCouncilSocket:
+    """Test per turni multiplexati, sottoscrizioni e cancellazione"""
+
+    def test_concurrent_turns_on_one_socket(self, client, fake_council):
+        first, second = new_conversation(client), new_conversation(client)
+
+        with client.websocket_connect("/api/ws") as socket:
+            socket.send_json({"op": "run", "turn": "a", "conversation_id": first, "content": "one", "fresh": True})
+            socket.send_json({"op": "run", "turn": "b", "conversation_id": second, "content": "two", "fresh": True})
+            frames = []
+            while sum(f["type"] == "complete" for f in frames) < 2:
+                frames.append(socket.receive_json())
+
+        by_turn = {turn: [f for f in frames if f["turn"] == turn] for turn in ("a", "b")}
+        assert {f["conversation_id"] for f in by_turn["a"]} == {first}
+        assert by_turn["b"][-1]["type"] == "complete"
+        answer = next(f for f in by_turn["b"] if f["type"] == "stage3_complete")
+        assert answer["data"]["response"] == "re: two"
+        # I due turni si sono sovrapposti sulla stessa connessione
+        types = [(f["turn"], f["type"]) for f in frames]
+        assert types.index(("b", "stage1_complete")) < types.index(("a", "complete"))
+        assert len(client.get(f"/api/conversations/{second}").json()["messages"]) == 2
+
+    def test_subscribers_follow_other_connections(self, client, fake_council):
+        conversation = new_conversation(client)
+
+        with client.websocket_connect("/api/ws") as watcher, client.websocket_connect("/api/ws") as runner:
+            watcher.send_json({"op": "subscribe", "conversation_id": conversation})
+            watcher.send_json({"op": "ping"})
+            assert watcher.receive_json() == {"type": "pong"}
+
+            runner.send_json({"op": "run", "turn": "t1", "conversation_id": conversation, "content": "q"})
+            ran = receive_until(runner, lambda f: f["type"] == "complete")
+            seen = receive_until(watcher, lambda f: f["type"] == "complete")
+
+        assert [f["type"] for f in seen] == [f["type"] for f in ran]
+        assert all(f["turn"] == "t1" for f in seen)
+
+    def test_cancel_stops_the_turn(self, client, fake_council):
+        fake_council["delay"] = 30
+        conversation = new_conversation(client)
+
+        with client.websocket_connect("/api/ws") as socket:
+            socket.send_json({"op": "run", "turn": "slow", "conversation_id": conversation, "content": "q"})
+            receive_until(socket, lambda f: f["type"] == "title_complete")
+            socket.send_json({"op": "cancel", "turn": "slow"})
+            frames = receive_until(socket, lambda f: f["type"] == "cancelled")
+
+        assert frames[-1] == {"turn": "slow", "conversation_id": conversation, "type": "cancelled"}
+        assert fake_council["interrupted"] == ["q"]
+        assert admission.get_scheduler().running == 0
+
+    def test_failed_title_keeps_the_answer(self, client, fake_council, monkeypatch):
+        async def failing_title(content):
+            raise RuntimeError("title CLI down")
+
+        monkeypatch.setattr(main, "generate_conversation_title", failing_title)
+        monkeypatch.setattr(main, "TITLE_LLM_REFINEMENT", True)
+        conversation = new_conversation(client)
+
+        with client.websocket_connect("/api/ws") as socket:
+            socket.send_json({"op": "run", "turn": "t", "conversation_id": conversation, "content": "q"})
+            frames = receive_until(socket, lambda f: f["type"] in ("complete", "error"))
+
+        assert frames[-1]["type"] == "complete"
+        # Solo il titolo locale, annunciato prima degli stage
+        assert [f["type"] for f in frames].count("title_complete") == 1
+        assert len(client.get(f"/api/conversations/{conversation}").json()["messages"]) == 2
+
+    def test_errors(self, client, fake_council):
+        with client.websocket_connect("/api/ws") as socket:
+            socket.send_json({"op": "run", "turn": "x", "conversation_id": "missing", "content": "q"})
+            assert socket.receive_json()["message"] == "Conversation not found"
+            socket.send_text("not json")
+            assert socket.receive_json()["type"] == "error"
+            socket.send_json({"op": "fly"})
+            assert "fly" in socket.receive_json()["message"]
+            socket.send_bytes(b"\x00\x01")
+            assert "binary" in socket.receive_json()["message"]
+            socket.send_json({"op": "ping"})
+            assert socket.receive_json() == {"type": "pong"}
+
+    @pytest.mark.asyncio
+    async def test_slow_subscribers_are_dropped(self, monkeypatch):
+        monkeypatch.setattr(multiplex, "OUTBOX_MAX_FRAMES", 3)
+        slow = multiplex.CouncilConnection(None, None)
+        multiplex.subscribe("c1", slow)
+        slow.subscriptions.add("c1")
+
+        for n in range(5):
+            multiplex.publish("c1", "t1", {"type": "stage1_member_complete", "n": n})
+
+        assert slow.overflowed
+        assert slow.outbox.qsize() == 3
+        assert "c1" not in multiplex._subscribers
+
+
+@pytest.mark.skipif(sys.platform == "win32" or not os.path.isdir("/proc/self"),
+                    reason="CLI finte POSIX e stato dei processi via /proc")
+def test_cancel_kills_the_clis(client, monkeypatch, tmp_path):
+    """Annullare un turno sul WebSocket termina i processi delle CLI del council."""
+    for key in list(os.environ):
+        if key.startswith("FAKE_"):
+            monkeypatch.delenv(key)
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    loadtest.use_fake_clis(latency="30")
+    pids = tmp_path / "pids"
+    pids.mkdir()
+    monkeypatch.setenv("FAKE_CLI_PID_DIR", str(pids))
+    conversation = new_conversation(client)
+
+    def running(pid):
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+        except FileNotFoundError:
+            return False
+
+    with client.websocket_connect("/api/ws") as socket:
+        socket.send_json({"op": "run", "turn": "t", "conversation_id": conversation,
+                          "content": "q", "fresh": True})
+        deadline = time.monotonic() + 10
+        while len(os.listdir(pids)) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        started = [int(pid) for pid in os.listdir(pids)]
+        assert len(started) == 3
+
+        socket.send_json({"op": "cancel", "turn": "t"})
+        receive_until(socket, lambda f: f["type"] == "cancelled")
+
+    deadline = time.monotonic() + 3
+    while any(running(pid) for pid in started) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not any(running(pid) for pid in started)
+
+
+class TestOrigin:
+    """Test per il controllo dell'Origin del WebSocket"""
+
+    def test_foreign_pages_are_refused(self, client):
+        with pytest.raises(WebSocketDisconnect) as refused:
+            with client.websocket_connect("/api/ws", headers={"Origin": "https://evil.example"}) as socket:
+                socket.send_json({"op": "ping"})
+                socket.receive_json()
+        assert refused.value.code == 1008
+
+        with client.websocket_connect("/api/ws", headers={"Origin": main.cors_origins[0]}) as socket:
+            socket.send_json({"op": "ping"})
+            assert socket.receive_json() == {"type": "pong"}
@@ -0,0 +1,90 @@
+"""
+Test suite per preflight.py
+
+Esegui con: pytest backend/tests/test_preflight.py -v
+"""
+
+import httpx
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import cli_bridge, loadtest, main, preflight
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="CLI finte via script shell POSIX")
+
+
+@pytest.fixture
+def fake_env(monkeypatch, tmp_path):
+    """CLI finte, HOME vuota e nessuna chiave API; PATH e FAKE_* ripristinati a fine test."""
+    for key in list(os.environ):
+        if key.startswith("FAKE_") or key.endswith("_API_KEY"):
+            monkeypatch.delenv(key)
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    monkeypatch.setenv("HOME", str(tmp_path))
+    loadtest.use_fake_clis(latency="0", seed=3)
+    return tmp_path
+
+
+class TestPreflight:
+    """Test per i controlli delle CLI all'avvio"""
+
+    @pytest.mark.asyncio
+    async def test_ready_clis(self, fake_env, monkeypatch):
+        os.makedirs(fake_env / ".codex")
+        (fake_env / ".codex" / "auth.json").write_text("{}")
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "sk-test")
+
+        report = await preflight.run(["gemini", "codex", "claude"])
+
+        assert report["status"] == "ok"
+        assert report["clis"]["claude"]["version"] == "claude 0.0.0-fake"
+        assert report["clis"]["gemini"]["path"].endswith(os.path.join("fake_cli", "gemini"))
+        assert report["clis"]["gemini"]["credentials"] is None
+        assert report["clis"]["codex"]["credentials"] == "~/.codex/auth.json"
+        assert report["clis"]["claude"]["credentials"] == "$ANTHROPIC_API_KEY"
+        assert preflight.get_report() == report
+
+    @pytest.mark.asyncio
+    async def test_missing_and_broken_clis(self, fake_env, monkeypatch):
+        broken = fake_env / "bin"
+        broken.mkdir()
+        (broken / "codex").write_text("#!/bin/sh\necho 'codex: not logged in' >&2\nexit 1\n")
+        (broken / "codex").chmod(0o755)
+        monkeypatch.setenv("PATH", str(broken) + os.pathsep + os.environ["PATH"])
+
+        report = await preflight.run(["codex", "mistral"])
+
+        assert report["status"] == "degraded"
+        assert report["clis"]["codex"]["error"] == "codex: not logged in"
+        assert report["clis"]["mistral"] == {"path": None, "version": None, "credentials": None,
+                                             "ready": False, "error": "not found in PATH"}
+
+    @pytest.mark.asyncio
+    async def test_warmup(self, fake_env, monkeypatch):
+        monkeypatch.setenv("FAKE_CODEX_FAILURE_RATE", "1")
+
+        report = await preflight.run(["gemini", "codex"], warmup=True)
+
+        assert report["clis"]["gemini"]["warmup"]["success"] is True
+        assert report["clis"]["gemini"]["ready"] is True
+        assert report["clis"]["codex"]["warmup"] == {"success": False, "seconds": None}
+        assert report["clis"]["codex"]["ready"] is False
+        assert report["status"] == "degraded"
+
+    def test_cli_paths_follow_path_changes(self, fake_env, monkeypatch):
+        assert cli_bridge._find_cli_path("claude") is not None
+        monkeypatch.setenv("PATH", str(fake_env))
+        assert cli_bridge._find_cli_path("claude") is None
+
+    @pytest.mark.asyncio
+    async def test_health_endpoint(self, fake_env):
+        await preflight.run(["claude"])
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://council") as client:
+            report = (await client.get("/health")).json()
+
+        assert report["status"] == "ok"
+        assert list(report["clis"]) == ["claude"]
@@ -0,0 +1,159 @@
+"""
+Test suite per remote.py e worker.py
+
+Esegui con: pytest backend/tests/test_remote.py -v
+"""
+
+import asyncio
+import httpx
+import pytest
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import cli_bridge, health, loadtest, remote, worker
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="CLI finte via script shell POSIX")
+
+
+@pytest.fixture
+def fake_env(monkeypatch):
+    """CLI finte veloci e deterministiche; PATH e FAKE_* ripristinati a fine test."""
+    for key in list(os.environ):
+        if key.startswith("FAKE_"):
+            monkeypatch.delenv(key)
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    loadtest.use_fake_clis(latency="0.2", seed=7)
+
+
+@pytest.fixture
+def agents():
+    """Configura dei worker agent in-process (un'app per agente) e li rimuove a fine test."""
+    def configure(*names, broken=()):
+        transports = {f"http://{name}": httpx.ASGITransport(app=worker.create_app(name)) for name in names}
+        for name in broken:
+            def refuse(request):
+                raise httpx.ConnectError("connection refused", request=request)
+            transports[f"http://{name}"] = httpx.MockTransport(refuse)
+        remote.set_workers(list(transports), transports)
+        return remote.get_pool()
+
+    yield configure
+    remote.set_workers(None)
+
+
+class TestWorkerPool:
+    """Test per bilanciamento, failover e capacità dei worker"""
+
+    @pytest.mark.asyncio
+    async def test_calls_are_balanced_by_free_slots(self, fake_env, agents):
+        agents("agent-1", "agent-2")
+        messages = [{"role": "user", "content": "q"}]
+
+        responses = await asyncio.gather(*(cli_bridge.query_model("claude", messages) for _ in range(4)))
+
+        workers = sorted(r["timing"]["worker"] for r in responses)
+        assert workers == ["agent-1", "agent-1", "agent-2", "agent-2"]
+        assert all(r["usage"]["output_tokens"] > 0 for r in responses)
+        assert all(r["timing"]["worker_seconds"] >= 0.2 for r in responses)
+
+    @pytest.mark.asyncio
+    async def test_busy_agents_queue_calls(self, fake_env, agents):
+        pool = agents("agent-1")
+        await pool.refresh()
+        pool.workers[0].capacity["claude"] = 1
+
+        messages = [{"role": "user", "content": "q"}]
+        responses = await asyncio.gather(*(cli_bridge.query_model("claude", messages) for _ in range(2)))
+
+        queued = max(r["timing"]["queue_seconds"] for r in responses)
+        assert queued >= 0.15
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_counts_against_the_timeout(self, fake_env, agents, monkeypatch):
+        monkeypatch.setenv("FAKE_CLI_LATENCY", "1.5")
+        pool = agents("agent-1")
+        await pool.refresh()
+        pool.workers[0].capacity["claude"] = 1
+        health.reset()
+        messages = [{"role": "user", "content": "q"}]
+
+        async def timed(timeout=None):
+            started = time.monotonic()
+            response = await cli_bridge.query_model("claude", messages, timeout=timeout)
+            return response, time.monotonic() - started
+
+        (first, _), (second, waited), (_, outcome, info) = await asyncio.gather(
+            timed(), timed(timeout=0.1), pool.query("claude", "claude", "q", timeout=0.1)
+        )
+
+        # Le altre chiamate esauriscono il timeout in coda, senza aspettare la prima
+        assert first is not None and second is None
+        assert waited < 0.6
+        assert outcome == "timeout" and info["worker"] is None
+        assert 0.05 < info["queue_seconds"] < 0.6
+        # La latenza registrata è quella della CLI sul worker, non della coda
+        assert health.get_latency("claude") == pytest.approx(first["timing"]["worker_seconds"], abs=1e-3)
+
+    @pytest.mark.asyncio
+    async def test_unreachable_agent_fails_over(self, fake_env, agents):
+        pool = agents("agent-1", broken=["agent-down"])
+        # Finché non viene controllato, l'agente guasto sembra sano
+        await pool.refresh()
+        pool.workers[1].healthy = True
+        pool.workers[1].capacity = {"gemini": 10}
+
+        response = await cli_bridge.query_model("gemini", [{"role": "user", "content": "q"}])
+
+        assert response["timing"]["worker"] == "agent-1"
+        status = {s["url"]: s for s in pool.status()}
+        assert status["http://agent-down"]["healthy"] is False
+        assert "ConnectError" in status["http://agent-down"]["error"]
+
+    @pytest.mark.asyncio
+    async def test_no_healthy_agent(self, fake_env, agents):
+        agents(broken=["agent-down"])
+        assert await cli_bridge.query_model("codex", [{"role": "user", "content": "q"}]) is None
+
+
+class TestWorkerApp:
+    """Test per l'API del worker agent"""
+
+    @pytest.mark.asyncio
+    async def test_health_reports_capacity(self, fake_env):
+        transport = httpx.ASGITransport(app=worker.create_app("agent-1"))
+        async with httpx.AsyncClient(transport=transport, base_url="http://agent") as client:
+            report = (await client.get("/health")).json()
+
+        assert report["name"] == "agent-1"
+        assert report["capacity"] == cli_bridge.CLI_MAX_CONCURRENCY
+        assert report["clis"] == {"gemini": True, "codex": True, "claude": True}
+        assert report["in_flight"] == {"gemini": 0, "codex": 0, "claude": 0}
+
+    @pytest.mark.asyncio
+    async def test_token_is_required(self, fake_env):
+        transport = httpx.ASGITransport(app=worker.create_app("agent-1", token="s3cret"))
+        async with httpx.AsyncClient(transport=transport, base_url="http://agent") as client:
+            anonymous = await client.get("/health")
+            wrong = await client.post("/query", json={"model": "claude", "messages": []},
+                                      headers={"Authorization": "Bearer nope"})
+
+        assert anonymous.status_code == 401
+        assert wrong.status_code == 401
+
+        with_token = remote.RemoteWorker("http://agent-1", transport, token="s3cret")
+        without = remote.RemoteWorker("http://agent-1", transport, token=None)
+        await with_token.check()
+        await without.check()
+        assert with_token.healthy is True
+        assert without.healthy is False and "401" in without.error
+
+    def test_refuses_public_address_without_token(self, monkeypatch):
+        monkeypatch.setattr(worker, "CLI_WORKER_TOKEN", None)
+        args = type("Args", (), {"uds": None, "host": "0.0.0.0", "port": None, "name": None})()
+
+        assert worker.run(args) == 2
+        assert worker.is_loopback("127.0.0.1") and worker.is_loopback("::1")
+        assert not worker.is_loopback("0.0.0.0")
@@ -0,0 +1,86 @@
+"""
+Test suite per resources.py
+
+Esegui con: pytest backend/tests/test_resources.py -v
+"""
+
+import sys
+import os
+import signal
+import subprocess
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import resources
+
+posix_only = pytest.mark.skipif(os.name == "nt", reason="rusage e limiti solo su POSIX")
+
+ALLOCATE_200MB = f'"{sys.executable}" -c "x = bytearray(200 * 1024 * 1024)"'
+
+
+def run(cmd, cli_type="gemini", timeout=10):
+    process = subprocess.Popen(resources.limit_command(cli_type, cmd), shell=True, start_new_session=True,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    kill = lambda p: os.killpg(p.pid, signal.SIGKILL)
+    returncode, usage, timed_out = resources.wait_with_usage(process, timeout, kill)
+    output = process.stdout.read().decode()
+    process.stdout.close()
+    return returncode, usage, timed_out, output
+
+
+@posix_only
+class TestUsage:
+    """Test per la raccolta di rusage dei processi CLI"""
+
+    def test_usage_covers_pipeline(self):
+        returncode, usage, timed_out, _ = run(f"cat /dev/null | {ALLOCATE_200MB}; exit 3")
+        assert returncode == 3
+        assert not timed_out
+        # Il processo in fondo alla pipeline è incluso nell'RSS massimo
+        assert usage["max_rss_bytes"] > 200 * 1024 * 1024
+        assert usage["user_cpu_seconds"] + usage["system_cpu_seconds"] > 0
+
+    def test_timeout_kills_and_reaps(self):
+        returncode, usage, timed_out, _ = run("sleep 5", timeout=0.2)
+        assert timed_out
+        assert returncode == -signal.SIGKILL
+        assert usage is not None
+
+    def test_merge_usage(self):
+        total = {}
+        resources.merge_usage(total, {"user_cpu_seconds": 1.0, "max_rss_bytes": 100})
+        resources.merge_usage(total, {"user_cpu_seconds": 0.5, "max_rss_bytes": 50})
+        assert total == {"user_cpu_seconds": 1.5, "max_rss_bytes": 100}
+
+
+@posix_only
+class TestLimits:
+    """Test per i limiti per CLI"""
+
+    def test_no_limits_by_default(self, monkeypatch):
+        monkeypatch.setattr(resources, "CLI_RESOURCE_LIMITS", {})
+        assert resources.limit_command("gemini", "cat p | gemini") == "cat p | gemini"
+
+    def test_memory_cap(self, monkeypatch):
+        monkeypatch.setattr(resources, "CLI_RESOURCE_LIMITS", {"gemini": {"memory_mb": 100}})
+        returncode, _, _, _ = run(ALLOCATE_200MB)
+        assert returncode != 0
+
+        # Le altre CLI non sono limitate
+        returncode, _, _, _ = run(ALLOCATE_200MB, cli_type="codex")
+        assert returncode == 0
+
+    def test_nice(self, monkeypatch):
+        monkeypatch.setattr(resources, "CLI_RESOURCE_LIMITS", {"claude": {"nice": 5}})
+        _, _, _, output = run(f'"{sys.executable}" -c "import os; print(os.nice(0))"', cli_type="claude")
+        assert int(output) == os.nice(0) + 5
+
+    def test_limits_cover_the_whole_pipeline(self, monkeypatch):
+        monkeypatch.setattr(resources, "CLI_RESOURCE_LIMITS", {"codex": {"memory_mb": 100, "nice": 3}})
+        returncode, _, _, output = run(
+            f"echo 'q' | {ALLOCATE_200MB} || echo \"$(ulimit -d) $(nice)\"", cli_type="codex"
+        )
+        assert returncode == 0
+        assert output.split() == [str(100 * 1024), str(os.nice(0) + 3)]
@@ -0,0 +1,132 @@
+"""
+Test suite per shared_state.py e per la scrittura concorrente di storage.py
+
+Esegui con: pytest backend/tests/test_shared_state.py -v
+"""
+
+import asyncio
+import multiprocessing
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import cli_bridge, health, shared_state, storage
+from backend.deadline import Deadline
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="processi concorrenti via fork")
+
+
+@pytest.fixture
+def shared(tmp_path, monkeypatch):
+    """Stato condiviso e storage in directory temporanee, ripristinati a fine test."""
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path / "data"))
+    shared_state.set_shared(True, str(tmp_path / "state"))
+    yield tmp_path
+    shared_state.set_shared(False)
+
+
+def run_processes(target, count, *args):
+    """Esegue `target(i, *args)` in `count` processi e ne attende la fine."""
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=target, args=(i, *args)) for i in range(count)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+    assert all(p.exitcode == 0 for p in processes)
+
+
+def add_messages(i, count):
+    for n in range(count):
+        storage.add_user_message("c1", f"{i}-{n}")
+
+
+def increment(i, count):
+    for _ in range(count):
+        shared_state.update("test", "counter", lambda value: (value or 0) + 1)
+
+
+class TestStorage:
+    """Test per le scritture di più processi sugli stessi file"""
+
+    def test_concurrent_appends_are_not_lost(self, shared):
+        storage.create_conversation("c1")
+
+        run_processes(add_messages, 4, 25)
+
+        messages = storage.get_conversation("c1")["messages"]
+        assert len(messages) == 100
+        assert {m["content"] for m in messages} == {f"{i}-{n}" for i in range(4) for n in range(25)}
+        # Nessun file temporaneo rimasto accanto alle conversazioni
+        assert sorted(os.listdir(storage.DATA_DIR)) == [".locks", "c1.json"]
+
+
+class TestSharedStore:
+    """Test per lo store chiave-valore e le claim dei job"""
+
+    def test_updates_are_atomic_across_processes(self, shared):
+        run_processes(increment, 4, 50)
+        assert shared_state.get("test", "counter") == 200
+
+    def test_job_claims(self, shared, monkeypatch):
+        assert shared_state.claim_job("memory:c1", ttl=60)
+        assert not shared_state.claim_job("memory:c1", ttl=60)
+        shared_state.release_job("memory:c1")
+        assert shared_state.claim_job("memory:c1", ttl=60)
+
+        # Una claim mai rilasciata (processo morto) scade dopo il ttl
+        assert shared_state.claim_job("title:c1", ttl=0)
+        assert shared_state.claim_job("title:c1", ttl=60)
+
+    def test_health_is_shared(self, shared):
+        health.reset()
+        health.record_call("gemini", 2.0, True)
+        health.record_call("codex", 1.0, False)
+
+        stats = shared_state.items("health")
+        assert stats["gemini"]["latency_ewma"] == 2.0
+        assert stats["codex"]["consecutive_failures"] == 1
+        assert health.get_latency("gemini") == 2.0
+        assert set(health.snapshot()) == {"codex", "gemini"}
+        health.reset()
+        assert shared_state.items("health") == {}
+
+
+class TestCliSlots:
+    """Test per gli slot delle CLI condivisi tra processi"""
+
+    @pytest.mark.asyncio
+    async def test_slots_limit_calls(self, shared):
+        first = await shared_state.acquire_cli_slot("claude", 1)
+        waiting = asyncio.create_task(shared_state.acquire_cli_slot("claude", 1))
+        await asyncio.sleep(0.2)
+        assert not waiting.done()
+
+        shared_state.release_cli_slot(first)
+        second = await asyncio.wait_for(waiting, 1)
+        shared_state.release_cli_slot(second)
+
+    @pytest.mark.asyncio
+    async def test_slot_wait_stops_at_the_deadline(self, shared):
+        limit = cli_bridge.CLI_MAX_CONCURRENCY["claude"]
+        held = await shared_state.acquire_cli_slot("claude", limit)
+        others = [await shared_state.acquire_cli_slot("claude", limit) for _ in range(limit - 1)]
+        with pytest.raises(asyncio.TimeoutError):
+            await shared_state.acquire_cli_slot("claude", limit, timeout=0.1)
+
+        # query_model rinuncia alla deadline senza trattenere il semaforo
+        try:
+            response = await cli_bridge.query_model("claude", [{"role": "user", "content": "q"}],
+                                                    deadline=Deadline(0.2))
+        finally:
+            for slot in [held] + others:
+                shared_state.release_cli_slot(slot)
+        assert response is None
+        assert cli_bridge.get_cli_semaphore("claude")._value == limit
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_sharing(self, shared):
+        shared_state.set_shared(False)
+        assert await shared_state.acquire_cli_slot("claude", 1) is None
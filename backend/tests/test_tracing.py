@@ -0,0 +1,129 @@
+"""
+Test suite per tracing.py
+
+Esegui con: pytest backend/tests/test_tracing.py -v
+"""
+
+import sys
+import os
+import json
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import tracing
+from backend.tracing import FileSpanExporter
+
+
+class MemoryExporter:
+    """Exporter che tiene gli span in una lista"""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter():
+    memory = MemoryExporter()
+    tracing.set_exporter(memory)
+    return memory
+
+
+class TestSpans:
+    """Test per annidamento e propagazione degli span"""
+
+    def test_nested_spans_share_trace(self, exporter):
+        with tracing.span("request") as outer:
+            with tracing.span("stage", members=3) as inner:
+                inner.set("responses", 2)
+
+        inner_span, outer_span = exporter.spans
+        assert inner_span.parent_id == outer.span_id
+        assert inner_span.trace_id == outer.trace_id
+        assert outer_span.parent_id is None
+        assert inner_span.attributes == {"members": 3, "responses": 2}
+
+    def test_propagates_to_tasks_and_threads(self, exporter):
+        def in_thread():
+            with tracing.span("thread"):
+                pass
+
+        async def in_task():
+            with tracing.span("task"):
+                await asyncio.to_thread(in_thread)
+
+        async def main():
+            with tracing.span("request") as root:
+                await asyncio.gather(asyncio.create_task(in_task()))
+            return root
+
+        root = asyncio.run(main())
+        by_name = {s.name: s for s in exporter.spans}
+        assert by_name["task"].parent_id == root.span_id
+        assert by_name["thread"].parent_id == by_name["task"].span_id
+
+    def test_generator_spans_stay_inside_the_generator(self, exporter):
+        async def members():
+            for index in range(2):
+                with tracing.span("cli", index=index):
+                    await asyncio.sleep(0)
+                yield index
+
+        async def stage():
+            with tracing.span("stage", activate=False) as stage_span:
+                async for index in tracing.iterate(stage_span, members()):
+                    yield index
+
+        async def main():
+            seen = []
+            with tracing.span("request") as root:
+                async for _ in stage():
+                    # Tra un evento e l'altro lo span corrente resta quello del consumatore
+                    seen.append(tracing.current_span())
+            return root, seen
+
+        root, seen = asyncio.run(main())
+        by_name = {s.name: s for s in exporter.spans}
+        assert seen == [root, root]
+        assert by_name["stage"].parent_id == root.span_id
+        assert by_name["cli"].parent_id == by_name["stage"].span_id
+        assert tracing.current_span() is tracing._NOOP_SPAN
+
+    def test_error_status(self, exporter):
+        with pytest.raises(RuntimeError):
+            with tracing.span("failing"):
+                raise RuntimeError("boom")
+
+        assert exporter.spans[0].status == "error"
+        assert "boom" in exporter.spans[0].error
+        assert tracing.current_span() is tracing._NOOP_SPAN
+
+    def test_disabled_is_noop(self):
+        with tracing.span("ignored") as span:
+            span.set("key", "value")
+        assert tracing.current_span() is tracing._NOOP_SPAN
+
+
+class TestFileExporter:
+    """Test per l'export JSONL con rotazione"""
+
+    def test_rotation(self, tmp_path):
+        path = str(tmp_path / "spans.jsonl")
+        tracing.set_exporter(FileSpanExporter(path, max_bytes=600, backup_count=2))
+
+        for i in range(20):
+            with tracing.span("op", index=i):
+                pass
+
+        assert os.path.exists(path + ".1")
+        assert os.path.exists(path + ".2")
+        assert not os.path.exists(path + ".3")
+        with open(path) as f:
+            last = [json.loads(line) for line in f][-1]
+        assert last["attributes"]["index"] == 19
+        assert last["duration_ms"] >= 0
@@ -0,0 +1,77 @@
+"""
+Test suite per workdirs.py
+
+Esegui con: pytest backend/tests/test_workdirs.py -v
+"""
+
+import os
+import subprocess
+import shutil
+import pytest
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend import workdirs
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """Pool con radice in una directory temporanea."""
+    pool = workdirs.WorkdirPool(str(tmp_path / "pool"))
+    yield pool
+    pool.close()
+
+
+class TestWorkdirPool:
+    """Test per WorkdirPool"""
+
+    def test_prewarm_and_reuse(self, pool):
+        pool.prewarm("claude", 2)
+        assert pool.idle_count("claude") == 2
+
+        first = pool.acquire("claude")
+        second = pool.acquire("claude")
+        third = pool.acquire("claude")
+        assert len({first, second, third}) == 3
+        assert os.listdir(first) == []
+
+        for path in (first, second, third):
+            pool.release("claude", path)
+        assert pool.idle_count("claude") == 3
+        assert pool.acquire("claude") == third
+
+    def test_codex_gets_a_git_repository(self, pool):
+        path = pool.acquire("codex")
+        assert os.listdir(path) == [".git"]
+        if shutil.which("git"):
+            result = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=path,
+                                    capture_output=True, text=True)
+            assert result.returncode == 0
+            assert os.path.realpath(result.stdout.strip()) == os.path.realpath(path)
+
+    def test_release_resets_the_directory(self, pool):
+        with pool.lease("codex") as path:
+            os.makedirs(os.path.join(path, "src"))
+            with open(os.path.join(path, "notes.txt"), "w") as f:
+                f.write("left behind")
+            with open(os.path.join(path, ".git", "HEAD"), "w") as f:
+                f.write("ref: refs/heads/other\n")
+
+        assert os.listdir(path) == [".git"]
+        with open(os.path.join(path, ".git", "HEAD")) as f:
+            assert f.read() == "ref: refs/heads/main\n"
+        assert workdirs._git_is_pristine(path)
+
+    def test_close_removes_owned_root(self):
+        pool = workdirs.WorkdirPool()
+        pool.prewarm("gemini", 1)
+        root = pool.root
+        pool.close()
+        assert not os.path.exists(root)
+
+    def test_each_process_gets_its_part_of_a_shared_root(self, tmp_path):
+        root = str(tmp_path / "shared")
+        # Anche con un solo processo API: worker e `ask` sullo stesso host usano la stessa radice
+        assert workdirs._process_root(root) == os.path.join(root, f"pid-{os.getpid()}")
+        assert workdirs._process_root(None) is None
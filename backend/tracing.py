@@ -0,0 +1,272 @@
+"""Lightweight tracing: nested spans per request, stage, CLI call and storage op.
+
+Spans are propagated with contextvars, so they follow asyncio tasks and
+`asyncio.to_thread` calls automatically. A span must not stay current
+across a `yield`: the contextvar would leak into the consumer's context.
+Async generators open their spans with `activate=False` and run the work
+to nest under them with `iterate`. Finished spans go to the exporter
+selected in config:
+
+- "file": rotating JSONL file (one span per line), for offline waterfalls
+- "otlp": OTLP/HTTP JSON to a local collector (e.g. Jaeger, otel-collector)
+- None (default): tracing disabled, spans cost a single context lookup
+"""
+
+import asyncio
+import contextvars
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Any, Optional, List
+
+from .config import (
+    TRACE_EXPORTER,
+    TRACE_FILE,
+    TRACE_MAX_BYTES,
+    TRACE_BACKUP_COUNT,
+    TRACE_OTLP_ENDPOINT,
+)
+
+
+class Span:
+    """A timed operation with attributes, part of a trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_ns", "end_ns", "status", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = "ok"
+        self.error = None
+
+    def set(self, key: str, value: Any):
+        """Set an attribute on the span."""
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stand-in used when tracing is disabled."""
+
+    def set(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "llm_council_current_span", default=None
+)
+
+
+class FileSpanExporter:
+    """Append spans to a JSONL file, rotating it like logging's RotatingFileHandler."""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class OTLPSpanExporter:
+    """Send spans in batches to an OTLP/HTTP JSON endpoint from a background thread."""
+
+    def __init__(self, endpoint: str, batch_size: int = 64, flush_interval: float = 2.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # Never block the hot path: drop spans if the collector is down
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and time.monotonic() < deadline:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0.01)))
+                except queue.Empty:
+                    break
+            self._send(batch)
+
+    @staticmethod
+    def _attribute(key: str, value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _send(self, spans: List[Span]):
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [self._attribute("service.name", "llm-council")]},
+            "scopeSpans": [{
+                "scope": {"name": "backend.tracing"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent_id or "",
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [self._attribute(k, v) for k, v in s.attributes.items()],
+                    "status": {"code": 2, "message": s.error or ""} if s.status == "error" else {"code": 1},
+                } for s in spans],
+            }],
+        }]}
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            print(f"Trace export to {self.url} failed: {e}")
+
+
+def _create_exporter():
+    if TRACE_EXPORTER == "file":
+        return FileSpanExporter(TRACE_FILE, TRACE_MAX_BYTES, TRACE_BACKUP_COUNT)
+    if TRACE_EXPORTER == "otlp":
+        return OTLPSpanExporter(TRACE_OTLP_ENDPOINT)
+    return None
+
+
+_exporter = _create_exporter()
+
+
+def set_exporter(exporter) -> None:
+    """Replace the span exporter (None disables tracing)."""
+    global _exporter
+    _exporter = exporter
+
+
+def current_span():
+    """The innermost active span (a no-op span if there is none)."""
+    return _current_span.get() or _NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, activate: bool = True, **attributes):
+    """
+    Record a span around a block.
+
+    Args:
+        name: Span name (e.g. "council.stage1", "cli.call")
+        activate: Make the span the current one inside the block, so that
+            spans opened there nest under it. Blocks that yield (in async
+            generators) must pass False and use iterate instead
+        **attributes: Initial attributes
+
+    Yields:
+        The span, to add attributes discovered while it runs
+    """
+    exporter = _exporter
+    if exporter is None:
+        yield _NOOP_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current) if activate else None
+    try:
+        yield current
+    except (GeneratorExit, asyncio.CancelledError):
+        current.status = "cancelled"
+        raise
+    except BaseException as e:
+        current.status = "error"
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        if token is not None:
+            _current_span.reset(token)
+        try:
+            exporter.export(current)
+        except Exception as e:
+            print(f"Trace export failed: {e}")
+
+
+async def iterate(parent, events: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """
+    Iterate an async generator with `parent` as the current span while it
+    runs (spans and tasks it starts nest under it), but not in between.
+
+    Args:
+        parent: Span from span(..., activate=False)
+        events: The async generator to iterate (closed at the end)
+
+    Yields:
+        The generator's items
+    """
+    try:
+        while True:
+            token = _current_span.set(parent) if isinstance(parent, Span) else None
+            try:
+                item = await events.__anext__()
+            except StopAsyncIteration:
+                return
+            finally:
+                if token is not None:
+                    _current_span.reset(token)
+            yield item
+    finally:
+        await events.aclose()
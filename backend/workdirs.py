@@ -0,0 +1,246 @@
+"""Pooled scratch working directories for the CLI subprocesses."""
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Optional
+from .config import CLI_MAX_CONCURRENCY, CLI_WORKDIR_ISOLATION, CLI_WORKDIR_ROOT
+
+# Minimal repository layout, enough for git (and Codex's "inside a git
+# repo" check) without running `git init` for every directory
+_GIT_FILES = {
+    "HEAD": "ref: refs/heads/main\n",
+    "config": "[core]\n\trepositoryformatversion = 0\n\tbare = false\n",
+}
+_GIT_DIRS = ("objects", "refs/heads", "refs/tags")
+
+# What each CLI needs in its working directory
+_LAYOUTS = {
+    "codex": {"git": True},
+}
+
+
+class WorkdirPool:
+    """
+    Scratch directories handed out to one CLI call at a time.
+
+    Each CLI gets its own directories, set up as it needs them (an empty
+    git repository for Codex, nothing at all for the others), so the CLI
+    has nothing of the host project to scan, index or modify. Directories
+    are reset when released, and a directory the reset cannot restore is
+    replaced with a new one.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Args:
+            root: Parent directory of the scratch directories (default: a
+                new temporary directory, removed at exit)
+        """
+        self._root = root
+        self._owns_root = root is None
+        self._idle: Dict[str, List[str]] = {}
+        self._created: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> str:
+        """Parent directory of the scratch directories (created on first use)."""
+        with self._lock:
+            return self._ensure_root()
+
+    def _ensure_root(self) -> str:
+        if self._root is None:
+            self._root = tempfile.mkdtemp(prefix="llm-council-workdirs-")
+        os.makedirs(self._root, exist_ok=True)
+        return self._root
+
+    def prewarm(self, cli_type: str, count: Optional[int] = None):
+        """
+        Create idle directories for a CLI ahead of its calls.
+
+        Args:
+            cli_type: CLI the directories are set up for
+            count: Directories to have ready (default: the CLI's
+                CLI_MAX_CONCURRENCY, or 1)
+        """
+        count = count or CLI_MAX_CONCURRENCY.get(cli_type) or 1
+        with self._lock:
+            idle = self._idle.setdefault(cli_type, [])
+            while len(idle) < count:
+                idle.append(self._create(cli_type))
+
+    def acquire(self, cli_type: str) -> str:
+        """
+        Take a directory for one CLI call (a new one if none is idle).
+
+        Args:
+            cli_type: CLI that will run in the directory
+
+        Returns:
+            Path of the directory, for the caller's exclusive use
+        """
+        with self._lock:
+            idle = self._idle.setdefault(cli_type, [])
+            if idle:
+                return idle.pop()
+            return self._create(cli_type)
+
+    def release(self, cli_type: str, path: str):
+        """
+        Reset a directory after its call and put it back in the pool.
+
+        Args:
+            cli_type: CLI the directory was acquired for
+            path: Path returned by acquire
+        """
+        try:
+            _reset(path, cli_type)
+        except OSError:
+            shutil.rmtree(path, ignore_errors=True)
+            return
+        with self._lock:
+            self._idle.setdefault(cli_type, []).append(path)
+
+    @contextmanager
+    def lease(self, cli_type: str):
+        """Context manager around acquire/release, yielding the path."""
+        path = self.acquire(cli_type)
+        try:
+            yield path
+        finally:
+            self.release(cli_type, path)
+
+    def idle_count(self, cli_type: str) -> int:
+        """Number of idle directories of a CLI."""
+        with self._lock:
+            return len(self._idle.get(cli_type, []))
+
+    def close(self):
+        """Remove every directory (and the root, if the pool created it)."""
+        with self._lock:
+            for paths in self._idle.values():
+                for path in paths:
+                    shutil.rmtree(path, ignore_errors=True)
+            self._idle.clear()
+            if self._owns_root and self._root is not None:
+                shutil.rmtree(self._root, ignore_errors=True)
+                self._root = None
+
+    def _create(self, cli_type: str) -> str:
+        """Create and set up a new directory (called with the lock held)."""
+        index = self._created.get(cli_type, 0)
+        self._created[cli_type] = index + 1
+        path = os.path.join(self._ensure_root(), f"{cli_type}-{index}")
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        _setup(path, cli_type)
+        return path
+
+
+def _setup(path: str, cli_type: str):
+    """Lay out a directory as the CLI needs it."""
+    if _LAYOUTS.get(cli_type, {}).get("git"):
+        git_dir = os.path.join(path, ".git")
+        for name in _GIT_DIRS:
+            os.makedirs(os.path.join(git_dir, name), exist_ok=True)
+        for name, content in _GIT_FILES.items():
+            with open(os.path.join(git_dir, name), "w") as f:
+                f.write(content)
+
+
+def _reset(path: str, cli_type: str):
+    """
+    Bring a used directory back to its initial layout.
+
+    Everything the call left behind is removed; the git layout is rebuilt
+    only if the CLI touched it.
+    """
+    keep_git = _LAYOUTS.get(cli_type, {}).get("git") and _git_is_pristine(path)
+    for entry in os.scandir(path):
+        if keep_git and entry.name == ".git":
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.unlink(entry.path)
+    if not keep_git:
+        _setup(path, cli_type)
+
+
+def _git_is_pristine(path: str) -> bool:
+    """Whether the git layout is still exactly the one created by _setup."""
+    git_dir = os.path.join(path, ".git")
+    expected_dirs = {""} | {name for spec in _GIT_DIRS for name in _parents(spec)}
+    for current, dirs, files in os.walk(git_dir):
+        relative = os.path.relpath(current, git_dir).replace(os.sep, "/")
+        relative = "" if relative == "." else relative
+        if relative not in expected_dirs:
+            return False
+        if relative == "" and set(files) != set(_GIT_FILES):
+            return False
+        if relative != "" and files:
+            return False
+    for name, content in _GIT_FILES.items():
+        with open(os.path.join(git_dir, name)) as f:
+            if f.read() != content:
+                return False
+    return True
+
+
+def _parents(spec: str) -> List[str]:
+    """'refs/heads' -> ['refs', 'refs/heads']."""
+    parts = spec.split("/")
+    return ["/".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def _process_root(root: Optional[str]) -> Optional[str]:
+    """
+    This process's part of a configured root.
+
+    Every process using the root (API server processes, but also a worker
+    agent or an `ask` on the same host) gets its own subdirectory, since
+    creating a directory replaces whatever has its name.
+    """
+    return os.path.join(root, f"pid-{os.getpid()}") if root else None
+
+
+_pool = WorkdirPool(_process_root(CLI_WORKDIR_ROOT))
+atexit.register(_pool.close)
+_isolation = CLI_WORKDIR_ISOLATION
+
+
+def set_isolation(enabled: bool):
+    """Run the CLIs in pooled scratch directories (True) or in the current directory."""
+    global _isolation
+    _isolation = enabled
+
+
+def get_pool() -> WorkdirPool:
+    """The process-wide directory pool."""
+    return _pool
+
+
+@contextmanager
+def lease(cli_type: str):
+    """
+    Working directory for one CLI call.
+
+    Yields a pooled scratch directory, or the current directory when
+    isolation is disabled (CLI_WORKDIR_ISOLATION).
+    """
+    if not _isolation:
+        yield os.getcwd()
+        return
+    with _pool.lease(cli_type) as path:
+        yield path
+
+
+def prewarm(cli_types: List[str]):
+    """Create the scratch directories of the given CLIs ahead of their calls."""
+    if _isolation:
+        for cli_type in cli_types:
+            _pool.prewarm(cli_type)
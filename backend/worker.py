@@ -0,0 +1,144 @@
+"""Worker agent: runs the council's CLI calls on behalf of an API server.
+
+Start one per machine (or several on one machine, on different ports or
+sockets) and list them in CLI_WORKERS on the API host:
+
+    python -m backend worker --port 8101
+    python -m backend worker --uds /tmp/llm-council-worker.sock
+
+An agent runs whatever prompt it is sent, so every request must carry the
+shared CLI_WORKER_TOKEN, and an agent without a token only listens on
+loopback.
+"""
+
+import asyncio
+import hmac
+import ipaddress
+import os
+import socket
+import sys
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional
+from fastapi import Depends, FastAPI, HTTPException, Request
+from pydantic import BaseModel
+from . import cli_bridge
+from . import preflight
+from . import workdirs
+from .config import CLI_MAX_CONCURRENCY, CLI_WORKER_TOKEN, PREFLIGHT_ON_STARTUP, WORKER_PORT
+
+
+# How often a running call checks whether the API server gave up on it
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class QueryRequest(BaseModel):
+    """A query_model call forwarded by an API server."""
+    model: str
+    messages: List[Dict[str, str]]
+    timeout: Optional[float] = None
+
+
+def is_loopback(host: str) -> bool:
+    """Whether a listen address is only reachable from this machine."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def create_app(name: Optional[str] = None, token: Optional[str] = CLI_WORKER_TOKEN) -> FastAPI:
+    """
+    Build the agent's HTTP API.
+
+    - POST /query runs query_model on this host and returns its response
+      (the CLI is killed if the API server disconnects first)
+    - GET /health reports the CLIs installed here, their capacity
+      (CLI_MAX_CONCURRENCY), the calls in flight and the startup
+      preflight of the CLIs (see preflight.py)
+
+    Both require "Authorization: Bearer <token>" when a token is set.
+
+    Args:
+        name: Name reported to the API servers (default: hostname:pid)
+        token: Shared secret of the API servers (None: no authentication)
+
+    Returns:
+        The FastAPI application
+    """
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    in_flight = {cli: 0 for cli in CLI_MAX_CONCURRENCY}
+
+    def authorize(request: Request):
+        if token is None:
+            return
+        expected = f"Bearer {token}".encode()
+        if not hmac.compare_digest(request.headers.get("authorization", "").encode(), expected):
+            raise HTTPException(status_code=401, detail="Missing or wrong worker token")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await asyncio.to_thread(workdirs.prewarm, list(CLI_MAX_CONCURRENCY))
+        if PREFLIGHT_ON_STARTUP:
+            await preflight.run(list(CLI_MAX_CONCURRENCY))
+        yield
+
+    app = FastAPI(title=f"LLM Council worker {name}", lifespan=lifespan,
+                  dependencies=[Depends(authorize)])
+
+    @app.post("/query")
+    async def query(request: QueryRequest, http_request: Request):
+        cli_type = cli_bridge.determine_cli(request.model)
+        in_flight[cli_type] = in_flight.get(cli_type, 0) + 1
+        call = asyncio.create_task(cli_bridge.query_model(
+            request.model, request.messages, timeout=request.timeout, local=True
+        ))
+        try:
+            # An API server that cancels the call drops the connection: the
+            # CLI is killed rather than left running for nobody
+            while not call.done():
+                await asyncio.wait({call}, timeout=DISCONNECT_POLL_SECONDS)
+                if not call.done() and await http_request.is_disconnected():
+                    call.cancel()
+                    await asyncio.gather(call, return_exceptions=True)
+                    return {"worker": name, "response": None, "outcome": "cancelled"}
+            response = call.result()
+        finally:
+            call.cancel()
+            in_flight[cli_type] -= 1
+        return {"worker": name, "response": response,
+                "outcome": "success" if response is not None else "error"}
+
+    @app.get("/health")
+    async def health():
+        return {
+            "status": "ok",
+            "name": name,
+            "capacity": dict(CLI_MAX_CONCURRENCY),
+            "in_flight": dict(in_flight),
+            "clis": {cli: cli_bridge._find_cli_path(cli) is not None for cli in CLI_MAX_CONCURRENCY},
+            "preflight": preflight.get_report()
+        }
+
+    return app
+
+
+def run(args) -> int:
+    """Serve the agent with uvicorn."""
+    if not args.uds and not is_loopback(args.host) and CLI_WORKER_TOKEN is None:
+        print(f"Refusing to listen on {args.host} without a worker token: set "
+              "LLM_COUNCIL_WORKER_TOKEN (CLI_WORKER_TOKEN) here and on the API servers",
+              file=sys.stderr)
+        return 2
+
+    import uvicorn
+
+    app = create_app(args.name)
+    if args.uds:
+        if os.path.exists(args.uds):
+            os.unlink(args.uds)
+        uvicorn.run(app, uds=args.uds)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port or WORKER_PORT)
+    return 0
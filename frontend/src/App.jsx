@@ -101,6 +101,16 @@ function App() {
             });
             break;
 
+          case 'stage1_member_complete':
+            if (!event.data) break;
+            setCurrentConversation((prev) => {
+              const messages = [...prev.messages];
+              const lastMsg = messages[messages.length - 1];
+              lastMsg.stage1 = [...(lastMsg.stage1 || []), event.data];
+              return { ...prev, messages };
+            });
+            break;
+
           case 'stage1_complete':
             setCurrentConversation((prev) => {
               const messages = [...prev.messages];
@@ -116,6 +126,19 @@ function App() {
               const messages = [...prev.messages];
               const lastMsg = messages[messages.length - 1];
               lastMsg.loading.stage2 = true;
+              if (event.metadata) {
+                lastMsg.metadata = { ...lastMsg.metadata, ...event.metadata };
+              }
+              return { ...prev, messages };
+            });
+            break;
+
+          case 'stage2_member_complete':
+            if (!event.data) break;
+            setCurrentConversation((prev) => {
+              const messages = [...prev.messages];
+              const lastMsg = messages[messages.length - 1];
+              lastMsg.stage2 = [...(lastMsg.stage2 || []), event.data];
               return { ...prev, messages };
             });
             break;